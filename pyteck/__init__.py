@@ -1,2 +1,12 @@
 from ._version import __version__, __version_info__
-from .eval_model import evaluate_model
+
+
+def evaluate_model(*args, **kwargs):
+    """Evaluates the ignition delay error of a model for a given dataset.
+
+    Imports :mod:`pyteck.eval_model` and its dependencies on first use, so
+    that importing :mod:`pyteck` stays fast. See
+    :func:`pyteck.eval_model.evaluate_model` for parameters.
+    """
+    from .eval_model import evaluate_model
+    return evaluate_model(*args, **kwargs)
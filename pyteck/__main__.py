@@ -1,86 +1,793 @@
 from argparse import ArgumentParser
 import multiprocessing
+import os
+import sys
 
-from .eval_model import evaluate_model
-
-parser = ArgumentParser(description='PyTeCK: Evaluate '
-                                    'performance of kinetic models using '
-                                    'experimental ignition delay data.'
-                        )
-parser.add_argument('-m', '--model',
-                    type=str,
-                    required=True,
-                    help='Input model filename (e.g., mech.cti).'
-                    )
-parser.add_argument('-k', '--model-keys',
-                    type=str,
-                    dest='model_keys_file',
-                    required=True,
-                    help='JSON file with keys for species in models.'
-                    )
-parser.add_argument('-d', '--dataset',
-                    type=str,
-                    required=True,
-                    help='Filename for list of datasets.'
-                    )
-parser.add_argument('-dp', '--data-path',
-                    type=str,
-                    dest='data_path',
-                    required=False,
-                    default='data',
-                    help='Local directory holding dataset files.'
-                    )
-parser.add_argument('-mp', '--model-path',
-                    type=str,
-                    dest='model_path',
-                    required=False,
-                    default='models',
-                    help='Local directory holding model files.'
-                    )
-parser.add_argument('-rp', '--results-path',
-                    type=str,
-                    dest='results_path',
-                    required=False,
-                    default='results',
-                    help='Local directory holding result HDF5 files.'
-                    )
-parser.add_argument('-v', '--model-variant',
-                    type=str,
-                    dest='model_variant_file',
-                    required=False,
-                    help='JSON with variants for models for, e.g., bath '
-                         'gases and pressures.'
-                    )
-parser.add_argument('-nt', '--num-threads',
-                    type=int,
-                    dest='num_threads',
-                    default=multiprocessing.cpu_count()-1 or 1,
-                    required=False,
-                    help='The number of threads to use to run simulations in '
-                         'parallel.'
-                    )
-parser.add_argument('-p', '--print',
-                    dest='print_results',
-                    action='store_true',
-                    default=False,
-                    help='Print model evaluation results to screen.'
-                    )
-parser.add_argument('--restart',
-                    dest='restart',
-                    action='store_true',
-                    default=False,
-                    help='Reuse prior results files, and only calculate new ones.'
-                    )
-parser.add_argument('--skip-validation',
-                    dest='skip_validation',
-                    action='store_true',
-                    default=False,
-                    help='Skips ChemKED file validation.'
-                    )
-args = parser.parse_args()
-
-evaluate_model(args.model, args.model_keys_file, args.dataset,
-               args.data_path, args.model_path, args.results_path,
-               args.model_variant_file, args.num_threads, args.print_results,
-               args.restart, args.skip_validation,
-               )
+
+def convert(argv):
+    """Command-line interface for converting ReSpecTh XML files to ChemKED.
+    """
+    parser = ArgumentParser(prog='pyteck convert',
+                            description='Convert ReSpecTh XML files to '
+                                        'ChemKED YAML files, skipping files '
+                                        'unchanged since the last conversion.'
+                            )
+    parser.add_argument('inputs',
+                        type=str,
+                        nargs='+',
+                        help='Input XML files, directories, or glob patterns.'
+                        )
+    parser.add_argument('-o', '--output',
+                        type=str,
+                        required=False,
+                        default='',
+                        help='Output directory for files'
+                        )
+    parser.add_argument('-fa', '--file-author',
+                        dest='file_author',
+                        type=str,
+                        required=False,
+                        default='',
+                        help='File author name to override original'
+                        )
+    parser.add_argument('-fo', '--file-author-orcid',
+                        dest='file_author_orcid',
+                        type=str,
+                        required=False,
+                        default='',
+                        help='File author ORCID'
+                        )
+    parser.add_argument('-nt', '--num-threads',
+                        type=int,
+                        dest='num_threads',
+                        default=multiprocessing.cpu_count(),
+                        required=False,
+                        help='The number of processes to use for conversion.'
+                        )
+    parser.add_argument('--manifest',
+                        type=str,
+                        dest='manifest_file',
+                        required=False,
+                        help='Manifest of converted files (default: '
+                             'conversion-manifest.json in output directory).'
+                        )
+    parser.add_argument('--summary',
+                        type=str,
+                        dest='summary_file',
+                        required=False,
+                        help='Summary of converted, skipped, and failed files '
+                             '(default: conversion-summary.json in output '
+                             'directory).'
+                        )
+    parser.add_argument('--force',
+                        action='store_true',
+                        default=False,
+                        help='Convert all files, ignoring the manifest.'
+                        )
+    args = parser.parse_args(argv)
+
+    import json
+    from .parse_files_XML import convert_XML_files
+    summary = convert_XML_files(args.inputs, args.output, args.file_author,
+                                args.file_author_orcid, args.num_threads,
+                                args.manifest_file, args.force
+                                )
+
+    summary_file = args.summary_file
+    if summary_file is None:
+        summary_file = os.path.join(args.output, 'conversion-summary.json')
+    with open(summary_file, 'w') as f:
+        json.dump(summary, f, indent=1, sort_keys=True)
+
+    print('Converted: ' + str(len(summary['converted'])) +
+          ', skipped: ' + str(len(summary['skipped'])) +
+          ', failed: ' + str(len(summary['failed']))
+          )
+    for filename in sorted(summary['failed']):
+        print('Failed: ' + filename + ': ' + summary['failed'][filename])
+
+    return 1 if summary['failed'] else 0
+
+
+def query(argv):
+    """Command-line interface for querying a results database.
+    """
+    parser = ArgumentParser(prog='pyteck query',
+                            description='Summarize results stored in a PyTeCK '
+                                        'results database.'
+                            )
+    parser.add_argument('database',
+                        type=str,
+                        help='SQLite results database.'
+                        )
+    parser.add_argument('--by',
+                        choices=['model', 'dataset', 'run'],
+                        default='model',
+                        help='Group results by model, dataset, or run.'
+                        )
+    parser.add_argument('--model',
+                        type=str,
+                        dest='models',
+                        action='append',
+                        help='Only include this model (may be repeated).'
+                        )
+    parser.add_argument('--dataset',
+                        type=str,
+                        dest='datasets',
+                        action='append',
+                        help='Only include this dataset (may be repeated).'
+                        )
+    parser.add_argument('--min-temperature',
+                        type=float,
+                        dest='min_temperature',
+                        help='Minimum temperature (K) of datapoints.'
+                        )
+    parser.add_argument('--max-temperature',
+                        type=float,
+                        dest='max_temperature',
+                        help='Maximum temperature (K) of datapoints.'
+                        )
+    parser.add_argument('--min-pressure',
+                        type=float,
+                        dest='min_pressure',
+                        help='Minimum pressure (atm) of datapoints.'
+                        )
+    parser.add_argument('--max-pressure',
+                        type=float,
+                        dest='max_pressure',
+                        help='Maximum pressure (atm) of datapoints.'
+                        )
+    parser.add_argument('--all-runs',
+                        dest='all_runs',
+                        action='store_true',
+                        default=False,
+                        help='Include all runs, rather than the latest '
+                             'complete run of each model.'
+                        )
+    parser.add_argument('--runs',
+                        action='store_true',
+                        default=False,
+                        help='List runs instead of summarizing results.'
+                        )
+    parser.add_argument('--sql',
+                        type=str,
+                        help='Run given SQL query instead of summarizing '
+                             'results.'
+                        )
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.database):
+        parser.error('database ' + args.database + ' not found')
+
+    import sqlite3
+    from . import database
+    connection = sqlite3.connect(args.database)
+    try:
+        if args.sql:
+            cursor = connection.execute(args.sql)
+            header = [column[0] for column in cursor.description or []]
+            rows = cursor.fetchall()
+        elif args.runs:
+            header, rows = database.list_runs(connection)
+        else:
+            header, rows = database.summarize(
+                connection, args.by, args.models, args.datasets,
+                (args.min_temperature, args.max_temperature),
+                (args.min_pressure, args.max_pressure), args.all_runs
+                )
+    finally:
+        connection.close()
+
+    print(database.format_table(header, rows))
+    return 0
+
+
+def rescore(argv):
+    """Command-line interface for rescoring results stored in a database.
+    """
+    parser = ArgumentParser(prog='pyteck rescore',
+                            description='Recompute error metrics of a model '
+                                        'from simulated ignition delays '
+                                        'stored in a results database. Only '
+                                        'datasets without stored results are '
+                                        'simulated.'
+                            )
+    parser.add_argument('database',
+                        type=str,
+                        help='SQLite results database.'
+                        )
+    parser.add_argument('-m', '--model',
+                        type=str,
+                        required=True,
+                        help='Model filename, as given when evaluated.'
+                        )
+    parser.add_argument('-d', '--dataset',
+                        type=str,
+                        required=True,
+                        help='Filename for list of datasets.'
+                        )
+    parser.add_argument('--min-deviation',
+                        type=float,
+                        dest='min_deviation',
+                        help='Minimum allowable standard deviation of '
+                             'experimental data.'
+                        )
+    parser.add_argument('-o', '--output',
+                        type=str,
+                        help='Also write results to this YAML file.'
+                        )
+    parser.add_argument('-k', '--model-keys',
+                        type=str,
+                        dest='model_keys_file',
+                        help='JSON file with keys for species in models; '
+                             'needed to simulate datasets without stored '
+                             'results.'
+                        )
+    parser.add_argument('-dp', '--data-path',
+                        type=str,
+                        dest='data_path',
+                        default='data',
+                        help='Local directory holding dataset files.'
+                        )
+    parser.add_argument('-mp', '--model-path',
+                        type=str,
+                        dest='model_path',
+                        default='models',
+                        help='Local directory holding model files.'
+                        )
+    parser.add_argument('-rp', '--results-path',
+                        type=str,
+                        dest='results_path',
+                        default='results',
+                        help='Local directory holding result HDF5 files.'
+                        )
+    parser.add_argument('-v', '--model-variant',
+                        type=str,
+                        dest='model_variant_file',
+                        help='JSON with variants for models for, e.g., bath '
+                             'gases and pressures.'
+                        )
+    parser.add_argument('-nt', '--num-threads',
+                        type=int,
+                        dest='num_threads',
+                        default=multiprocessing.cpu_count()-1 or 1,
+                        help='The number of threads to use to run simulations '
+                             'in parallel.'
+                        )
+    parser.add_argument('--skip-validation',
+                        dest='skip_validation',
+                        action='store_true',
+                        default=False,
+                        help='Skips ChemKED file validation.'
+                        )
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.database):
+        parser.error('database ' + args.database + ' not found')
+
+    from .rescore import rescore_model
+    try:
+        output = rescore_model(args.model, args.dataset, args.database,
+                               args.min_deviation, args.model_keys_file,
+                               args.data_path, args.model_path,
+                               args.results_path, args.model_variant_file,
+                               args.num_threads, print_results=True,
+                               skip_validation=args.skip_validation
+                               )
+    except ValueError as err:
+        parser.error(str(err))
+
+    if args.output:
+        from .utils import yaml_dump
+        with open(args.output, 'w') as f:
+            yaml_dump(output, f, default_flow_style=False)
+    return 0
+
+
+def compile_mechanism(argv):
+    """Command-line interface for compiling models to slim YAML mechanisms.
+    """
+    parser = ArgumentParser(prog='pyteck compile-mechanism',
+                            description='Compile models to Cantera YAML '
+                                        'mechanisms without transport data, '
+                                        'recording the indices of keyed and '
+                                        'ignition target species. Models are '
+                                        'only compiled again once changed.'
+                            )
+    parser.add_argument('models',
+                        type=str,
+                        nargs='+',
+                        help='Model filenames (e.g., mech.cti), including any '
+                             'variants.'
+                        )
+    parser.add_argument('-k', '--model-keys',
+                        type=str,
+                        dest='model_keys_file',
+                        help='YAML file with keys for species in models.'
+                        )
+    parser.add_argument('-mp', '--model-path',
+                        type=str,
+                        dest='model_path',
+                        default='models',
+                        help='Local directory holding model files.'
+                        )
+    parser.add_argument('-o', '--output',
+                        type=str,
+                        default=os.path.join('results', 'compiled-mechanisms'),
+                        help='Directory of compiled mechanisms (default: '
+                             'compiled-mechanisms in the default results '
+                             'directory, as used by pyteck).'
+                        )
+    parser.add_argument('--force',
+                        action='store_true',
+                        default=False,
+                        help='Compile models even if already compiled.'
+                        )
+    args = parser.parse_args(argv)
+
+    from . import mechanisms
+    model_spec_key = {}
+    if args.model_keys_file:
+        from .utils import yaml_load
+        with open(args.model_keys_file, 'r') as f:
+            model_spec_key = yaml_load(f)
+
+    for model in args.models:
+        # Variants use the key of the model they are named after
+        key_names = [name for name in model_spec_key if model.startswith(name)]
+        species_key = None
+        if key_names:
+            species_key = model_spec_key[max(key_names, key=len)]
+
+        mechanism_file, species_indices = mechanisms.compile_mechanism(
+            os.path.join(args.model_path, model), species_key, args.output,
+            args.force
+            )
+        print(model + ': ' + mechanism_file + ' (' +
+              str(len(species_indices)) + ' species indices)'
+              )
+    return 0
+
+
+def plan(argv):
+    """Command-line interface for estimating the cost of a model evaluation.
+    """
+    parser = ArgumentParser(prog='pyteck plan',
+                            description='Estimate the number of cases, CPU '
+                                        'hours, disk usage, and peak memory '
+                                        'of evaluating a model, without '
+                                        'running any cases. Estimates are '
+                                        'calibrated with the telemetry of '
+                                        'earlier runs.'
+                            )
+    parser.add_argument('-m', '--model',
+                        type=str,
+                        required=True,
+                        help='Input model filename (e.g., mech.cti).'
+                        )
+    parser.add_argument('-d', '--dataset',
+                        type=str,
+                        required=True,
+                        help='Filename for list of datasets.'
+                        )
+    parser.add_argument('-k', '--model-keys',
+                        type=str,
+                        dest='model_keys_file',
+                        help='YAML file with keys for species in models; if '
+                             'given, datasets that would be skipped are not '
+                             'counted.'
+                        )
+    parser.add_argument('-dp', '--data-path',
+                        type=str,
+                        dest='data_path',
+                        default='data',
+                        help='Local directory holding dataset files.'
+                        )
+    parser.add_argument('-mp', '--model-path',
+                        type=str,
+                        dest='model_path',
+                        default='models',
+                        help='Local directory holding model files.'
+                        )
+    parser.add_argument('-rp', '--results-path',
+                        type=str,
+                        dest='results_path',
+                        default='results',
+                        help='Local directory holding results, whose '
+                             'telemetry is used unless --telemetry is given.'
+                        )
+    parser.add_argument('-v', '--model-variant',
+                        type=str,
+                        dest='model_variant_file',
+                        help='JSON with variants for models for, e.g., bath '
+                             'gases and pressures.'
+                        )
+    parser.add_argument('-nt', '--num-threads',
+                        type=int,
+                        dest='num_threads',
+                        default=multiprocessing.cpu_count()-1 or 1,
+                        help='The number of threads that would be used to '
+                             'run simulations in parallel.'
+                        )
+    parser.add_argument('--telemetry',
+                        type=str,
+                        dest='telemetry_files',
+                        action='append',
+                        help='Telemetry file of earlier runs (may be '
+                             'repeated).'
+                        )
+    parser.add_argument('--max-steps',
+                        type=int,
+                        dest='max_steps',
+                        help='Maximum number of integrator steps of each case.'
+                        )
+    parser.add_argument('--max-rows',
+                        type=int,
+                        dest='max_rows',
+                        help='Maximum number of rows of results saved for '
+                             'each case.'
+                        )
+    parser.add_argument('--skip-validation',
+                        dest='skip_validation',
+                        action='store_true',
+                        default=False,
+                        help='Skips ChemKED file validation.'
+                        )
+    parser.add_argument('--no-dedup',
+                        dest='deduplicate',
+                        action='store_false',
+                        default=True,
+                        help='Count cases identical to others, rather than '
+                             'only unique cases.'
+                        )
+    parser.add_argument('-o', '--output',
+                        type=str,
+                        help='Also write plan, with calibration table, to '
+                             'this YAML file.'
+                        )
+    args = parser.parse_args(argv)
+
+    from .eval_model import telemetry_file
+    from .plan import plan_evaluation
+    telemetry_files = args.telemetry_files
+    if telemetry_files is None:
+        telemetry_files = [os.path.join(args.results_path, telemetry_file)]
+
+    output = plan_evaluation(args.model, args.dataset, args.model_keys_file,
+                             args.data_path, args.model_path,
+                             args.model_variant_file, args.num_threads,
+                             telemetry_files, max_steps=args.max_steps,
+                             max_rows=args.max_rows,
+                             skip_validation=args.skip_validation,
+                             print_results=True, deduplicate=args.deduplicate
+                             )
+
+    if args.output:
+        from .utils import yaml_dump
+        with open(args.output, 'w') as f:
+            yaml_dump(output, f, default_flow_style=False)
+    return 0
+
+
+def compare(argv):
+    """Command-line interface for bootstrap uncertainty of error metrics.
+    """
+    parser = ArgumentParser(prog='pyteck compare',
+                            description='Bootstrap confidence intervals of '
+                                        'the error metrics of a model stored '
+                                        'in a results database, or, given '
+                                        'two models, of the difference in '
+                                        'their error metrics over the '
+                                        'datapoints of both.'
+                            )
+    parser.add_argument('database',
+                        type=str,
+                        help='SQLite results database.'
+                        )
+    parser.add_argument('-m', '--model',
+                        type=str,
+                        action='append',
+                        required=True,
+                        dest='models',
+                        help='Model filename, as given when evaluated. Give '
+                             'twice to compare two models.'
+                        )
+    parser.add_argument('-d', '--dataset',
+                        type=str,
+                        help='Filename for list of datasets. Defaults to all '
+                             'datasets with stored results.'
+                        )
+    parser.add_argument('--min-deviation',
+                        type=float,
+                        dest='min_deviation',
+                        help='Minimum allowable standard deviation of '
+                             'experimental data.'
+                        )
+    parser.add_argument('-n', '--resamples',
+                        type=int,
+                        default=2000,
+                        help='Number of bootstrap resamples.'
+                        )
+    parser.add_argument('--confidence',
+                        type=float,
+                        default=0.95,
+                        help='Confidence level of intervals.'
+                        )
+    parser.add_argument('--resample-datasets',
+                        dest='resample_datasets',
+                        action='store_true',
+                        default=False,
+                        help='Also resample datasets, for the variability of '
+                             'averages between datasets.'
+                        )
+    parser.add_argument('--seed',
+                        type=int,
+                        help='Seed of random number generator.'
+                        )
+    parser.add_argument('-o', '--output',
+                        type=str,
+                        help='Also write results to this YAML file.'
+                        )
+    args = parser.parse_args(argv)
+
+    if len(args.models) > 2:
+        parser.error('at most two models can be compared')
+    if not os.path.isfile(args.database):
+        parser.error('database ' + args.database + ' not found')
+    if not 0. < args.confidence < 1.:
+        parser.error('confidence level must be between 0 and 1')
+
+    dataset_list = None
+    if args.dataset:
+        with open(args.dataset, 'r') as f:
+            dataset_list = f.read().splitlines()
+
+    from . import statistics
+    try:
+        errors = [statistics.ModelErrors.from_database(
+                      args.database, model, dataset_list, args.min_deviation
+                      ) for model in args.models
+                  ]
+        if len(errors) == 1:
+            output = errors[0].bootstrap(args.resamples, args.confidence,
+                                         args.resample_datasets, args.seed
+                                         )
+            print(statistics.format_bootstrap(output))
+        else:
+            output = statistics.compare_models(errors[0], errors[1],
+                                               args.resamples, args.confidence,
+                                               args.resample_datasets,
+                                               args.seed
+                                               )
+            print(statistics.format_comparison(output))
+    except ValueError as err:
+        parser.error(str(err))
+
+    if args.output:
+        from .utils import yaml_dump
+        with open(args.output, 'w') as f:
+            yaml_dump(output, f, default_flow_style=False)
+    return 0
+
+
+commands = {'convert': convert, 'query': query, 'rescore': rescore,
+            'compile-mechanism': compile_mechanism, 'plan': plan,
+            'compare': compare,
+            }
+
+
+def main(argv=None):
+    """Command-line interface for evaluating models.
+
+    Other commands (e.g., ``pyteck convert``) are given as the first argument.
+    Heavy dependencies are only imported once arguments are parsed, so that
+    ``pyteck --help`` returns quickly.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in commands:
+        return commands[argv[0]](argv[1:])
+
+    parser = ArgumentParser(description='PyTeCK: Evaluate '
+                                        'performance of kinetic models using '
+                                        'experimental ignition delay data.',
+                            epilog='Other commands: ' +
+                                   ', '.join(sorted(commands)) +
+                                   ' (see pyteck <command> -h).'
+                            )
+    parser.add_argument('-m', '--model',
+                        type=str,
+                        required=True,
+                        help='Input model filename (e.g., mech.cti).'
+                        )
+    parser.add_argument('-k', '--model-keys',
+                        type=str,
+                        dest='model_keys_file',
+                        required=True,
+                        help='JSON file with keys for species in models.'
+                        )
+    parser.add_argument('-d', '--dataset',
+                        type=str,
+                        required=True,
+                        help='Filename for list of datasets.'
+                        )
+    parser.add_argument('-dp', '--data-path',
+                        type=str,
+                        dest='data_path',
+                        required=False,
+                        default='data',
+                        help='Local directory holding dataset files.'
+                        )
+    parser.add_argument('-mp', '--model-path',
+                        type=str,
+                        dest='model_path',
+                        required=False,
+                        default='models',
+                        help='Local directory holding model files.'
+                        )
+    parser.add_argument('-rp', '--results-path',
+                        type=str,
+                        dest='results_path',
+                        required=False,
+                        default='results',
+                        help='Local directory holding result HDF5 files.'
+                        )
+    parser.add_argument('-v', '--model-variant',
+                        type=str,
+                        dest='model_variant_file',
+                        required=False,
+                        help='JSON with variants for models for, e.g., bath '
+                             'gases and pressures.'
+                        )
+    parser.add_argument('-nt', '--num-threads',
+                        type=int,
+                        dest='num_threads',
+                        default=multiprocessing.cpu_count()-1 or 1,
+                        required=False,
+                        help='The number of threads to use to run simulations in '
+                             'parallel.'
+                        )
+    parser.add_argument('-p', '--print',
+                        dest='print_results',
+                        action='store_true',
+                        default=False,
+                        help='Print model evaluation results to screen.'
+                        )
+    parser.add_argument('--restart',
+                        dest='restart',
+                        action='store_true',
+                        default=False,
+                        help='Reuse prior results files, and only calculate new ones.'
+                        )
+    parser.add_argument('--skip-validation',
+                        dest='skip_validation',
+                        action='store_true',
+                        default=False,
+                        help='Skips ChemKED file validation.'
+                        )
+    parser.add_argument('--results-database',
+                        type=str,
+                        dest='results_database',
+                        required=False,
+                        help='Also add results to this SQLite database, which '
+                             'can be summarized with pyteck query.'
+                        )
+    parser.add_argument('--results-table',
+                        type=str,
+                        dest='results_table',
+                        required=False,
+                        help='Also write table of results with one row per '
+                             'datapoint (.parquet or .arrow with PyArrow, '
+                             'otherwise .csv).'
+                        )
+    parser.add_argument('--max-wall-time',
+                        type=float,
+                        dest='max_wall_time',
+                        required=False,
+                        help='Maximum wall time (s) of each case; cases are '
+                             'then marked as timed out, and stuck workers '
+                             'killed.'
+                        )
+    parser.add_argument('--max-steps',
+                        type=int,
+                        dest='max_steps',
+                        required=False,
+                        help='Maximum number of integrator steps of each case.'
+                        )
+    parser.add_argument('--max-rows',
+                        type=int,
+                        dest='max_rows',
+                        required=False,
+                        help='Maximum number of rows of results saved for '
+                             'each case.'
+                        )
+    parser.add_argument('--retry-ladder',
+                        type=str,
+                        dest='retry_ladder_file',
+                        required=False,
+                        help='YAML file with list of solver settings for each '
+                             'retry of failed cases (an empty list disables '
+                             'retries).'
+                        )
+    parser.add_argument('--compiled-path',
+                        type=str,
+                        dest='compiled_path',
+                        required=False,
+                        help='Directory of compiled mechanisms (default: '
+                             'compiled-mechanisms in results directory).'
+                        )
+    parser.add_argument('--progress',
+                        dest='progress',
+                        action='store_true',
+                        default=False,
+                        help='Show live status line with cases done and '
+                             'remaining, throughput, ETA, active workers, '
+                             'and failures.'
+                        )
+    parser.add_argument('--events',
+                        type=str,
+                        dest='events',
+                        required=False,
+                        help='Also write progress events as JSON lines to '
+                             'this file (- for standard output).'
+                        )
+    parser.add_argument('--no-compile',
+                        dest='compile_mechanisms',
+                        action='store_false',
+                        default=True,
+                        help='Load model files as given, rather than '
+                             'compiled mechanisms.'
+                        )
+    parser.add_argument('--no-dedup',
+                        dest='deduplicate',
+                        action='store_false',
+                        default=True,
+                        help='Simulate every case, rather than once for each '
+                             'set of identical conditions.'
+                        )
+    parser.add_argument('--ignition-definitions',
+                        type=str,
+                        nargs='*',
+                        dest='ignition_definitions',
+                        required=False,
+                        help='Ignition definitions (target:type, e.g. '
+                             'OH*:max) evaluated for each case besides that '
+                             'of its dataset (default: pressure and '
+                             'temperature d/dt max, OH, OH*, CH, and CH* max).'
+                        )
+    args = parser.parse_args(argv)
+
+    ignition_definitions = None
+    if args.ignition_definitions is not None:
+        from .simulation import parse_ignition_definition
+        try:
+            ignition_definitions = [parse_ignition_definition(text)
+                                    for text in args.ignition_definitions
+                                    ]
+        except ValueError as err:
+            parser.error(str(err))
+
+    retry_ladder = None
+    if args.retry_ladder_file:
+        from .utils import yaml_load
+        with open(args.retry_ladder_file, 'r') as f:
+            retry_ladder = yaml_load(f) or []
+
+    from .eval_model import evaluate_model
+    evaluate_model(args.model, args.model_keys_file, args.dataset,
+                   args.data_path, args.model_path, args.results_path,
+                   args.model_variant_file, args.num_threads, args.print_results,
+                   args.restart, args.skip_validation, args.results_table,
+                   args.results_database, max_wall_time=args.max_wall_time,
+                   max_steps=args.max_steps, max_rows=args.max_rows,
+                   retry_ladder=retry_ladder,
+                   compile_mechanisms=args.compile_mechanisms,
+                   compiled_path=args.compiled_path,
+                   progress=args.progress, events=args.events,
+                   ignition_definitions=ignition_definitions,
+                   deduplicate=args.deduplicate,
+                   )
+
+
+if __name__ == '__main__':
+    sys.exit(main())
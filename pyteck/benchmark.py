@@ -0,0 +1,357 @@
+"""End-to-end performance and accuracy benchmark of model evaluations.
+
+A benchmark runs :func:`pyteck.eval_model.evaluate_model` on a set of
+datasets, and records its wall time, throughput (cases per second), peak
+memory of all processes, and size of the results written, next to the
+simulated ignition delay of each datapoint. Records are compared with a
+stored baseline, so that changes made for speed can be checked to neither
+slow the evaluation down nor change its results.
+
+Besides given datasets, a larger shock-tube dataset of hydrogen/oxygen/argon
+mixtures can be generated, reproducibly from a seed.
+"""
+
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import os
+import json
+import time
+import shutil
+import platform
+
+import numpy
+
+# Local imports
+from .utils import units, yaml_dump, import_cantera
+from .workers import peak_memory
+from .eval_model import evaluate_model, telemetry_file
+
+throughput_tolerance = 0.3
+"""float: fraction of baseline throughput that may be lost before failing"""
+
+delay_tolerance = 1.e-3
+"""float: relative change of simulated ignition delays allowed from baseline"""
+
+
+def generate_dataset(filename, num_datapoints=40, seed=0):
+    """Write a ChemKED dataset of shock-tube hydrogen ignition delays.
+
+    Temperatures, pressures, and equivalence ratios are drawn at random, and
+    experimental ignition delays follow an Arrhenius fit of
+    ``testfile_st.yaml``, with noise.
+
+    Parameters
+    ----------
+    filename : str
+        Name of dataset file written
+    num_datapoints : int
+        Number of datapoints
+    seed : int
+        Seed of random number generator
+
+    """
+    rng = numpy.random.RandomState(seed)
+    temperatures = rng.uniform(1000., 1400., num_datapoints)
+    pressures = rng.uniform(1., 4., num_datapoints)
+    equivalence_ratios = rng.uniform(0.4, 1.5, num_datapoints)
+    delays = (471.54 * numpy.exp(7650. * (1. / temperatures - 1. / 1164.48)) *
+              numpy.sqrt(2.18 / pressures) *
+              numpy.exp(rng.normal(0., 0.1, num_datapoints))
+              )
+
+    datapoints = []
+    for temperature, pressure, phi, delay in zip(temperatures, pressures,
+                                                 equivalence_ratios, delays
+                                                 ):
+        # 1% fuel and oxidizer in argon
+        fuel = 0.01 * phi / (phi + 0.5)
+        oxidizer = 0.01 - fuel
+        datapoints.append({
+            'temperature': ['{:.2f} kelvin'.format(temperature)],
+            'pressure': ['{:.3f} atm'.format(pressure)],
+            'ignition-delay': ['{:.2f} us'.format(delay)],
+            'composition': {'kind': 'mole fraction',
+                            'species': [
+                                {'species-name': 'H2', 'InChI': '1S/H2/h1H',
+                                 'amount': [float('{:.6g}'.format(fuel))],
+                                 },
+                                {'species-name': 'O2', 'InChI': '1S/O2/c1-2',
+                                 'amount': [float('{:.6g}'.format(oxidizer))],
+                                 },
+                                {'species-name': 'Ar', 'InChI': '1S/Ar',
+                                 'amount': [0.99],
+                                 },
+                                ]},
+            'ignition-type': {'target': 'pressure', 'type': 'd/dt max'},
+            'equivalence-ratio': float('{:.3f}'.format(phi)),
+            })
+
+    dataset = {'file-author': {'name': 'PyTeCK benchmark'},
+               'file-version': 0,
+               'chemked-version': '0.0.1',
+               'reference': {'doi': '10.1016/j.ijhydene.2007.04.008',
+                             'authors': [{'name': 'N. Chaumeix'}],
+                             'journal': 'International Journal of Hydrogen Energy',
+                             'year': 2007,
+                             'detail': 'Generated benchmark dataset, seed ' + str(seed),
+                             },
+               'experiment-type': 'ignition delay',
+               'apparatus': {'kind': 'shock tube'},
+               'datapoints': datapoints,
+               }
+    with open(filename, 'w') as f:
+        yaml_dump(dataset, f, default_flow_style=False)
+
+
+def environment():
+    """Versions of software and machine that a benchmark was run with.
+
+    Returns
+    -------
+    environment : dict
+        Versions of Python, NumPy, and Cantera, and machine type
+
+    """
+    return {'python': platform.python_version(),
+            'numpy': numpy.__version__,
+            'cantera': import_cantera().__version__,
+            'machine': platform.machine(),
+            }
+
+
+def directory_size(path, exclude=()):
+    """Total size of the files in a directory and its subdirectories.
+
+    Parameters
+    ----------
+    path : str
+        Directory
+    exclude : tuple of str
+        Names of subdirectories not counted
+
+    Returns
+    -------
+    size : int
+        Total size in bytes
+
+    """
+    size = 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames[:] = [name for name in dirnames if name not in exclude]
+        size += sum(os.path.getsize(os.path.join(dirpath, name))
+                    for name in filenames
+                    )
+    return size
+
+
+def run_benchmark(model_name, spec_keys_file, datasets, work_path,
+                  model_path='models', num_threads=1):
+    """Evaluate a model on datasets, recording costs and simulated delays.
+
+    Parameters
+    ----------
+    model_name : str
+        Chemical kinetic model filename
+    spec_keys_file : str
+        Name of YAML file identifying important species
+    datasets : list of str
+        Dataset files; copied to ``work_path``
+    work_path : str
+        Directory for datasets and results, which should be empty
+    model_path : str
+        Local path for model file. Optional; default = 'models'
+    num_threads : int
+        Number of worker processes. Optional; default = 1, for stable timing.
+
+    Returns
+    -------
+    record : dict
+        Wall time, cases per second, peak memory, and output size of the
+        evaluation, simulated ignition delays (s) of each dataset, and cases
+        that failed or timed out
+
+    """
+    data_path = os.path.join(work_path, 'data')
+    results_path = os.path.join(work_path, 'results')
+    os.makedirs(data_path)
+
+    dataset_names = [os.path.basename(dataset) for dataset in datasets]
+    for dataset in datasets:
+        shutil.copy(dataset, data_path)
+    dataset_file = os.path.join(work_path, 'datasets.txt')
+    with open(dataset_file, 'w') as f:
+        f.write('\n'.join(dataset_names) + '\n')
+
+    start_time = time.time()
+    output = evaluate_model(model_name, spec_keys_file, dataset_file,
+                            data_path, model_path, results_path,
+                            num_threads=num_threads
+                            )
+    wall_time = time.time() - start_time
+
+    # Peak memory of this process and of the worker processes
+    memories = [peak_memory() or 0]
+    with open(os.path.join(results_path, telemetry_file), 'r') as f:
+        memories += [json.loads(line).get('peak memory') or 0 for line in f]
+
+    delays = {}
+    for dataset in output['datasets']:
+        delays[dataset['dataset']] = [
+            float(units.Quantity(datapoint['simulated ignition delay']).to('second').magnitude)
+            for datapoint in dataset['datapoints']
+            ]
+
+    # Cases without results, which a baseline must not have
+    failed = [record['dataset'] + ', ' + record['case']
+              for record in output.get('case failures', [])
+              if not record['recovered']
+              ]
+    failed += [case['dataset'] + ', ' + case['case']
+               for case in output.get('timed out cases', [])
+               ]
+
+    num_cases = sum(len(values) for values in delays.values())
+    return {'model': model_name,
+            'datasets': dataset_names,
+            'cases': num_cases,
+            'simulated cases': output['deduplication']['simulated cases'],
+            'num threads': num_threads,
+            'wall time': wall_time,
+            'cases per second': num_cases / wall_time,
+            'peak memory': int(max(memories)),
+            'output size': directory_size(results_path,
+                                          exclude=('compiled-mechanisms',)
+                                          ),
+            'average error function': output['average error function'],
+            'delays': delays,
+            'failed cases': failed,
+            'environment': environment(),
+            }
+
+
+def invalid_results(record):
+    """Results of a benchmark record that cannot be compared with others.
+
+    Parameters
+    ----------
+    record : dict
+        Benchmark record, from :func:`run_benchmark`
+
+    Returns
+    -------
+    problems : list of str
+        Description of failed cases, each missing or zero (no ignition)
+        delay, and a non-finite average error function; empty if none
+
+    """
+    problems = []
+    if record.get('failed cases'):
+        problems.append('failed cases: ' + '; '.join(record['failed cases']))
+    for dataset in sorted(record['delays']):
+        for idx, delay in enumerate(record['delays'][dataset]):
+            if not (numpy.isfinite(delay) and delay > 0.):
+                problems.append(dataset + ', datapoint {}: no ignition delay '
+                                '({:.6g} s)'.format(idx, delay)
+                                )
+    error = record.get('average error function')
+    if error is not None and not numpy.isfinite(error):
+        problems.append('average error function {:.6g}'.format(error))
+    return problems
+
+
+def compare_baseline(record, baseline, min_throughput=None, rtol=None):
+    """Compare a benchmark record with a baseline.
+
+    Parameters
+    ----------
+    record : dict
+        Benchmark record, from :func:`run_benchmark`
+    baseline : dict
+        Baseline record
+    min_throughput : float
+        Optional; fraction of baseline throughput that may be lost. Defaults
+        to :data:`throughput_tolerance`.
+    rtol : float
+        Optional; relative change of ignition delays allowed. Defaults to
+        :data:`delay_tolerance`.
+
+    Returns
+    -------
+    problems : list of str
+        Description of each regression; empty if none
+
+    """
+    if min_throughput is None:
+        min_throughput = throughput_tolerance
+    if rtol is None:
+        rtol = delay_tolerance
+
+    problems = invalid_results(record)
+    if sorted(record['delays']) != sorted(baseline['delays']):
+        problems.append('datasets differ from baseline: ' +
+                        ', '.join(sorted(record['delays'])) + ' vs. ' +
+                        ', '.join(sorted(baseline['delays']))
+                        )
+
+    throughput = record['cases per second']
+    baseline_throughput = baseline['cases per second']
+    if throughput < (1. - min_throughput) * baseline_throughput:
+        problems.append('throughput regressed: {:.3g} cases/s, baseline '
+                        '{:.3g} cases/s'.format(throughput, baseline_throughput)
+                        )
+
+    for dataset in sorted(set(record['delays']) & set(baseline['delays'])):
+        delays = numpy.array(record['delays'][dataset], dtype=float)
+        expected = numpy.array(baseline['delays'][dataset], dtype=float)
+        if delays.shape != expected.shape:
+            problems.append(dataset + ': {} datapoints, baseline {}'.format(
+                delays.size, expected.size
+                ))
+            continue
+        # Missing or zero delays already reported
+        with numpy.errstate(invalid='ignore'):
+            valid = numpy.isfinite(delays) & (delays > 0.)
+        drifted = valid & ~numpy.isclose(delays, expected, rtol=rtol, atol=0.)
+        for idx in numpy.flatnonzero(drifted):
+            problems.append(dataset + ', datapoint {}: ignition delay {:.6g} s, '
+                            'baseline {:.6g} s'.format(idx, delays[idx], expected[idx])
+                            )
+    return problems
+
+
+def read_baseline(filename):
+    """Read baseline record from JSON file.
+    """
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+def write_baseline(record, filename):
+    """Write benchmark record to JSON file, as the new baseline.
+
+    Parameters
+    ----------
+    record : dict
+        Benchmark record, from :func:`run_benchmark`
+    filename : str
+        Name of baseline file
+
+    Raises
+    ------
+    ValueError
+        If any case failed or timed out, any delay is missing or zero, or the
+        average error function is not finite (see :func:`invalid_results`),
+        since a baseline must only hold correct results
+
+    """
+    problems = invalid_results(record)
+    if problems:
+        raise ValueError('Baseline cannot have invalid results: ' +
+                         '; '.join(problems)
+                         )
+    with open(filename, 'w') as f:
+        json.dump(record, f, indent=1, sort_keys=True, allow_nan=False)
+        f.write('\n')
@@ -0,0 +1,465 @@
+"""SQLite warehouse of model evaluation results.
+
+Results of each model evaluation (a run) are stored with one row per
+datapoint, using the columns of :data:`pyteck.results.result_columns`, so
+that results can be compared across runs and models with SQL queries.
+"""
+
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import json
+import sqlite3
+import datetime
+
+import numpy
+
+# Local imports
+from .results import (ResultsWriter, result_columns, STATUS_NO_IGNITION,
+                      STATUS_SKIPPED, STATUS_TIMED_OUT, STATUS_FAILED
+                      )
+
+atm = 101325.
+"""float: pascals per atmosphere, for pressures given in queries"""
+
+schema = """
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS datasets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    model_id INTEGER NOT NULL REFERENCES models(id),
+    dataset_file TEXT,
+    settings TEXT,
+    status TEXT NOT NULL,
+    started TEXT NOT NULL,
+    finished TEXT,
+    average_error REAL,
+    error_standard_deviation REAL,
+    average_deviation REAL
+);
+CREATE TABLE IF NOT EXISTS datapoints (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    model_id INTEGER NOT NULL REFERENCES models(id),
+    dataset_id INTEGER NOT NULL REFERENCES datasets(id),
+    dataset_index INTEGER NOT NULL,
+    datapoint INTEGER NOT NULL,
+    temperature REAL,
+    pressure REAL,
+    experimental_delay REAL,
+    simulated_delay REAL,
+    first_stage_delay REAL,
+    standard_deviation REAL,
+    deviation REAL,
+    error REAL,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS datapoints_run ON datapoints (run_id);
+CREATE INDEX IF NOT EXISTS datapoints_model ON datapoints (model_id);
+CREATE INDEX IF NOT EXISTS datapoints_dataset ON datapoints (dataset_id);
+CREATE INDEX IF NOT EXISTS datapoints_temperature ON datapoints (temperature);
+CREATE INDEX IF NOT EXISTS datapoints_pressure ON datapoints (pressure);
+"""
+"""str: SQL schema of results database"""
+
+RUN_RUNNING = 'running'
+"""str: status of run still in progress (or interrupted)"""
+RUN_COMPLETE = 'complete'
+"""str: status of finished run"""
+
+
+def _now():
+    return datetime.datetime.utcnow().isoformat(' ')
+
+
+class ResultsDatabase(object):
+    """SQLite database of model evaluation results.
+
+    Parameters
+    ----------
+    filename : str
+        Name of SQLite database file; created if it does not exist.
+
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        # Allow queries while results are being written
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            self.connection.executescript(schema)
+        self._ids = {'models': {}, 'datasets': {}}
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_id(self, table, name):
+        """Get id of model or dataset, adding it if needed.
+
+        Parameters
+        ----------
+        table : {'models', 'datasets'}
+            Table of names
+        name : str
+            Name of model or dataset
+
+        Returns
+        -------
+        id : int
+            Row id of model or dataset
+
+        """
+        ids = self._ids[table]
+        if name not in ids:
+            cursor = self.connection.cursor()
+            cursor.execute('INSERT OR IGNORE INTO ' + table + ' (name) '
+                           'VALUES (?)', (name,)
+                           )
+            cursor.execute('SELECT id FROM ' + table + ' WHERE name = ?',
+                           (name,)
+                           )
+            ids[name] = cursor.fetchone()[0]
+        return ids[name]
+
+    def start_run(self, model_name, dataset_file=None, settings=None):
+        """Add new run of model evaluation.
+
+        Parameters
+        ----------
+        model_name : str
+            Name of model
+        dataset_file : str
+            Optional; name of file with list of datasets
+        settings : dict
+            Optional; settings of model evaluation, stored as JSON
+
+        Returns
+        -------
+        run_id : int
+            Id of new run
+
+        """
+        with self.connection:
+            model_id = self.get_id('models', model_name)
+            cursor = self.connection.execute(
+                'INSERT INTO runs (model_id, dataset_file, settings, status, '
+                'started) VALUES (?, ?, ?, ?, ?)',
+                (model_id, dataset_file, json.dumps(settings, sort_keys=True),
+                 RUN_RUNNING, _now()
+                 ))
+        return cursor.lastrowid
+
+    def finish_run(self, run_id, output=None):
+        """Mark run as complete, and store overall results.
+
+        Parameters
+        ----------
+        run_id : int
+            Id of run
+        output : dict
+            Optional; results of model evaluation from
+            :func:`pyteck.eval_model.evaluate_model`
+
+        """
+        output = output or {}
+        with self.connection:
+            self.connection.execute(
+                'UPDATE runs SET status = ?, finished = ?, average_error = ?, '
+                'error_standard_deviation = ?, average_deviation = ? '
+                'WHERE id = ?',
+                (RUN_COMPLETE, _now(), output.get('average error function'),
+                 output.get('error function standard deviation'),
+                 output.get('average deviation function'), run_id
+                 ))
+
+    def latest_results(self, model_name):
+        """Get most recent datapoint results of each dataset for a model.
+
+        Results of a dataset are taken from the latest complete run that
+        includes it, so that the partial results of an interrupted run do not
+        hide those of an earlier complete run.
+
+        Parameters
+        ----------
+        model_name : str
+            Name of model
+
+        Returns
+        -------
+        results : dict
+            Dictionary of dataset name to dictionary of ``numpy.ndarray`` of
+            ``datapoint``, ``temperature``, ``pressure``,
+            ``experimental_delay``, ``simulated_delay``,
+            ``first_stage_delay``, and ``status`` values
+
+        """
+        names = ['datapoint', 'temperature', 'pressure', 'experimental_delay',
+                 'simulated_delay', 'first_stage_delay', 'status'
+                 ]
+        query = ('SELECT datasets.name, ' +
+                 ', '.join('datapoints.' + name for name in names) + ' '
+                 'FROM datapoints '
+                 'JOIN (SELECT dataset_id, MAX(run_id) AS run_id '
+                 '      FROM datapoints JOIN runs ON runs.id = run_id '
+                 '      WHERE datapoints.model_id = ? AND runs.status = ? '
+                 '      GROUP BY dataset_id) AS latest '
+                 'ON latest.dataset_id = datapoints.dataset_id AND '
+                 '   latest.run_id = datapoints.run_id '
+                 'JOIN datasets ON datasets.id = datapoints.dataset_id '
+                 'WHERE datapoints.model_id = ? '
+                 'ORDER BY datasets.name, datapoints.datapoint'
+                 )
+        cursor = self.connection.execute(
+            'SELECT id FROM models WHERE name = ?', (model_name,)
+            )
+        row = cursor.fetchone()
+        if row is None:
+            return {}
+
+        rows = {}
+        for result in self.connection.execute(query,
+                                              (row[0], RUN_COMPLETE, row[0])
+                                              ):
+            rows.setdefault(result[0], []).append(result[1:])
+
+        results = {}
+        for dataset, dataset_rows in rows.items():
+            columns = list(zip(*dataset_rows))
+            results[dataset] = {
+                name: numpy.array(values, dtype=object if name == 'status'
+                                  else float
+                                  )
+                for name, values in zip(names, columns)
+                }
+            results[dataset]['datapoint'] = (
+                results[dataset]['datapoint'].astype(int)
+                )
+        return results
+
+    def writer(self, run_id, batch_size=1000):
+        """Get writer adding datapoint results to a run.
+
+        Parameters
+        ----------
+        run_id : int
+            Id of run
+        batch_size : int
+            Number of rows written per transaction
+
+        Returns
+        -------
+        writer : DatabaseResultsWriter
+            Writer for datapoint results
+
+        """
+        return DatabaseResultsWriter(self, run_id, batch_size)
+
+
+class DatabaseResultsWriter(ResultsWriter):
+    """Write datapoint results of a run into a :class:`ResultsDatabase`.
+
+    Rows are buffered and inserted in batches, each in a single transaction.
+    Closing the writer does not close the database.
+    """
+    def __init__(self, database, run_id, batch_size=1000):
+        super(DatabaseResultsWriter, self).__init__(database.filename,
+                                                    batch_size
+                                                    )
+        self.database = database
+        self.run_id = run_id
+
+    def _write_batch(self, columns):
+        database = self.database
+        with database.connection:
+            model_ids = [database.get_id('models', name)
+                         for name in columns['model']
+                         ]
+            dataset_ids = [database.get_id('datasets', name)
+                           for name in columns['dataset']
+                           ]
+            values = [columns[name].tolist() for name, _ in result_columns
+                      if name not in ('model', 'dataset')
+                      ]
+            rows = [(self.run_id, model_id, dataset_id) + tuple(row)
+                    for model_id, dataset_id, row in
+                    zip(model_ids, dataset_ids, zip(*values))
+                    ]
+            database.connection.executemany(
+                'INSERT INTO datapoints (run_id, model_id, dataset_id, '
+                'dataset_index, datapoint, temperature, pressure, '
+                'experimental_delay, simulated_delay, first_stage_delay, '
+                'standard_deviation, deviation, error, status) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows
+                )
+
+    def _close(self):
+        pass
+
+
+summary_statuses = [STATUS_NO_IGNITION, STATUS_SKIPPED, STATUS_TIMED_OUT,
+                    STATUS_FAILED
+                    ]
+"""list: statuses of datapoints counted separately in summaries"""
+
+group_columns = {'model': 'models.name',
+                 'dataset': 'datasets.name',
+                 'run': 'datapoints.run_id',
+                 }
+"""dict: columns that query results can be grouped by"""
+
+
+def summarize(connection, by='model', models=None, datasets=None,
+              temperature_range=(None, None), pressure_range=(None, None),
+              all_runs=False
+              ):
+    """Summarize datapoint results, grouped by model, dataset, or run.
+
+    By default only the latest complete run of each model is included.
+    As in :func:`pyteck.eval_model.evaluate_model`, the error function and
+    deviation of each group are averages over its datasets of the averages
+    over their datapoints, ignoring missing values. Datapoints of each
+    status in :data:`summary_statuses` are counted separately, so that cases
+    without ignition or skipped are not taken as solver failures.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to results database
+    by : {'model', 'dataset', 'run'}
+        Grouping of results
+    models : list of str
+        Optional; only include these models
+    datasets : list of str
+        Optional; only include these datasets
+    temperature_range : tuple of float
+        Optional; minimum and maximum temperature (K) of datapoints
+    pressure_range : tuple of float
+        Optional; minimum and maximum pressure (atm) of datapoints
+    all_runs : bool
+        If ``True``, include all runs rather than the latest of each model
+
+    Returns
+    -------
+    header : list of str
+        Names of columns
+    rows : list of tuple
+        Summary of each group
+
+    """
+    conditions = []
+    params = []
+    if not all_runs:
+        conditions.append('datapoints.run_id IN (SELECT MAX(id) FROM runs '
+                          'WHERE status = ? GROUP BY model_id)'
+                          )
+        params.append(RUN_COMPLETE)
+    for column, names in [('models.name', models),
+                          ('datasets.name', datasets)
+                          ]:
+        if names:
+            conditions.append(column + ' IN (' +
+                              ', '.join('?' * len(names)) + ')'
+                              )
+            params.extend(names)
+    for column, (low, high), scale in [
+            ('datapoints.temperature', temperature_range, 1.),
+            ('datapoints.pressure', pressure_range, atm)
+            ]:
+        if low is not None:
+            conditions.append(column + ' >= ?')
+            params.append(low * scale)
+        if high is not None:
+            conditions.append(column + ' <= ?')
+            params.append(high * scale)
+
+    # Average over datapoints of each dataset (in each run) first, then over
+    # datasets, so that large datasets do not dominate the error function
+    group = group_columns[by]
+    query = ('SELECT ' + group + ' AS name, datapoints.run_id, '
+             'datapoints.dataset_id, COUNT(*) AS num, ' +
+             ''.join('SUM(datapoints.status = ?) AS status_{}, '.format(idx)
+                     for idx in range(len(summary_statuses))
+                     ) +
+             'AVG(datapoints.error) AS error, '
+             'AVG(datapoints.deviation) AS deviation '
+             'FROM datapoints '
+             'JOIN models ON models.id = datapoints.model_id '
+             'JOIN datasets ON datasets.id = datapoints.dataset_id'
+             )
+    params = list(summary_statuses) + params
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += (' GROUP BY ' + group + ', datapoints.run_id, '
+              'datapoints.dataset_id'
+              )
+    query = ('SELECT name, SUM(num), ' +
+             ''.join('SUM(status_{}), '.format(idx)
+                     for idx in range(len(summary_statuses))
+                     ) +
+             'AVG(error), AVG(deviation) '
+             'FROM (' + query + ') GROUP BY name ORDER BY name'
+             )
+
+    header = ([by, 'datapoints'] +
+              [status.replace('-', ' ') for status in summary_statuses] +
+              ['error function', 'absolute deviation']
+              )
+    return header, connection.execute(query, params).fetchall()
+
+
+def list_runs(connection):
+    """List runs in results database.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to results database
+
+    Returns
+    -------
+    header : list of str
+        Names of columns
+    rows : list of tuple
+        Information about each run
+
+    """
+    query = ('SELECT runs.id, models.name, runs.status, runs.started, '
+             'runs.finished, runs.average_error, runs.average_deviation '
+             'FROM runs JOIN models ON models.id = runs.model_id '
+             'ORDER BY runs.id'
+             )
+    header = ['run', 'model', 'status', 'started', 'finished',
+              'error function', 'absolute deviation'
+              ]
+    return header, connection.execute(query).fetchall()
+
+
+def format_table(header, rows):
+    """Format rows of query results as aligned text table.
+    """
+    def fmt(value):
+        if isinstance(value, float):
+            return '{:.6g}'.format(value)
+        return str(value)
+
+    text = [[str(h) for h in header]] + [[fmt(v) for v in row] for row in rows]
+    widths = [max(len(row[i]) for row in text) for i in range(len(header))]
+    return '\n'.join('  '.join(value.ljust(width)
+                               for value, width in zip(row, widths)
+                               ).rstrip()
+                     for row in text
+                     )
@@ -4,27 +4,54 @@ from __future__ import division
 
 # Standard libraries
 import os
+import sys
+import json
 from os.path import splitext, basename
 import multiprocessing
+from collections import deque
+from contextlib import redirect_stdout
 
 import numpy
-from scipy.interpolate import UnivariateSpline
-
-try:
-    import yaml
-except ImportError:
-    print('Warning: YAML must be installed to read input file.')
-    raise
-
-from pyked.chemked import ChemKED, DataPoint
 
 # Local imports
-from .utils import units
-from .simulation import Simulation
+from .utils import units, yaml_load, yaml_dump
+from .results import (open_results_writer, dataset_results, STATUS_OK,
+                      STATUS_TIMED_OUT, STATUS_FAILED
+                      )
+from .workers import WorkerPool, TaskTimeout, TaskError, peak_memory
+from .mechanisms import compile_mechanism
+from .progress import ProgressReporter
+from .simulation import (Simulation, CaseSpec, VolumeProfile,
+                         volume_history_key, register_volume_profiles,
+                         ignition_definition_name, default_ignition_definitions
+                         )
 
 min_deviation = 0.10
 """float: minimum allowable standard deviation for experimental data"""
 
+kill_time_factor = 2.
+"""float: multiple of case wall time limit after which workers are killed"""
+
+default_retry_ladder = [{'rtol': 1.e-12, 'atol': 1.e-20},
+                        {'rtol': 1.e-12, 'atol': 1.e-20,
+                         'max_time_step_fraction': 1.e-4,
+                         },
+                        {'reactor': 'Reactor', 'max_time_step_fraction': 1.e-5,
+                         'max_err_test_fails': 20,
+                         },
+                        ]
+"""list: solver settings of each retry of a failed case, in order.
+
+Tolerances are tightened first, then the maximum time step limited, and
+finally the general ``Reactor`` used. See :meth:`Simulation.setup_case`.
+"""
+
+telemetry_file = 'telemetry.jsonl'
+"""str: file in results path with costs of each case run, one JSON per line"""
+
+dedup_tolerance = 1.e-6
+"""float: tolerance within which conditions of cases are considered identical"""
+
 
 def create_simulations(dataset, properties):
     """Set up individual simulations for each ignition delay value.
@@ -58,31 +85,256 @@ def create_simulations(dataset, properties):
                            )
     return simulations
 
-def simulation_worker(sim_tuple):
+def share_volume_histories(simulations):
+    """Deduplicate volume histories across simulation cases.
+
+    Cases with identical volume histories (e.g., RCM datapoints converted
+    from a single ReSpecTh file) share one :class:`VolumeProfile`, so the
+    velocity is only calculated once. Each case then carries only the key
+    of its volume history, rather than the history itself.
+
+    Parameters
+    ----------
+    simulations : list
+        List of :class:`Simulation` objects; modified in place
+
+    Returns
+    -------
+    volume_profiles : dict
+        Shared :class:`VolumeProfile` objects, keyed by volume history hash
+
+    """
+    volume_profiles = {}
+    for sim in simulations:
+        if sim.properties.volume_history is None:
+            continue
+
+        key = volume_history_key(sim.properties.volume_history)
+        if key not in volume_profiles:
+            volume_profiles[key] = VolumeProfile(sim.properties.volume_history)
+
+        sim.meta['volume-history'] = key
+        sim.properties.volume_history = None
+
+    return volume_profiles
+
+
+worker_state = {}
+"""dict: data shared by all cases of a dataset, set in each worker process"""
+
+
+def initialize_worker(volume_profiles, shared):
+    """Initializer of worker processes, sending shared data once.
+
+    Parameters
+    ----------
+    volume_profiles : dict
+        Shared :class:`VolumeProfile` objects, keyed by volume history hash
+    shared : dict
+        Data shared by all cases: ``model files`` and ``species names``
+        (lists indexed by :class:`CaseSpec`), ``species indices`` of each
+        model file (or ``None``), ``species key``, ``results
+        path``, ``restart``, ``limits`` (passed to
+        :meth:`Simulation.run_case`), ``quiet`` (if ``True``, output of
+        the worker is suppressed), and ``ignition definitions`` (passed to
+        :meth:`Simulation.setup_case`)
+
+    """
+    register_volume_profiles(volume_profiles)
+    worker_state.clear()
+    worker_state.update(shared)
+
+    # e.g., while the parent shows a status line
+    if shared.get('quiet'):
+        sys.stdout = open(os.devnull, 'w')
+
+    # Mechanisms loaded by the worker, reused by its later cases
+    worker_state['solutions'] = {}
+
+
+def simulation_worker(spec):
     """Worker for multiprocessing of simulation cases.
 
     Parameters
     ----------
-    sim_tuple : tuple
-        Contains Simulation object and other parameters needed to setup
-        and run case.
+    spec : CaseSpec
+        Compact description of case, with data shared by all cases set by
+        :func:`initialize_worker`.
 
     Returns
     -------
     sim : ``Simulation``
-        Simulation case with calculated ignition delay.
+        Simulation case with results file, ready for processing.
 
     """
-    sim, model_file, model_spec_key, path, restart = sim_tuple
+    sim = Simulation.from_spec(spec, worker_state['species names'])
+    sim.setup_case(worker_state['model files'][spec.model_index],
+                   worker_state['species key'], worker_state['results path'],
+                   spec.solver_settings, worker_state['solutions'],
+                   worker_state['species indices'][spec.model_index],
+                   worker_state.get('ignition definitions')
+                   )
+    sim.run_case(worker_state['restart'], **worker_state['limits'])
+    if 'telemetry' in sim.meta:
+        sim.meta['telemetry']['peak memory'] = peak_memory()
 
-    sim.setup_case(model_file, model_spec_key, path)
-    sim.run_case(restart)
+    # Only send back case description and metadata, without Cantera objects
+    result = Simulation.from_spec(spec, worker_state['species names'])
+    result.meta = sim.meta
+    return result
 
-    sim = Simulation(sim.kind, sim.apparatus, sim.meta, sim.properties)
-    return sim
 
+class ErrorAccumulator(object):
+    """Running error and absolute deviation functions of a dataset.
+
+    Datapoints are added one at a time, as their simulations finish; NaN
+    values are ignored, as in :func:`dataset_error_functions`.
+
+    Parameters
+    ----------
+    standard_dev : float
+        Standard deviation of the (logarithm of) experimental ignition delays
 
-def estimate_std_dev(indep_variable, dep_variable):
+    """
+    def __init__(self, standard_dev):
+        self.standard_dev = standard_dev
+        self.count = 0
+        self.sum_deviation = 0.
+        self.sum_error = 0.
+
+    def add(self, ignition_delay_exp, ignition_delay_sim):
+        """Add datapoint to running sums.
+
+        Parameters
+        ----------
+        ignition_delay_exp : float
+            Experimental ignition delay
+        ignition_delay_sim : float
+            Simulated ignition delay, in the same units
+
+        """
+        with numpy.errstate(divide='ignore'):
+            deviation = (numpy.log(ignition_delay_sim) -
+                         numpy.log(ignition_delay_exp)
+                         ) / self.standard_dev
+        if numpy.isnan(deviation):
+            return
+        self.count += 1
+        self.sum_deviation += deviation
+        self.sum_error += deviation**2
+
+    @property
+    def error_function(self):
+        """float: mean of squared normalized deviations"""
+        if self.count == 0:
+            return numpy.nan
+        return self.sum_error / self.count
+
+    @property
+    def deviation_function(self):
+        """float: mean of normalized deviations"""
+        if self.count == 0:
+            return numpy.nan
+        return self.sum_deviation / self.count
+
+
+def resolve_model_files(model_name, model_path, model_variant, simulations):
+    """Get filenames of model (variants) to use for the cases of a dataset.
+
+    Variant lookup arrays are built once per dataset, and the closest variant
+    pressure found for all cases together.
+
+    Parameters
+    ----------
+    model_name : str
+        Chemical kinetic model filename
+    model_path : str
+        Local path for model file
+    model_variant : dict
+        Optional; variants of models for, e.g., bath gases and pressures
+    simulations : list
+        List of :class:`Simulation` objects
+
+    Returns
+    -------
+    model_files : list of str
+        Path of model file for each case
+
+    """
+    # special treatment based on pressure for Princeton model (and others)
+    if not model_variant or model_name not in model_variant:
+        return [os.path.join(model_path, model_name)] * len(simulations)
+
+    variants = model_variant[model_name]
+    model_mods = [''] * len(simulations)
+
+    if 'bath gases' in variants:
+        # find any bath gases requiring special treatment
+        bath_gases = variants['bath gases']
+        default_gas = sorted(bath_gases)[0]
+
+        # If only one bath gas present, use that. If multiple, use the
+        # predominant species. If none of the designated bath gases
+        # are present, just use the first one (shouldn't matter.)
+        for idx, sim in enumerate(simulations):
+            gases = [(amount, name) for name, amount in sim.composition
+                     if name in bath_gases
+                     ]
+            sp = max(gases)[1] if gases else default_gas
+            model_mods[idx] += bath_gases[sp]
+
+    if 'pressures' in variants:
+        variant_pressures = list(variants['pressures'])
+        values = numpy.array([float(n) for n in variant_pressures])
+
+        # pressures in atm, and index of closest variant pressure of each
+        pressures = numpy.array([sim.pressure for sim in simulations]) / 101325.
+        closest = numpy.argmin(numpy.abs(pressures[:, numpy.newaxis] - values),
+                               axis=1
+                               )
+        for idx, i in enumerate(closest):
+            model_mods[idx] += variants['pressures'][variant_pressures[i]]
+
+    return [os.path.join(model_path, model_name + model_mod)
+            for model_mod in model_mods
+            ]
+
+
+def compile_model(model_file, species_key, compiled_path):
+    """Compile model file, or use it as is if it cannot be compiled.
+
+    Parameters
+    ----------
+    model_file : str
+        Filename of model
+    species_key : dict
+        Names of species in the model, keyed by ChemKED name
+    compiled_path : str
+        Directory of compiled mechanisms
+
+    Returns
+    -------
+    model_file : str
+        Filename of compiled mechanism, or of original model
+    species_indices : dict
+        Index of keyed species and ignition targets, or ``None`` if not
+        compiled
+
+    """
+    if not os.path.isfile(model_file):
+        # e.g., models included with Cantera
+        return model_file, None
+    try:
+        return compile_mechanism(model_file, species_key, compiled_path)
+    except Exception as err:
+        # Simulations can still load the original model
+        print('Warning: using ' + model_file + ' without compiling: ' +
+              (str(err) or type(err).__name__)
+              )
+        return model_file, None
+
+
+def estimate_std_dev(indep_variable, dep_variable, min_std_dev=None):
     """
 
     Parameters
@@ -91,6 +343,9 @@ def estimate_std_dev(indep_variable, dep_variable):
         Independent variable (e.g., temperature, pressure)
     dep_variable : ndarray, list(float)
         Dependent variable (e.g., ignition delay)
+    min_std_dev : float
+        Optional; minimum allowable standard deviation. Defaults to
+        :data:`min_deviation`.
 
     Returns
     -------
@@ -99,6 +354,11 @@ def estimate_std_dev(indep_variable, dep_variable):
 
     """
 
+    from scipy.interpolate import UnivariateSpline
+
+    if min_std_dev is None:
+        min_std_dev = min_deviation
+
     assert len(indep_variable) == len(dep_variable), \
         'independent and dependent variables not the same length'
 
@@ -121,7 +381,7 @@ def estimate_std_dev(indep_variable, dep_variable):
     # spline fit of the data
     if len(indep_variable) == 1 or len(indep_variable) == 2:
         # Fit of data will be perfect
-        return min_deviation
+        return min_std_dev
     elif len(indep_variable) == 3:
         spline = UnivariateSpline(indep_variable, dep_variable, k=2)
     else:
@@ -129,14 +389,220 @@ def estimate_std_dev(indep_variable, dep_variable):
 
     standard_dev = numpy.std(dep_variable - spline(indep_variable))
 
-    if standard_dev < min_deviation:
+    if standard_dev < min_std_dev:
         print('Standard deviation of {:.2f} too low, '
-              'using {:.2f}'.format(standard_dev, min_deviation))
-        standard_dev = min_deviation
+              'using {:.2f}'.format(standard_dev, min_std_dev))
+        standard_dev = min_std_dev
 
     return standard_dev
 
 
+def dataset_error_functions(ignition_delays_exp, ignition_delays_sim,
+                            standard_dev
+                            ):
+    """Calculate error and absolute deviation functions of a dataset.
+
+    Parameters
+    ----------
+    ignition_delays_exp : ndarray
+        Experimental ignition delays
+    ignition_delays_sim : ndarray
+        Simulated ignition delays, in the same units
+    standard_dev : float
+        Standard deviation of the (logarithm of) experimental ignition delays
+
+    Returns
+    -------
+    error_func : float
+        Mean of the squared, normalized differences of the logarithms of the
+        ignition delays, ignoring NaN values
+    dev_func : float
+        Mean of the normalized differences, ignoring NaN values
+
+    """
+    dev_func = (numpy.log(ignition_delays_sim) -
+                numpy.log(ignition_delays_exp)
+                ) / standard_dev
+    error_func = numpy.nanmean(numpy.power(dev_func, 2))
+    dev_func = numpy.nanmean(dev_func)
+    return error_func, dev_func
+
+
+def missing_bath_gas(properties, species_key):
+    """Check if Ar or He is in the reactants of a dataset but not a model.
+
+    Parameters
+    ----------
+    properties : pyked.chemked.ChemKED
+        ChemKED object with full set of experimental properties
+    species_key : dict
+        Names of species in the model, keyed by ChemKED name
+
+    Returns
+    -------
+    missing : bool
+        ``True`` if Ar or He is missing from the model
+
+    """
+    for gas in ['Ar', 'He']:
+        if (any([gas in spec.values() for case in properties.datapoints
+                 for spec in case.composition]
+                ) and gas not in species_key
+            ):
+            return True
+    return False
+
+
+def quantize(value, tolerance, relative=True):
+    """Round value to a multiple of a tolerance, for comparing cases.
+
+    Parameters
+    ----------
+    value : float
+        Value to round; may be ``None``
+    tolerance : float
+        Tolerance, relative (i.e., on the logarithm of the value) or absolute
+    relative : bool
+        If ``True`` (default), the tolerance is relative to the value.
+
+    Returns
+    -------
+    quantized : int
+        Integer number of tolerances, or ``None``
+
+    """
+    if value is None:
+        return None
+    if not relative:
+        return int(round(value / tolerance))
+    if value == 0.:
+        return 0
+    sign = 1 if value > 0. else -1
+    return sign * int(round(numpy.log(abs(value)) / tolerance))
+
+
+def case_key(sim, model_file, tolerance=None):
+    """Canonical description of the conditions of a case.
+
+    Cases with the same key (e.g., the same datapoint in two datasets, or in
+    datasets converted from different sources) have identical integration
+    results, and so are only simulated once. The key is made of the model
+    file (variant), kind of experiment and apparatus, temperature and pressure
+    (within a relative tolerance), initial composition normalized to sum to
+    one (within an absolute tolerance), pressure rise, compression time, and
+    volume history hash.
+
+    Parameters
+    ----------
+    sim : Simulation
+        Simulation case, with volume history shared by
+        :func:`share_volume_histories`
+    model_file : str
+        Filename of model (variant) used for case
+    tolerance : float
+        Optional; tolerance of conditions. Defaults to :data:`dedup_tolerance`.
+
+    Returns
+    -------
+    key : tuple
+        Canonical description of case
+
+    """
+    if tolerance is None:
+        tolerance = dedup_tolerance
+
+    basis = 'mass' if 'mass' in sim.properties.composition_type else 'mole'
+    total = sum(amount for _, amount in sim.composition)
+    composition = tuple(sorted(
+        (name, quantize(amount / total, tolerance, relative=False))
+        for name, amount in sim.composition if amount > 0.
+        ))
+    return (model_file, sim.kind, sim.apparatus,
+            quantize(sim.temperature, tolerance),
+            quantize(sim.pressure, tolerance), basis, composition,
+            quantize(sim.pressure_rise, tolerance),
+            quantize(sim.compression_time, tolerance),
+            sim.meta.get('volume-history'),
+            )
+
+
+shared_result_keys = ['status', 'timeout', 'save-file', 'ignition-definition',
+                      'simulated-ignition-delay', 'simulated-first-stage-delay',
+                      'ignition-delays',
+                      ]
+"""list: metadata of a simulated case kept to share with identical cases"""
+
+
+def case_result(sim, definition):
+    """Processed results of a simulated case, to share with identical cases.
+
+    Only the results in :data:`shared_result_keys` are kept, rather than the
+    case itself, so that results of all cases of a run can be held at once.
+
+    Parameters
+    ----------
+    sim : Simulation
+        Simulated case, after :meth:`Simulation.process_results`
+    definition : str
+        Name of ignition definition of dataset of case
+
+    Returns
+    -------
+    result : dict
+        Case ``id``, experimental ``ignition delay`` (which sets the end time
+        of integration), ``ignition definition``, and ``meta`` with results
+
+    """
+    return {'id': sim.meta['id'],
+            'ignition delay': sim.ignition_delay,
+            'ignition definition': definition,
+            'meta': {key: sim.meta[key] for key in shared_result_keys
+                     if key in sim.meta
+                     },
+            }
+
+
+def share_result(result, sim, sim_definition):
+    """Share the results of a simulated case with an identical case.
+
+    Parameters
+    ----------
+    result : dict
+        Results of simulated case, from :func:`case_result`
+    sim : Simulation
+        Identical case; its metadata is replaced
+    sim_definition : str
+        Name of ignition definition of dataset of identical case
+
+    Returns
+    -------
+    sim : Simulation
+        Identical case with results, or ``None`` if the results cannot be
+        shared: the integration ended before that of the case would, or the
+        ignition definition of the case was not evaluated
+
+    """
+    # End time of integration is a multiple of the experimental delay
+    if sim.ignition_delay > result['ignition delay']:
+        return None
+
+    meta = dict(result['meta'])
+    if (meta.get('status') is None and
+            sim_definition != result['ignition definition']):
+        delays = meta.get('ignition-delays', {})
+        if sim_definition not in delays:
+            return None
+        meta['ignition-definition'] = sim_definition
+        meta['simulated-ignition-delay'] = delays[sim_definition][0] * units.second
+        meta['simulated-first-stage-delay'] = delays[sim_definition][1] * units.second
+
+    meta.update({'id': sim.meta['id'], 'data-file': sim.meta.get('data-file'),
+                 'duplicate of': result['id'],
+                 })
+    sim.meta = meta
+    return sim
+
+
 def get_changing_variable(cases):
     """Identify variable changing across multiple cases.
 
@@ -184,7 +650,13 @@ def evaluate_model(model_name, spec_keys_file, dataset_file,
                    data_path='data', model_path='models',
                    results_path='results', model_variant_file=None,
                    num_threads=None, print_results=False, restart=False,
-                   skip_validation=False,
+                   skip_validation=False, results_table=None,
+                   results_database=None, max_in_flight=None,
+                   max_wall_time=None, max_steps=None, max_rows=None,
+                   retry_ladder=None, compile_mechanisms=True,
+                   compiled_path=None, progress=False, events=None,
+                   ignition_definitions=None, deduplicate=True,
+                   results_file=None,
                    ):
     """Evaluates the ignition delay error of a model for a given dataset.
 
@@ -215,6 +687,57 @@ def evaluate_model(model_name, spec_keys_file, dataset_file,
         If ``True``, process saved results. Mainly intended for testing/development.
     skip_validation : bool
         If ``True``, skips validation of ChemKED files.
+    results_table : str
+        Optional; filename for table of results with one row per datapoint.
+        Parquet (``.parquet``) or Arrow IPC (``.arrow``) files are written if
+        PyArrow is installed, and CSV files otherwise.
+    results_database : str
+        Optional; filename of SQLite database that results are added to, as a
+        new run. See :mod:`pyteck.database`.
+    max_in_flight : int
+        Optional; maximum number of cases submitted to worker processes but
+        not yet processed. Defaults to twice ``num_threads``.
+    max_wall_time : float
+        Optional; maximum wall time in seconds of integrating each case. Cases
+        reaching this are marked as timed out, and workers still running a
+        case after ``kill_time_factor`` times this are killed and replaced.
+    max_steps : int
+        Optional; maximum number of integrator steps of each case.
+    max_rows : int
+        Optional; maximum number of rows of results saved for each case.
+    retry_ladder : list of dict
+        Optional; solver settings of each retry of a case that raises an
+        error, in order. Defaults to :data:`default_retry_ladder`; an empty
+        list disables retries.
+    compile_mechanisms : bool
+        If ``True`` (default), models (and their variants) are compiled to slim
+        YAML mechanisms by :func:`pyteck.mechanisms.compile_mechanism`, which
+        are loaded by worker processes instead.
+    compiled_path : str
+        Optional; directory of compiled mechanisms. Defaults to
+        ``compiled-mechanisms`` in ``results_path``.
+    progress : bool
+        If ``True``, show a live status line on standard error, with cases
+        done and remaining, throughput, estimated time remaining, active
+        workers, and failures. Output of worker processes is then suppressed.
+    events : str or file
+        Optional; filename (or ``-`` for standard output) or open file that
+        JSON-lines progress events are written to. See
+        :class:`pyteck.progress.ProgressReporter`. With ``-``, all other
+        output goes to standard error, and output of worker processes is
+        suppressed.
+    ignition_definitions : list of dict
+        Optional; ignition definitions (with ``target`` and ``type``)
+        evaluated for each case besides that of its dataset, from the same
+        integration results, and stored with the results of each datapoint.
+        Defaults to :data:`pyteck.simulation.default_ignition_definitions`.
+    deduplicate : bool
+        If ``True`` (default), cases with identical conditions (see
+        :func:`case_key`), within or across datasets, are only simulated once,
+        and the results shared by each datapoint.
+    results_file : str
+        Optional; name of YAML file that results are written to. Defaults to
+        ``<model>-results.yaml`` in the current directory.
 
     Returns
     -------
@@ -222,19 +745,28 @@ def evaluate_model(model_name, spec_keys_file, dataset_file,
         Dictionary with all information about model evaluation results.
 
     """
+    if events == '-':
+        # Standard output is kept for the JSON-lines events, so other output
+        # of this process and its workers goes to standard error instead
+        kwargs = dict(locals(), events=sys.stdout)
+        with redirect_stdout(sys.stderr):
+            return evaluate_model(**kwargs)
+
+    from pyked.chemked import ChemKED
+
     # Create results_path if it doesn't exist
     if not os.path.exists(results_path):
         os.makedirs(results_path)
 
     # Dict to translate species names into those used by models
     with open(spec_keys_file, 'r') as f:
-        model_spec_key = yaml.safe_load(f)
+        model_spec_key = yaml_load(f)
 
     # Keys for models with variants depending on pressure or bath gas
     model_variant = None
     if model_variant_file:
         with open(model_variant_file, 'r') as f:
-            model_variant = yaml.safe_load(f)
+            model_variant = yaml_load(f)
 
     # Read dataset list
     with open(dataset_file, 'r') as f:
@@ -250,153 +782,388 @@ def evaluate_model(model_name, spec_keys_file, dataset_file,
     # cores minus 1, or use 1 if multiple cores not available.
     if not num_threads:
         num_threads = multiprocessing.cpu_count()-1 or 1
-
-    # Loop through all datasets
-    for idx_set, dataset in enumerate(dataset_list):
-
-        dataset_meta = {'dataset': dataset, 'dataset_id': idx_set}
-
-        # Create individual simulation cases for each datapoint in this set
-        properties = ChemKED(os.path.join(data_path, dataset), skip_validation=skip_validation)
-        simulations = create_simulations(dataset, properties)
-
-        ignition_delays_exp = numpy.zeros(len(simulations))
-        ignition_delays_sim = numpy.zeros(len(simulations))
-
-        #############################################
-        # Determine standard deviation of the dataset
-        #############################################
-        ign_delay = [case.ignition_delay.to('second').magnitude
-                     for case in properties.datapoints
-                     ]
-
-        # get variable that is changing across datapoints
-        variable = get_changing_variable(properties.datapoints)
-        # for ignition delay, use logarithm of values
-        standard_dev = estimate_std_dev(variable, numpy.log(ign_delay))
-        dataset_meta['standard deviation'] = float(standard_dev)
-
-        #######################################################
-        # Need to check if Ar or He in reactants but not model,
-        # and if so skip this dataset (for now).
-        #######################################################
-        if ((any(['Ar' in spec.values() for case in properties.datapoints
-                  for spec in case.composition]
-                  )
-             and 'Ar' not in model_spec_key[model_name]
-             ) or
-            (any(['He' in spec.values() for case in properties.datapoints
-                  for spec in case.composition]
-                  )
-             and 'He' not in model_spec_key[model_name]
-             )
-            ):
-            print('Warning: Ar or He in dataset, but not in model. Skipping.')
-            error_func_sets[idx_set] = numpy.nan
-            continue
-
-        # Use available number of processors minus one,
-        # or one process if single core.
-        pool = multiprocessing.Pool(processes=num_threads)
-
-        # setup all cases
-        jobs = []
-        for idx, sim in enumerate(simulations):
-            # special treatment based on pressure for Princeton model (and others)
-
-            if model_variant and model_name in model_variant:
-                model_mod = ''
-                if 'bath gases' in model_variant[model_name]:
-                    # find any bath gases requiring special treatment
-                    bath_gases = set(model_variant[model_name]['bath gases'])
-                    gases = bath_gases.intersection(
-                        set([c['species-name'] for c in sim.properties.composition])
+    if not max_in_flight:
+        max_in_flight = 2 * num_threads
+
+    # Limits on each case; workers stuck beyond the wall time limit (e.g.,
+    # within a single integrator step) are killed.
+    limits = {'max_wall_time': max_wall_time, 'max_steps': max_steps,
+              'max_rows': max_rows,
+              }
+    kill_time = None
+    if max_wall_time is not None:
+        kill_time = kill_time_factor * max_wall_time
+    timed_out = []
+
+    if retry_ladder is None:
+        retry_ladder = default_retry_ladder
+    case_failures = []
+
+    # Models are compiled at most once per run, and cached between runs
+    if compiled_path is None:
+        compiled_path = os.path.join(results_path, 'compiled-mechanisms')
+    compiled_models = {}
+
+    if ignition_definitions is None:
+        ignition_definitions = default_ignition_definitions
+
+    # Results of simulated cases (without the cases themselves), by
+    # conditions, shared with identical cases
+    unique_cases = {}
+    num_cases = 0
+    num_simulated = 0
+
+    reporter = ProgressReporter(len(dataset_list),
+                                sys.stderr if progress else None, events
+                                )
+    reporter.start_run(model_name)
+
+    # Costs of each case are added to telemetry, for planning later runs
+    telemetry = open(os.path.join(results_path, telemetry_file), 'a')
+
+    # Datapoint results are written as each case finishes
+    results_writers = []
+    if results_table:
+        results_writers.append(open_results_writer(results_table))
+    database = None
+    if results_database:
+        from .database import ResultsDatabase
+        database = ResultsDatabase(results_database)
+        run_id = database.start_run(
+            model_name, dataset_file,
+            {'model-variant-file': model_variant_file,
+             'skip-validation': skip_validation,
+             'min-deviation': min_deviation,
+             })
+        results_writers.append(database.writer(run_id))
+
+    try:
+        # Loop through all datasets
+        for idx_set, dataset in enumerate(dataset_list):
+
+            dataset_meta = {'dataset': dataset, 'dataset_id': idx_set}
+
+            # Create individual simulation cases for each datapoint in this set
+            with open(os.path.join(data_path, dataset), 'r') as f:
+                properties = ChemKED(dict_input=yaml_load(f),
+                                     skip_validation=skip_validation
+                                     )
+            simulations = create_simulations(dataset, properties)
+            volume_profiles = share_volume_histories(simulations)
+
+            #############################################
+            # Determine standard deviation of the dataset
+            #############################################
+            ign_delay = [sim.ignition_delay for sim in simulations]
+
+            # get variable that is changing across datapoints
+            variable = get_changing_variable(properties.datapoints)
+            # for ignition delay, use logarithm of values
+            standard_dev = estimate_std_dev(variable, numpy.log(ign_delay))
+            dataset_meta['standard deviation'] = float(standard_dev)
+
+            #######################################################
+            # Need to check if Ar or He in reactants but not model,
+            # and if so skip this dataset (for now).
+            #######################################################
+            if missing_bath_gas(properties, model_spec_key[model_name]):
+                print('Warning: Ar or He in dataset, but not in model. Skipping.')
+                reporter.start_dataset(dataset, 0)
+                reporter.finish_dataset(skipped=True)
+                error_func_sets[idx_set] = numpy.nan
+                columns = dataset_results(
+                    model_name, dataset, idx_set,
+                    [sim.temperature for sim in simulations],
+                    [sim.pressure for sim in simulations], ign_delay,
+                    standard_dev=standard_dev
+                    )
+                for writer in results_writers:
+                    writer.write(columns)
+                continue
+
+            # Use available number of processors minus one,
+            # or one process if single core.
+            # Shared volume profiles are sent once to each process.
+            # Data shared by all cases is sent once to each process, and
+            # each case as a compact description referring to it.
+            model_files = resolve_model_files(model_name, model_path,
+                                              model_variant, simulations
+                                              )
+
+            # Identical cases are simulated once, by the case with the longest
+            # end time, and the results shared with the others. Cases identical
+            # to one simulated for an earlier dataset reuse its results. The
+            # ignition definitions of the dataset are evaluated for each case,
+            # so that cases can share results with those of other definitions.
+            dataset_definitions = [dict(sim.properties.ignition_type)
+                                   for sim in simulations
+                                   ]
+            definitions = [ignition_definition_name(definition)
+                           for definition in dataset_definitions
+                           ]
+            keys = [None] * len(simulations)
+            if deduplicate:
+                keys = [case_key(sim, model_file)
+                        for sim, model_file in zip(simulations, model_files)
+                        ]
+            reused = {}
+            duplicates = {}
+            representatives = {}
+            to_run = []
+            for idx in sorted(range(len(simulations)),
+                              key=lambda idx: -simulations[idx].ignition_delay
+                              ):
+                key = keys[idx]
+                if key is None:
+                    to_run.append(idx)
+                    continue
+                if key in unique_cases:
+                    shared_sim = share_result(unique_cases[key],
+                                              simulations[idx], definitions[idx]
+                                              )
+                    if shared_sim is not None:
+                        reused[idx] = shared_sim
+                        continue
+                if key in representatives:
+                    duplicates[representatives[key]].append(idx)
+                else:
+                    representatives[key] = idx
+                    duplicates[idx] = []
+                    to_run.append(idx)
+
+            model_species_indices = {}
+            if compile_mechanisms:
+                for model_file in set(model_files):
+                    if model_file not in compiled_models:
+                        compiled_models[model_file] = compile_model(
+                            model_file, model_spec_key[model_name], compiled_path
+                            )
+                model_species_indices = dict(compiled_models[model_file]
+                                             for model_file in set(model_files)
+                                             )
+                model_files = [compiled_models[model_file][0]
+                               for model_file in model_files
+                               ]
+            shared = {'model files': sorted(set(model_files)),
+                      'species names': sorted(set(
+                          name for sim in simulations for name, _ in sim.composition
+                          )),
+                      'species key': model_spec_key[model_name],
+                      'results path': results_path,
+                      'restart': restart,
+                      'limits': limits,
+                      'quiet': progress or sys.stdout is sys.stderr,
+                      'ignition definitions': ignition_definitions + [
+                          definition for definition in dataset_definitions
+                          if definition not in ignition_definitions
+                          ],
+                      }
+            model_index = {name: idx for idx, name in enumerate(shared['model files'])}
+            species_index = {name: idx for idx, name in enumerate(shared['species names'])}
+            shared['species indices'] = [model_species_indices.get(name)
+                                         for name in shared['model files']
+                                         ]
+
+            pool = WorkerPool(processes=num_threads,
+                              initializer=initialize_worker,
+                              initargs=(volume_profiles, shared)
+                              )
+
+            # Cases are described as they are submitted, and only a bounded
+            # number are in flight at once.
+            def make_job(idx, solver_settings):
+                return CaseSpec(simulations[idx], species_index,
+                                model_index[model_files[idx]], solver_settings
+                                )
+
+            # Cases sharing a mechanism (variant) are submitted together, and
+            # workers keep to one mechanism where they can, so each loads few.
+            order = sorted(to_run, key=lambda idx: model_index[model_files[idx]])
+            jobs = (make_job(idx, {}) for idx in tuple(order))
+
+            # Failed cases are retried with the next solver settings of the
+            # ladder, alongside other cases.
+            retries = deque()
+            attempts = {}
+            failures = {}
+
+            def add_failure(idx, attempt_record):
+                record = failures.setdefault(
+                    idx, {'dataset': dataset, 'case': simulations[idx].meta['id'],
+                          'attempts': [], 'recovered': False,
+                          })
+                record['attempts'].append(attempt_record)
+
+            # Results are processed, accumulated, and written out as each
+            # case finishes, rather than held until the dataset is done.
+            accumulator = ErrorAccumulator(standard_dev)
+            dataset_meta['datapoints'] = [None] * len(simulations)
+
+            # Record results of case, simulated or shared with identical case
+            def finish_case(idx, sim):
+                status = sim.meta.get('status')
+                if status in [STATUS_TIMED_OUT, STATUS_FAILED]:
+                    ignition_delay_sim = numpy.nan
+                    first_stage_delay = numpy.nan
+                    if status == STATUS_TIMED_OUT:
+                        timed_out.append({'dataset': dataset,
+                                          'case': sim.meta['id'],
+                                          'limit': sim.meta['timeout'],
+                                          })
+                else:
+                    ignition_delay_sim = sim.meta['simulated-ignition-delay'].magnitude
+                    first_stage_delay = sim.meta['simulated-first-stage-delay'].magnitude
+
+                dataset_meta['datapoints'][idx] = (
+                    {'experimental ignition delay': str(sim.ignition_delay * units.second),
+                     'simulated ignition delay': str(ignition_delay_sim * units.second),
+                     'temperature': str(sim.temperature * units.kelvin),
+                     'pressure': str(sim.pressure * units.pascal),
+                     'composition': [{'InChI': comp['InChI'],
+                                      'species-name': comp['species-name'],
+                                      'amount': str(comp['amount'].magnitude),
+                                      } for comp in simulations[idx].properties.composition],
+                     'composition type': simulations[idx].properties.composition_type,
+                     })
+                if status is not None:
+                    dataset_meta['datapoints'][idx]['status'] = status
+                if 'duplicate of' in sim.meta:
+                    dataset_meta['datapoints'][idx]['duplicate of'] = sim.meta['duplicate of']
+                if 'ignition-delays' in sim.meta:
+                    # All ignition definitions, for diagnostics
+                    dataset_meta['datapoints'][idx]['ignition definition'] = (
+                        sim.meta['ignition-definition']
                         )
-
-                    # If only one bath gas present, use that. If multiple, use the
-                    # predominant species. If none of the designated bath gases
-                    # are present, just use the first one (shouldn't matter.)
-                    if len(gases) > 1:
-                        max_mole = 0.
-                        sp = ''
-                        for g in gases:
-                            if float(sim.properties['composition'][g]) > max_mole:
-                                sp = g
-                    elif len(gases) == 1:
-                        sp = gases.pop()
-                    else:
-                        # If no designated bath gas present, use any.
-                        sp = bath_gases.pop()
-                    model_mod += model_variant[model_name]['bath gases'][sp]
-
-                if 'pressures' in model_variant[model_name]:
-                    # pressure to atm
-                    pres = sim.properties.pressure.to('atm').magnitude
-
-                    # choose closest pressure
-                    # better way to do this?
-                    i = numpy.argmin(numpy.abs(numpy.array(
-                        [float(n)
-                         for n in list(model_variant[model_name]['pressures'])
-                         ]
-                        ) - pres))
-                    pres = list(model_variant[model_name]['pressures'])[i]
-                    model_mod += model_variant[model_name]['pressures'][pres]
-
-                model_file = os.path.join(model_path, model_name + model_mod)
-            else:
-                model_file = os.path.join(model_path, model_name)
-
-            jobs.append([sim, model_file, model_spec_key[model_name], results_path, restart])
-
-        # run all cases
-        jobs = tuple(jobs)
-        results = pool.map(simulation_worker, jobs)
-
-        # not adding more proceses, and ensure all finished
-        pool.close()
-        pool.join()
-
-        dataset_meta['datapoints'] = []
-
-        for idx, sim in enumerate(results):
-            sim.process_results()
-
-            dataset_meta['datapoints'].append(
-                {'experimental ignition delay': str(sim.properties.ignition_delay),
-                 'simulated ignition delay': str(sim.meta['simulated-ignition-delay']),
-                 'temperature': str(sim.properties.temperature),
-                 'pressure': str(sim.properties.pressure),
-                 'composition': [{'InChI': comp['InChI'],
-                                  'species-name': comp['species-name'],
-                                  'amount': str(comp['amount'].magnitude),
-                                  } for comp in sim.properties.composition],
-                 'composition type': sim.properties.composition_type,
-                 })
-
-            ignition_delays_exp[idx] = sim.properties.ignition_delay.magnitude
-            ignition_delays_sim[idx] = sim.meta['simulated-ignition-delay'].magnitude
-
-        # calculate error function for this dataset
-        error_func = numpy.power(
-            (numpy.log(ignition_delays_sim) -
-             numpy.log(ignition_delays_exp)) / standard_dev, 2
-             )
-        error_func = numpy.nanmean(error_func)
-        error_func_sets[idx_set] = error_func
-        dataset_meta['error function'] = float(error_func)
-
-        dev_func = (numpy.log(ignition_delays_sim) -
-                    numpy.log(ignition_delays_exp)
-                    ) / standard_dev
-        dev_func = numpy.nanmean(dev_func)
-        dev_func_sets[idx_set] = dev_func
-        dataset_meta['absolute deviation'] = float(dev_func)
-
-        output['datasets'].append(dataset_meta)
-
-        if print_results:
-            print('Done with ' + dataset)
+                    dataset_meta['datapoints'][idx]['ignition delays'] = {
+                        name: {'ignition delay': str(delays[0] * units.second),
+                               'first-stage delay': str(delays[1] * units.second),
+                               } for name, delays in sim.meta['ignition-delays'].items()
+                        }
+                reporter.case_finished(sim.meta['id'], status or STATUS_OK,
+                                       pool.active,
+                                       **sim.meta.get('telemetry', {})
+                                       )
+                if 'telemetry' in sim.meta:
+                    record = dict(sim.meta['telemetry'])
+                    record.update({'model': model_name, 'dataset': dataset,
+                                   'case': sim.meta['id'],
+                                   'apparatus': sim.apparatus,
+                                   'status': status or STATUS_OK,
+                                   })
+                    telemetry.write(json.dumps(record, sort_keys=True) + '\n')
+                accumulator.add(sim.ignition_delay, ignition_delay_sim)
+
+                columns = dataset_results(
+                    model_name, dataset, idx_set, [sim.temperature],
+                    [sim.pressure], [sim.ignition_delay],
+                    [ignition_delay_sim], [first_stage_delay],
+                    standard_dev, status, datapoint_ids=[idx]
+                    )
+                for writer in results_writers:
+                    writer.write(columns)
+
+            reporter.start_dataset(dataset, len(simulations))
+            for idx in sorted(reused):
+                finish_case(idx, reused[idx])
+            with pool:
+                for pos, sim in pool.imap_bounded(
+                        simulation_worker, jobs, max_in_flight, kill_time,
+                        return_errors=True, retries=retries,
+                        affinity=lambda spec: spec.model_index
+                        ):
+                    idx = order[pos]
+                    if isinstance(sim, TaskTimeout):
+                        # Worker was stuck, and has been replaced
+                        print('Case ', simulations[idx].meta['id'],
+                              ' killed after {:.1f} s'.format(sim.elapsed)
+                              )
+                        sim = simulations[idx]
+                        sim.meta['status'] = STATUS_TIMED_OUT
+                        sim.meta['timeout'] = 'killed'
+
+                    elif isinstance(sim, TaskError):
+                        error = sim
+                        sim = simulations[idx]
+                        attempt = attempts.get(idx, 0)
+                        add_failure(idx, {'solver settings':
+                                              retry_ladder[attempt - 1] if attempt else {},
+                                          'error': error.error_type,
+                                          'message': error.message,
+                                          })
+                        print('Case ', sim.meta['id'], ' failed (' +
+                              error.error_type + ': ' + error.message + ')'
+                              )
+
+                        if attempt < len(retry_ladder):
+                            reporter.event('case-retry', dataset=dataset,
+                                           case=sim.meta['id'],
+                                           error=error.error_type,
+                                           attempt=attempt + 1
+                                           )
+                            attempts[idx] = attempt + 1
+                            retries.append((pos, make_job(idx, retry_ladder[attempt])))
+                            continue
+                        sim.meta['status'] = STATUS_FAILED
+
+                    elif idx in failures:
+                        failures[idx]['recovered'] = True
+
+                    if sim.meta.get('status') is None:
+                        try:
+                            sim.process_results()
+                        except Exception as err:
+                            # Not retried, since integration results unchanged
+                            add_failure(idx, {'stage': 'process results',
+                                              'error': type(err).__name__,
+                                              'message': str(err),
+                                              })
+                            failures[idx]['recovered'] = False
+                            sim.meta['status'] = STATUS_FAILED
+
+                    finish_case(idx, sim)
+
+                    # Results shared with identical cases
+                    if keys[idx] is None:
+                        continue
+                    result = case_result(sim, definitions[idx])
+                    unique_cases[keys[idx]] = result
+                    for dup in duplicates.pop(idx, []):
+                        shared_sim = share_result(result, simulations[dup],
+                                                  definitions[dup]
+                                                  )
+                        if shared_sim is None:
+                            order.append(dup)
+                            retries.append((len(order) - 1, make_job(dup, {})))
+                        else:
+                            finish_case(dup, shared_sim)
+
+            case_failures.extend(failures[idx] for idx in sorted(failures))
+            num_cases += len(simulations)
+            num_simulated += len(order)
+
+            # error function for this dataset
+            error_func = accumulator.error_function
+            dev_func = accumulator.deviation_function
+            error_func_sets[idx_set] = error_func
+            dataset_meta['error function'] = float(error_func)
+
+            dev_func_sets[idx_set] = dev_func
+            dataset_meta['absolute deviation'] = float(dev_func)
+
+            output['datasets'].append(dataset_meta)
+            reporter.finish_dataset(**{'error function': float(error_func),
+                                       'absolute deviation': float(dev_func),
+                                       })
+
+            if print_results:
+                print('Done with ' + dataset)
+    except BaseException:
+        reporter.close()
+        raise
+    finally:
+        telemetry.close()
+        for writer in results_writers:
+            writer.close()
 
     # Overall error function
     error_func = numpy.nanmean(error_func_sets)
@@ -413,8 +1180,52 @@ def evaluate_model(model_name, spec_keys_file, dataset_file,
     output['error function standard deviation'] = float(numpy.nanstd(error_func_sets))
     output['average deviation function'] = float(abs_dev_func)
 
+    # Cases simulated, after sharing results of identical cases
+    output['deduplication'] = {'cases': num_cases,
+                               'simulated cases': num_simulated,
+                               'ratio': float(num_cases / num_simulated)
+                                        if num_simulated else 1.,
+                               }
+    if print_results:
+        print('simulated cases: ' + str(num_simulated) + ' of ' +
+              str(num_cases) + ' (deduplication ratio ' +
+              '{:.3g}'.format(output['deduplication']['ratio']) + ')'
+              )
+    reporter.finish_run(**{'average error function': output['average error function'],
+                           'average deviation function': float(abs_dev_func),
+                           'simulated cases': num_simulated,
+                           'deduplication ratio': output['deduplication']['ratio'],
+                           })
+    reporter.close()
+
+    if case_failures:
+        output['case failures'] = case_failures
+        print('Failed cases: ' + str(len(case_failures)) + ' (' +
+              str(sum(record['recovered'] for record in case_failures)) +
+              ' recovered by retrying)'
+              )
+        for record in case_failures:
+            print('  ' + record['dataset'] + ', ' + record['case'] + ': ' +
+                  str(len(record['attempts'])) + ' failed attempts' +
+                  (', recovered' if record['recovered'] else '')
+                  )
+
+    if timed_out:
+        output['timed out cases'] = timed_out
+        print('Timed out cases: ' + str(len(timed_out)))
+        for case in timed_out:
+            print('  ' + case['dataset'] + ', ' + case['case'] + ' (' +
+                  case['limit'] + ')'
+                  )
+
+    if database is not None:
+        database.finish_run(run_id, output)
+        database.close()
+
     # Write data to YAML file
-    with open(splitext(basename(model_name))[0] + '-results.yaml', 'w') as f:
-        yaml.dump(output, f)
+    if results_file is None:
+        results_file = splitext(basename(model_name))[0] + '-results.yaml'
+    with open(results_file, 'w') as f:
+        yaml_dump(output, f)
 
     return output
@@ -0,0 +1,243 @@
+"""Compile kinetic models to slim, cached YAML mechanisms.
+
+Legacy CTI and XML models are converted to Cantera YAML, and transport data
+(unused by zero-dimensional ignition simulations) dropped, so that each
+worker process loads the model quickly. The index of each keyed species and
+ignition target species is recorded alongside the compiled mechanism, in a
+JSON file. Compiled mechanisms are cached by the contents of the model and
+species key, so models are only compiled again once changed.
+"""
+
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import os
+import json
+import hashlib
+
+# Local imports
+from .utils import import_cantera, yaml_load, yaml_dump
+
+compiled_version = 2
+"""int: version of compiled mechanism format, part of the cache key"""
+
+ignition_targets = ['OH', 'OH*', 'CH', 'CH*']
+"""list: species ignition targets whose indices are recorded"""
+
+
+def find_species_target(target, species_names):
+    """Find index of species ignition target in a model.
+
+    Species are looked for in upper- and lower-case, and excited species
+    (e.g., ``OH*``) fall back on the nonexcited species if not present.
+
+    Parameters
+    ----------
+    target : str
+        Name of target species
+    species_names : list of str
+        Names of species in model
+
+    Returns
+    -------
+    index : int
+        Index of target species, or ``None`` if not found
+
+    """
+    try_list = [target, target.lower()]
+
+    # If excited radical, may need to fall back to nonexcited species
+    if target[-1] == '*':
+        try_list += [target[:-1], target[:-1].lower()]
+
+    for name in try_list:
+        if name in species_names:
+            return species_names.index(name)
+    return None
+
+
+def convert_mechanism(model_file):
+    """Read a model in Cantera YAML form, converting legacy formats.
+
+    Parameters
+    ----------
+    model_file : str
+        Filename of model in CTI, XML, or YAML format
+
+    Returns
+    -------
+    mechanism : dict
+        Model in Cantera YAML form
+
+    """
+    extension = os.path.splitext(model_file)[1].lower()
+    if extension in ['.yaml', '.yml']:
+        with open(model_file, 'r') as f:
+            return yaml_load(f, core_schema=True)
+
+    # Converters are included with Cantera 2.5 and later
+    try:
+        if extension == '.cti':
+            from cantera import cti2yaml
+        elif extension == '.xml':
+            from cantera import ctml2yaml
+        else:
+            raise ValueError('Unknown model format: ' + model_file)
+    except ImportError:
+        print('Error: Cantera 2.5 or later needed to compile ' + model_file)
+        raise
+
+    converted_file = model_file + '.{}.yaml.tmp'.format(os.getpid())
+    try:
+        if extension == '.cti':
+            cti2yaml.convert(filename=model_file, output_name=converted_file)
+        else:
+            ctml2yaml.convert(inpfile=model_file, outfile=converted_file)
+        with open(converted_file, 'r') as f:
+            return yaml_load(f, core_schema=True)
+    finally:
+        if os.path.exists(converted_file):
+            os.remove(converted_file)
+
+
+def compiled_filenames(model_file, species_key=None, cache_path='compiled-mechanisms'):
+    """Filenames of compiled mechanism and its species indices.
+
+    Parameters
+    ----------
+    model_file : str
+        Filename of model
+    species_key : dict
+        Optional; names of species in the model, keyed by ChemKED name
+    cache_path : str
+        Directory of compiled mechanisms
+
+    Returns
+    -------
+    mechanism_file : str
+        Filename of compiled YAML mechanism
+    index_file : str
+        Filename of JSON file with species indices
+
+    """
+    digest = hashlib.sha256()
+    with open(model_file, 'rb') as f:
+        for block in iter(lambda: f.read(2**20), b''):
+            digest.update(block)
+    digest.update(json.dumps([compiled_version, sorted((species_key or {}).values())]
+                             ).encode('utf-8'))
+
+    name = os.path.splitext(os.path.basename(model_file))[0]
+    name += '-' + digest.hexdigest()[:16]
+    return (os.path.join(cache_path, name + '.yaml'),
+            os.path.join(cache_path, name + '.json')
+            )
+
+
+def compile_mechanism(model_file, species_key=None,
+                      cache_path='compiled-mechanisms', force=False):
+    """Compile a model to slim YAML form, or reuse an existing compiled one.
+
+    Transport data of all phases and species is dropped, and the compiled
+    mechanism validated by loading it with Cantera and comparing its species
+    and reactions with those of the original model (where Cantera can still
+    read its format).
+
+    Parameters
+    ----------
+    model_file : str
+        Filename of model in CTI, XML, or YAML format
+    species_key : dict
+        Optional; names of species in the model, keyed by ChemKED name, whose
+        indices are recorded
+    cache_path : str
+        Directory of compiled mechanisms. Optional; default =
+        'compiled-mechanisms'
+    force : bool
+        If ``True``, compile even if already compiled.
+
+    Returns
+    -------
+    mechanism_file : str
+        Filename of compiled mechanism, to be loaded with
+        ``transport_model=None``
+    species_indices : dict
+        Index of keyed species and ignition targets found in the model
+
+    """
+    mechanism_file, index_file = compiled_filenames(model_file, species_key,
+                                                    cache_path
+                                                    )
+    if (not force and os.path.isfile(mechanism_file) and
+            os.path.isfile(index_file)
+            ):
+        with open(index_file, 'r') as f:
+            return mechanism_file, json.load(f)['species indices']
+
+    mechanism = convert_mechanism(model_file)
+    for phase in mechanism.get('phases', []):
+        phase.pop('transport', None)
+    for key, value in mechanism.items():
+        # Species may be given in other sections than ``species``
+        if key not in ['phases', 'units'] and isinstance(value, list):
+            for entry in value:
+                if isinstance(entry, dict) and 'composition' in entry:
+                    entry.pop('transport', None)
+
+    if not os.path.isdir(cache_path):
+        os.makedirs(cache_path, exist_ok=True)
+
+    # Write to temporary file first, since other processes may be compiling
+    # or reading the same model (Cantera needs the ``.yaml`` extension)
+    temp_file = os.path.splitext(mechanism_file)[0] + '.{}.tmp.yaml'.format(os.getpid())
+    with open(temp_file, 'w') as f:
+        yaml_dump(mechanism, f, default_flow_style=False)
+
+    ct = import_cantera()
+    try:
+        gas = ct.Solution(temp_file, transport_model=None)
+        try:
+            source = ct.Solution(model_file, transport_model=None)
+        except ct.CanteraError:
+            # Legacy formats are not read by Cantera 3 and later
+            source = None
+        if source is not None and (gas.species_names != source.species_names or
+                                   gas.n_reactions != source.n_reactions
+                                   ):
+            raise ValueError('Compiled mechanism for ' + model_file + ' has ' +
+                             str(gas.n_species) + ' species and ' +
+                             str(gas.n_reactions) + ' reactions, but model '
+                             'has ' + str(source.n_species) + ' and ' +
+                             str(source.n_reactions)
+                             )
+    except Exception:
+        os.remove(temp_file)
+        raise
+
+    species_indices = {}
+    missing = []
+    for name in sorted((species_key or {}).values()):
+        if name in gas.species_names:
+            species_indices[name] = gas.species_index(name)
+        else:
+            missing.append(name)
+    if missing:
+        print('Warning: species ' + ', '.join(missing) + ' not found in ' +
+              model_file
+              )
+    for target in ignition_targets:
+        index = find_species_target(target, gas.species_names)
+        if index is not None:
+            species_indices[target] = index
+
+    os.replace(temp_file, mechanism_file)
+    temp_file = index_file + '.{}.tmp'.format(os.getpid())
+    with open(temp_file, 'w') as f:
+        json.dump({'model': model_file, 'version': compiled_version,
+                   'species indices': species_indices,
+                   }, f, indent=1, sort_keys=True)
+    os.replace(temp_file, index_file)
+
+    return mechanism_file, species_indices
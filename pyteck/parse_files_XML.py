@@ -9,14 +9,13 @@ from __future__ import division
 
 # Standard libraries
 import os
+import glob
+import hashlib
+import json
+import multiprocessing
 from argparse import ArgumentParser
 import numpy
 
-try:
-    import yaml
-except ImportError:
-    print('Warning: YAML must be installed to read input file.')
-
 try:
     from lxml import etree
 except ImportError:
@@ -30,12 +29,11 @@ except ImportError:
             raise
 
 # Local imports
-from .utils import units, SPEC_KEY, SPEC_KEY_REV, get_temp_unit
+from .utils import units, SPEC_KEY, SPEC_KEY_REV, get_temp_unit, yaml_dump
 from .exceptions import (KeywordError, UndefinedElementError,
                          MissingElementError, MissingAttributeError,
                          UndefinedKeywordError
                          )
-from .simulation import Simulation
 from . import validation
 
 def get_file_metadata(root):
@@ -280,6 +278,64 @@ def get_ignition_type(root):
     return ignition
 
 
+def get_datagroup_property(prop):
+    """Get name and units of a property defined in a dataGroup.
+
+    Parameters
+    ----------
+    prop : ``etree.Element``
+        property element of a dataGroup
+
+    Returns
+    -------
+    name : str
+        Name of property, as used for the key in the properties dictionary
+    val_unit : ``pint.Unit``
+        Units of the property values
+
+    """
+    if prop.attrib['name'] == 'temperature':
+        try:
+            temp_unit = get_temp_unit[prop.attrib['units']]
+        except KeyError:
+            print('Temperature units not recognized. Must be one of: ' +
+                  str(['{}'.format(k) for k in get_temp_unit.keys()])
+                  )
+            raise
+        val_unit = units(temp_unit)
+    else:
+        val_unit = units(prop.attrib['units'].lower())
+
+    if prop.attrib['name'] == 'ignition delay':
+        name = 'ignition-delay'
+    else:
+        name = prop.attrib['name']
+    return name, val_unit
+
+
+def validate_datapoints(prop, values):
+    """Check values of a property for correct dimensionality and limits.
+
+    Parameters
+    ----------
+    prop : str
+        Name of property
+    values : ``pint.Quantity``
+        Array of values of property
+
+    """
+    if prop == 'ignition-delay':
+        validation.validate_array_gt(prop, values, 0. * units.second)
+    elif prop == 'temperature':
+        validation.validate_array_gt('temperature', values, 0. * units.kelvin)
+    elif prop == 'pressure':
+        validation.validate_array_gt('pressure', values, 0. * units.pascal)
+    elif prop == 'volume':
+        validation.validate_array_geq('volume', values, 0. * units.meter**3)
+    elif prop == 'time':
+        validation.validate_array_geq('time', values, 0. * units.second)
+
+
 def get_datapoints(properties, root):
     """Parse datapoints with ignition delay from file.
 
@@ -302,65 +358,103 @@ def get_datapoints(properties, root):
     for dataGroup in root.findall('dataGroup'):
 
         # get properties of dataGroup
-        num = len(dataGroup.findall('dataPoint'))
+        datapoints = dataGroup.findall('dataPoint')
+        num = len(datapoints)
         for prop in dataGroup.findall('property'):
-            property_id[prop.attrib['id']] = prop.attrib['name']
-            if prop.attrib['name'] == 'temperature':
-                try:
-                    temp_unit = get_temp_unit[prop.attrib['units']]
-                except KeyError:
-                    print('Temperature units not recognized. Must be one of: ' +
-                          str(['{}'.format(k) for k in get_temp_unit.keys()])
-                          )
-                    raise
-                val_unit = units(temp_unit)
-            else:
-                val_unit = units(prop.attrib['units'].lower())
-            vals = numpy.zeros([num]) * val_unit
-            if prop.attrib['name'] == 'ignition delay':
-                properties['ignition-delay'] = vals
-            else:
-                properties[prop.attrib['name']] = vals
+            name, val_unit = get_datagroup_property(prop)
+            property_id[prop.attrib['id']] = name
+            properties[name] = numpy.zeros([num]) * val_unit
 
         # now get data points
-        for idx, dp in enumerate(dataGroup.findall('dataPoint')):
+        group_props = set()
+        for idx, dp in enumerate(datapoints):
             for val in dp:
                 prop = property_id[val.tag]
-                if prop == 'ignition delay':
-                    prop = 'ignition-delay'
-
                 properties[prop].magnitude[idx] = float(val.text)
+                group_props.add(prop)
 
-                # Check units for correct dimensionality
-                if prop == 'ignition-delay':
-                    validation.validate_gt(prop,
-                                           properties[prop][idx],
-                                           0. * units.second
-                                           )
-                elif prop == 'temperature':
-                    validation.validate_gt('temperature',
-                                           properties[prop][idx],
-                                           0. * units.kelvin
-                                           )
-                elif prop == 'pressure':
-                    validation.validate_gt('pressure',
-                                           properties[prop][idx],
-                                           0. * units.pascal
-                                           )
-                elif prop == 'volume':
-                    validation.validate_geq('volume',
-                                            properties[prop][idx],
-                                            0. * units.meter**3
-                                            )
-                elif prop == 'time':
-                    validation.validate_geq('time',
-                                            properties[prop][idx],
-                                            0. * units.second
-                                            )
+        # Check units for correct dimensionality
+        for prop in group_props:
+            validate_datapoints(prop, properties[prop])
 
     return properties
 
 
+def read_datagroups(properties, filename):
+    """Incrementally parse datapoints with ignition delay from file.
+
+    Unlike :func:`get_datapoints`, the file is not loaded into memory at once.
+    Each ``dataPoint`` element is parsed as soon as it has been read and then
+    discarded, so memory use does not grow with the length of (e.g.) volume
+    histories. Values are validated once the whole ``dataGroup`` is read. Other
+    top-level elements are kept in the returned root.
+
+    Parameters
+    ----------
+    properties : dict
+        Dictionary with experimental properties
+    filename : str
+        XML filename in ReSpecTh format with experimental data
+
+    Returns
+    -------
+    properties : dict
+        Dictionary with ignition delay data
+    root : ``etree.Element``
+        root of ReSpecTh XML file, without ``dataGroup`` elements
+
+    """
+    root = None
+    depth = 0
+    property_id = {}
+    data_group = None
+    group_values = {}
+
+    for event, elem in etree.iterparse(filename, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            if depth == 2 and elem.tag == 'dataGroup':
+                data_group = elem
+                group_values = {}
+            continue
+
+        depth -= 1
+        if data_group is None:
+            continue
+
+        if elem is data_group:
+            for prop, (val_unit, values) in group_values.items():
+                properties[prop] = numpy.array(values, dtype=float) * val_unit
+
+                # Check units for correct dimensionality
+                validate_datapoints(prop, properties[prop])
+            elem.clear()
+            root.remove(elem)
+            data_group = None
+            group_values = {}
+
+        elif depth == 2 and elem.tag == 'property':
+            name, val_unit = get_datagroup_property(elem)
+            property_id[elem.attrib['id']] = name
+            group_values[name] = (val_unit, [])
+
+        elif depth == 2 and elem.tag == 'dataPoint':
+            point = {}
+            for val in elem:
+                point[property_id[val.tag]] = float(val.text)
+
+            for prop, (val_unit, values) in group_values.items():
+                values.append(point.get(prop, 0.))
+
+            # free the parsed element
+            elem.clear()
+            data_group.remove(elem)
+
+    return properties, root
+
+
 def read_experiment(filename):
     """Reads experiment data from ReSpecTh XML file.
 
@@ -376,11 +470,12 @@ def read_experiment(filename):
 
     """
 
+    # Datapoints are parsed while reading the file, and applied after the
+    # common properties (which they override).
     try:
-        tree = etree.parse(filename)
-    except OSError:
+        datapoints, root = read_datagroups({}, filename)
+    except (OSError, IOError):
         raise OSError('Unable to open file ' + filename)
-    root = tree.getroot()
 
     properties = {}
 
@@ -400,8 +495,8 @@ def read_experiment(filename):
     # Determine definition of ignition delay
     properties['ignition'] = get_ignition_type(root)
 
-    # Now parse ignition delay datapoints
-    properties = get_datapoints(properties, root)
+    # Now add ignition delay datapoints
+    properties.update(datapoints)
 
     # Get compression time for RCM, if volume history given
     if 'volume' in properties and 'compression-time' not in properties:
@@ -502,7 +597,9 @@ def convert_XML_to_YAML(filename_xml, output='', file_author='',
     if min(num_points) != max(num_points):
         common_variable_name = variables[numpy.argmin(num_points)]
         common_variable = {
-            'value': float(properties[common_variable_name].magnitude.tolist()),
+            'value': float(numpy.ravel(
+                properties[common_variable_name].magnitude
+                )[0]),
             'units': str(properties[common_variable_name].units)
             }
         common_properties[common_variable_name] = common_variable
@@ -511,7 +608,9 @@ def convert_XML_to_YAML(filename_xml, output='', file_author='',
     pressure_rise = None
     if 'pressure-rise' in properties:
         pressure_rise = {
-            'value': float(properties['pressure-rise'].magnitude.tolist()),
+            'value': float(numpy.ravel(
+                properties['pressure-rise'].magnitude
+                )[0]),
             'units': str(properties['pressure-rise'].units)
             }
         common_properties['pressure-rise'] = pressure_rise
@@ -520,7 +619,9 @@ def convert_XML_to_YAML(filename_xml, output='', file_author='',
     compression_time = None
     if 'compression-time' in properties:
         compression_time = {
-            'value': float(properties['compression-time'].magnitude.tolist()),
+            'value': float(numpy.ravel(
+                properties['compression-time'].magnitude
+                )[0]),
             'units': str(properties['compression-time'].units)
             }
         common_properties['compression-time'] = compression_time
@@ -536,9 +637,13 @@ def convert_XML_to_YAML(filename_xml, output='', file_author='',
             datapoint[common_variable_name] = common_variable
 
         for variable in changing_variables:
+            # common properties (e.g., pressure) may be a single value
+            value = properties[variable]
+            if numpy.ndim(value.magnitude) > 0:
+                value = value[idx]
             datapoint[variable] = {
-                'value': float(properties[variable][idx].magnitude),
-                'units': str(properties[variable][idx].units)
+                'value': float(value.magnitude),
+                'units': str(value.units)
                 }
             # need to handle temperature units specially?
 
@@ -597,12 +702,199 @@ def convert_XML_to_YAML(filename_xml, output='', file_author='',
     filename_yaml = os.path.join(output, filename_yaml)
 
     with open(filename_yaml, 'w') as outfile:
-        outfile.write(yaml.dump(new_properties, default_flow_style=False))
+        yaml_dump(new_properties, outfile, default_flow_style=False)
     print('Converted to ' + filename_yaml)
 
     return filename_yaml
 
 
+def find_XML_files(inputs):
+    """Find ReSpecTh XML files from a list of files, directories, and globs.
+
+    Parameters
+    ----------
+    inputs : list of str
+        Filenames, directories (searched recursively for ``.xml`` files), or
+        glob patterns
+
+    Returns
+    -------
+    filenames : list of str
+        Sorted list of unique XML filenames
+
+    """
+    filenames = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for dirpath, dirnames, files in os.walk(item):
+                filenames.update(os.path.join(dirpath, f) for f in files
+                                 if f.lower().endswith('.xml')
+                                 )
+        elif os.path.isfile(item):
+            filenames.add(item)
+        else:
+            filenames.update(f for f in glob.glob(item) if os.path.isfile(f))
+    return sorted(filenames)
+
+
+def file_hash(filename):
+    """Return SHA-256 hash of the contents of a file.
+    """
+    sha = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _convert_worker(args):
+    """Convert one XML file, capturing any error.
+
+    Parameters
+    ----------
+    args : tuple
+        XML filename, output path, file author, and file author ORCID
+
+    Returns
+    -------
+    filename_xml : str
+        Name of XML file
+    filename_yaml : str
+        Name of converted ChemKED file, or ``None`` if conversion failed
+    error : str
+        Error message, or ``None`` if conversion succeeded
+
+    """
+    filename_xml, output, file_author, file_author_orcid = args
+    try:
+        filename_yaml = convert_XML_to_YAML(filename_xml, output, file_author,
+                                            file_author_orcid
+                                            )
+    except Exception as e:
+        return filename_xml, None, type(e).__name__ + ': ' + str(e)
+    return filename_xml, filename_yaml, None
+
+
+def convert_XML_files(inputs, output='', file_author='', file_author_orcid='',
+                      num_threads=None, manifest_file=None, force=False
+                      ):
+    """Convert many ReSpecTh XML files to ChemKED YAML files in parallel.
+
+    A manifest of the source file hashes converted is kept, and files whose
+    contents and conversion options are unchanged since the last run (and
+    whose output still exists) are skipped. Failed files are not recorded, so
+    they are tried again on the next run.
+
+    Parameters
+    ----------
+    inputs : list of str
+        XML filenames, directories, or glob patterns
+    output : str
+        Optional; output path for converted files.
+    file_author : str
+        Optional; name to override original file author
+    file_author_orcid : str
+        Optional; ORCID of file author
+    num_threads : int
+        Optional; number of processes to use. Defaults to number of CPUs.
+    manifest_file : str
+        Optional; manifest filename. Defaults to ``conversion-manifest.json``
+        in the output path.
+    force : bool
+        If ``True``, convert all files regardless of the manifest.
+
+    Returns
+    -------
+    summary : dict
+        Lists of ``converted`` and ``skipped`` files, and dict of ``failed``
+        files with error messages
+
+    """
+    if output and not os.path.isdir(output):
+        os.makedirs(output)
+    if manifest_file is None:
+        manifest_file = os.path.join(output, 'conversion-manifest.json')
+
+    manifest = {}
+    if os.path.isfile(manifest_file) and not force:
+        with open(manifest_file, 'r') as f:
+            manifest = json.load(f)
+
+    options = {'file-author': file_author,
+               'file-author-orcid': file_author_orcid
+               }
+    summary = {'converted': [], 'skipped': [], 'failed': {}}
+
+    hashes = {}
+    outputs = {}
+    jobs = []
+    for filename in find_XML_files(inputs):
+        source = os.path.abspath(filename)
+        filename_yaml = os.path.join(
+            output, os.path.splitext(os.path.basename(filename))[0] + '.yaml'
+            )
+
+        # Output filenames only depend on the XML file name, so files with the
+        # same name in different directories would overwrite each other.
+        if filename_yaml in outputs:
+            summary['failed'][filename] = ('Output ' + filename_yaml +
+                                           ' already used by ' +
+                                           outputs[filename_yaml]
+                                           )
+            continue
+        outputs[filename_yaml] = filename
+
+        try:
+            hashes[filename] = file_hash(filename)
+        except (OSError, IOError) as e:
+            summary['failed'][filename] = type(e).__name__ + ': ' + str(e)
+            continue
+
+        entry = manifest.get(source)
+        if (entry is not None and entry['hash'] == hashes[filename] and
+            entry['options'] == options and os.path.isfile(entry['output'])
+            ):
+            summary['skipped'].append(filename)
+        else:
+            manifest.pop(source, None)
+            jobs.append((filename, output, file_author, file_author_orcid))
+
+    if jobs:
+        num_threads = min(num_threads or multiprocessing.cpu_count(), len(jobs))
+        if num_threads > 1:
+            pool = multiprocessing.Pool(processes=num_threads)
+            chunksize = max(1, len(jobs) // (4 * num_threads))
+            results = pool.imap_unordered(_convert_worker, jobs, chunksize)
+        else:
+            pool = None
+            results = map(_convert_worker, jobs)
+
+        try:
+            for filename, filename_yaml, error in results:
+                if error is None:
+                    summary['converted'].append(filename)
+                    manifest[os.path.abspath(filename)] = {
+                        'hash': hashes[filename], 'options': options,
+                        'output': filename_yaml
+                        }
+                else:
+                    summary['failed'][filename] = error
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    summary['converted'].sort()
+
+    # Write manifest atomically, so an interrupted run does not lose it
+    temp_file = manifest_file + '.tmp'
+    with open(temp_file, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(temp_file, manifest_file)
+
+    return summary
+
+
 if __name__ == '__main__':
     parser = ArgumentParser(description='Convert ReSpecTh XML file to ChemKED '
                                         'YAML file.'
@@ -0,0 +1,460 @@
+"""Estimate the cost of a model evaluation before running it.
+
+Datasets and models are loaded, without simulating any cases, and the
+integrator steps, CPU time, size of HDF5 results files, and peak memory of
+worker processes estimated for each case. Estimates depend on the size of the
+model, the simulated time (horizon) of each case, and the number of steps
+forced by its volume history, through a calibration table of coefficients.
+The calibration table is fit to the telemetry of earlier runs (written by
+:func:`pyteck.eval_model.evaluate_model`), where available.
+"""
+
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import os
+import json
+import multiprocessing
+
+import numpy
+
+# Local imports
+from .utils import import_cantera, yaml_load
+from .results import STATUS_OK
+from .eval_model import (create_simulations, share_volume_histories,
+                         resolve_model_files, missing_bath_gas, telemetry_file,
+                         case_key
+                         )
+
+default_calibration = {'steps': [1200., 1.],
+                       'step time': [2.e-5, 1.e-6, 1.e-8],
+                       'file size': [2.e4, 1.],
+                       'peak memory': [1.1e8, 2.e4, 100.],
+                       }
+"""dict: coefficients of estimates, before calibration with telemetry.
+
+Steps are estimated from the end time over the maximum time step (if any),
+the CPU time of each step and peak memory from the numbers of reactions and
+(squared) species, and file size from the bytes of rows of results. See
+:func:`estimate_cases`.
+"""
+
+
+def steps_features(end_times, max_time_steps):
+    """Features of cases for estimating number of integrator steps.
+    """
+    forced_steps = numpy.zeros(len(end_times))
+    limited = ~numpy.isnan(max_time_steps)
+    forced_steps[limited] = end_times[limited] / max_time_steps[limited]
+    return numpy.column_stack([numpy.ones(len(end_times)), forced_steps])
+
+
+def model_features(species, reactions):
+    """Features of cases for estimating step time and memory from model size.
+    """
+    return numpy.column_stack([numpy.ones(len(species)), reactions,
+                               species**2
+                               ])
+
+
+def file_size_features(rows, species):
+    """Features of cases for estimating size of results files.
+    """
+    # time, temperature, pressure, volume, and mass fractions
+    return numpy.column_stack([numpy.ones(len(rows)),
+                               8. * rows * (species + 4)
+                               ])
+
+
+def fit_coefficients(features, values, default):
+    """Fit coefficients of estimate to measured values.
+
+    Coefficients are fit by least squares where the features of the
+    measurements can determine them all (and the fit ones are not negative);
+    otherwise, the default coefficients are scaled to match the measurements.
+
+    Parameters
+    ----------
+    features : numpy.ndarray
+        Features of each measurement, one row per measurement
+    values : numpy.ndarray
+        Measured values
+    default : list of float
+        Default coefficients
+
+    Returns
+    -------
+    coefficients : list of float
+        Calibrated coefficients
+
+    """
+    default = numpy.array(default, dtype=float)
+    if len(values) == 0:
+        return default.tolist()
+
+    if numpy.linalg.matrix_rank(features) == len(default):
+        coefficients = numpy.linalg.lstsq(features, values, rcond=None)[0]
+        if numpy.all(coefficients >= 0.):
+            return coefficients.tolist()
+
+    scale = numpy.median(values / features.dot(default))
+    return (scale * default).tolist()
+
+
+def read_telemetry(filenames):
+    """Read telemetry records of cases from earlier runs.
+
+    Parameters
+    ----------
+    filenames : list of str
+        Telemetry files, with one JSON record per line; missing files are
+        ignored
+
+    Returns
+    -------
+    records : list of dict
+        Telemetry records of cases
+
+    """
+    records = []
+    for filename in filenames:
+        if not os.path.isfile(filename):
+            continue
+        with open(filename, 'r') as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+
+def calibrate(records):
+    """Fit calibration table of estimates to telemetry of earlier cases.
+
+    Only cases that ran to completion are used.
+
+    Parameters
+    ----------
+    records : list of dict
+        Telemetry records, from :func:`read_telemetry`
+
+    Returns
+    -------
+    calibration : dict
+        Coefficients of estimates, as in :data:`default_calibration`
+
+    """
+    records = [record for record in records
+               if record.get('status') == STATUS_OK and record['steps'] > 0
+               ]
+
+    def column(name, subset=records):
+        return numpy.array([numpy.nan if record[name] is None else record[name]
+                            for record in subset
+                            ], dtype=float)
+
+    steps = column('steps')
+    species = column('species')
+    reactions = column('reactions')
+
+    calibration = {}
+    calibration['steps'] = fit_coefficients(
+        steps_features(column('end time'), column('max time step')), steps,
+        default_calibration['steps']
+        )
+    calibration['step time'] = fit_coefficients(
+        model_features(species, reactions), column('wall time') / steps,
+        default_calibration['step time']
+        )
+    calibration['file size'] = fit_coefficients(
+        file_size_features(column('rows'), species), column('file size'),
+        default_calibration['file size']
+        )
+
+    measured = [record for record in records
+                if record.get('peak memory') is not None
+                ]
+    calibration['peak memory'] = fit_coefficients(
+        model_features(column('species', measured), column('reactions', measured)),
+        column('peak memory', measured), default_calibration['peak memory']
+        )
+    return calibration
+
+
+def estimate_cases(species, reactions, end_times, max_time_steps,
+                   calibration=None, max_steps=None, max_rows=None):
+    """Estimate costs of simulation cases.
+
+    Parameters
+    ----------
+    species : numpy.ndarray
+        Number of species in model of each case
+    reactions : numpy.ndarray
+        Number of reactions in model of each case
+    end_times : numpy.ndarray
+        End time of each case, in s
+    max_time_steps : numpy.ndarray
+        Maximum time step of each case in s, or NaN if not limited
+    calibration : dict
+        Optional; coefficients of estimates. Defaults to
+        :data:`default_calibration`.
+    max_steps : int
+        Optional; maximum number of integrator steps of each case
+    max_rows : int
+        Optional; maximum number of rows of results saved for each case
+
+    Returns
+    -------
+    estimates : dict
+        Arrays of estimated ``steps``, ``cpu time`` (s), ``file size``
+        (bytes), and ``peak memory`` (bytes) of each case
+
+    """
+    if calibration is None:
+        calibration = default_calibration
+
+    steps = steps_features(end_times, max_time_steps).dot(calibration['steps'])
+    if max_steps is not None:
+        steps = numpy.minimum(steps, max_steps)
+    rows = steps + 1.
+    if max_rows is not None:
+        rows = numpy.minimum(rows, max_rows)
+        steps = numpy.minimum(steps, rows - 1.)
+
+    features = model_features(species, reactions)
+    return {'steps': steps,
+            'cpu time': steps * features.dot(calibration['step time']),
+            'file size': file_size_features(rows, species).dot(calibration['file size']),
+            'peak memory': features.dot(calibration['peak memory']),
+            }
+
+
+def plan_evaluation(model_name, dataset_file, spec_keys_file=None,
+                    data_path='data', model_path='models',
+                    model_variant_file=None, num_threads=None,
+                    telemetry_files=None, calibration=None, max_steps=None,
+                    max_rows=None, skip_validation=False, print_results=False,
+                    deduplicate=True
+                    ):
+    """Estimate the cost of evaluating a model, without running any cases.
+
+    Parameters
+    ----------
+    model_name : str
+        Chemical kinetic model filename
+    dataset_file : str
+        Name of file with list of data files
+    spec_keys_file : str
+        Optional; name of YAML file identifying important species. If given,
+        datasets that would be skipped (with Ar or He missing from the model)
+        are not counted.
+    data_path : str
+        Local path for data files. Optional; default = 'data'
+    model_path : str
+        Local path for model file. Optional; default = 'models'
+    model_variant_file : str
+        Name of YAML file identifying ranges of conditions for variants of the
+        kinetic model. Optional; default = ``None``
+    num_threads : int
+        Number of worker processes, for estimating wall time and total memory.
+        Optional; defaults to the available number of cores minus one.
+    telemetry_files : list of str
+        Optional; telemetry files of earlier runs, to calibrate estimates
+    calibration : dict
+        Optional; coefficients of estimates, rather than calibrating with
+        ``telemetry_files``
+    max_steps : int
+        Optional; maximum number of integrator steps of each case
+    max_rows : int
+        Optional; maximum number of rows of results saved for each case
+    skip_validation : bool
+        If ``True``, skips validation of ChemKED files.
+    print_results : bool
+        If ``True``, print plan to screen.
+    deduplicate : bool
+        If ``True`` (default), cases identical to others (see
+        :func:`pyteck.eval_model.case_key`) are not counted in estimates, as
+        in :func:`pyteck.eval_model.evaluate_model`.
+
+    Returns
+    -------
+    output : dict
+        Estimated costs of each dataset and overall, and calibration used
+
+    """
+    from pyked.chemked import ChemKED
+    ct = import_cantera()
+
+    species_key = None
+    if spec_keys_file:
+        with open(spec_keys_file, 'r') as f:
+            species_key = yaml_load(f)[model_name]
+
+    model_variant = None
+    if model_variant_file:
+        with open(model_variant_file, 'r') as f:
+            model_variant = yaml_load(f)
+
+    with open(dataset_file, 'r') as f:
+        dataset_list = f.read().splitlines()
+
+    if not num_threads:
+        num_threads = multiprocessing.cpu_count()-1 or 1
+
+    records = read_telemetry(telemetry_files or [])
+    if calibration is None:
+        calibration = calibrate(records)
+
+    # Size of each model (variant), loaded once
+    model_sizes = {}
+
+    output = {'model': model_name, 'datasets': [], 'calibration': calibration,
+              'telemetry records': len(records),
+              }
+    totals = {'cases': 0, 'unique cases': 0, 'cpu time': 0., 'file size': 0.,
+              'peak memory': 0.,
+              }
+    all_model_files = set()
+
+    # Longest experimental delay of cases simulated, by conditions
+    unique_cases = {}
+    for dataset in dataset_list:
+        with open(os.path.join(data_path, dataset), 'r') as f:
+            properties = ChemKED(dict_input=yaml_load(f),
+                                 skip_validation=skip_validation
+                                 )
+        simulations = create_simulations(dataset, properties)
+
+        dataset_meta = {'dataset': dataset, 'cases': len(simulations)}
+        if species_key is not None and missing_bath_gas(properties, species_key):
+            dataset_meta.update({'cases': 0, 'skipped': True})
+            output['datasets'].append(dataset_meta)
+            continue
+
+        volume_profiles = share_volume_histories(simulations)
+        model_files = resolve_model_files(model_name, model_path,
+                                          model_variant, simulations
+                                          )
+        for model_file in set(model_files) - set(model_sizes):
+            gas = ct.Solution(model_file, transport_model=None)
+            model_sizes[model_file] = (gas.n_species, gas.n_reactions)
+        all_model_files.update(model_files)
+
+        # Identical cases are simulated once, by the case with the longest
+        # end time, unless already simulated for an earlier dataset
+        unique = numpy.ones(len(simulations), dtype=bool)
+        if deduplicate:
+            representatives = {}
+            for idx, sim in enumerate(simulations):
+                key = case_key(sim, model_files[idx])
+                rep = representatives.get(key)
+                if rep is None or sim.ignition_delay > simulations[rep].ignition_delay:
+                    representatives[key] = idx
+            unique[:] = False
+            for key, rep in representatives.items():
+                if unique_cases.get(key, 0.) < simulations[rep].ignition_delay:
+                    unique[rep] = True
+                    unique_cases[key] = simulations[rep].ignition_delay
+
+        # Maximum time steps are limited by volume histories
+        max_time_steps = numpy.array(
+            [volume_profiles[sim.meta['volume-history']].min_time_step
+             if sim.meta.get('volume-history') in volume_profiles else numpy.nan
+             for sim in simulations
+             ])
+        estimates = estimate_cases(
+            numpy.array([model_sizes[name][0] for name in model_files], dtype=float),
+            numpy.array([model_sizes[name][1] for name in model_files], dtype=float),
+            100. * numpy.array([sim.ignition_delay for sim in simulations]),
+            max_time_steps, calibration, max_steps, max_rows
+            )
+        for name in ['steps', 'cpu time', 'file size']:
+            estimates[name] = estimates[name] * unique
+
+        dataset_meta.update({'unique cases': int(numpy.sum(unique)),
+                             'mechanisms': sorted(set(model_files)),
+                             'steps': float(numpy.sum(estimates['steps'])),
+                             'cpu hours': float(numpy.sum(estimates['cpu time']) / 3600.),
+                             'disk usage': float(numpy.sum(estimates['file size'])),
+                             'peak worker memory': float(numpy.max(estimates['peak memory'])),
+                             })
+        output['datasets'].append(dataset_meta)
+
+        totals['cases'] += len(simulations)
+        totals['unique cases'] += int(numpy.sum(unique))
+        totals['cpu time'] += numpy.sum(estimates['cpu time'])
+        totals['file size'] += numpy.sum(estimates['file size'])
+        totals['peak memory'] = max(totals['peak memory'],
+                                    numpy.max(estimates['peak memory'])
+                                    )
+
+    output.update({'cases': totals['cases'],
+                   'unique cases': totals['unique cases'],
+                   'deduplication ratio': float(totals['cases'] / totals['unique cases'])
+                                          if totals['unique cases'] else 1.,
+                   'mechanisms': len(all_model_files),
+                   'cpu hours': float(totals['cpu time'] / 3600.),
+                   'wall hours': float(totals['cpu time'] / 3600. / num_threads),
+                   'num threads': num_threads,
+                   'disk usage': float(totals['file size']),
+                   'peak worker memory': float(totals['peak memory']),
+                   'peak memory': float(num_threads * totals['peak memory']),
+                   })
+
+    if print_results:
+        print(format_plan(output))
+
+    return output
+
+
+def format_plan(output):
+    """Format estimated costs of each dataset and overall as text table.
+
+    Parameters
+    ----------
+    output : dict
+        Plan from :func:`plan_evaluation`
+
+    Returns
+    -------
+    text : str
+        Table of estimates
+
+    """
+    from .database import format_table
+
+    header = ['dataset', 'cases', 'unique', 'mechanisms', 'cpu hours',
+              'disk (MB)', 'peak memory (MB)'
+              ]
+    rows = []
+    for dataset in output['datasets']:
+        if dataset.get('skipped'):
+            rows.append([dataset['dataset'], 'skipped', '', '', '', '', ''])
+            continue
+        rows.append([dataset['dataset'], dataset['cases'],
+                     dataset['unique cases'], len(dataset['mechanisms']),
+                     dataset['cpu hours'],
+                     dataset['disk usage'] / 1.e6,
+                     dataset['peak worker memory'] / 1.e6
+                     ])
+    rows.append(['total', output['cases'], output['unique cases'],
+                 output['mechanisms'], output['cpu hours'], output['disk usage'] / 1.e6,
+                 output['peak worker memory'] / 1.e6
+                 ])
+
+    return '\n'.join([
+        format_table(header, rows), '',
+        'model: ' + output['model'],
+        'unique cases: {} of {} (deduplication ratio {:.3g})'.format(
+            output['unique cases'], output['cases'],
+            output['deduplication ratio']
+            ),
+        'estimated wall time with {} processes: {:.3g} hours'.format(
+            output['num threads'], output['wall hours']
+            ),
+        'estimated peak memory of all processes: {:.4g} MB'.format(
+            output['peak memory'] / 1.e6
+            ),
+        'calibrated with {} telemetry records'.format(
+            output['telemetry records']
+            ),
+        ])
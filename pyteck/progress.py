@@ -0,0 +1,278 @@
+"""Live progress of a model evaluation.
+
+The parent process already receives each finished case from the worker pool,
+so progress is tracked there, without any further communication with the
+workers: a status line shows the cases done and remaining in the current
+dataset, throughput, estimated time remaining, active workers, and failures.
+Optionally, each step is also written as a JSON-lines event stream, which
+external dashboards can follow.
+"""
+
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import sys
+import json
+import math
+import time
+
+# Local imports
+from .results import STATUS_TIMED_OUT, STATUS_FAILED
+
+
+def json_value(value):
+    """Replace non-finite numbers with ``None``, which JSON can represent.
+
+    Parameters
+    ----------
+    value
+        Value of event field, possibly a list or dict of values
+
+    Returns
+    -------
+    value
+        Value with ``NaN`` and infinite numbers replaced by ``None``
+
+    """
+    if isinstance(value, dict):
+        return {key: json_value(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_value(val) for val in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def format_duration(seconds):
+    """Format duration as hours, minutes, and seconds.
+
+    Parameters
+    ----------
+    seconds : float
+        Duration in seconds
+
+    Returns
+    -------
+    text : str
+        Duration as ``h:mm:ss``, or ``?`` if not known
+
+    """
+    if seconds is None:
+        return '?'
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '{:d}:{:02d}:{:02d}'.format(hours, minutes, seconds)
+
+
+class ProgressReporter(object):
+    """Status line and event stream of a model evaluation.
+
+    Parameters
+    ----------
+    num_datasets : int
+        Number of datasets in evaluation
+    stream : file
+        Optional; stream for status line (e.g., ``sys.stderr``). If not given,
+        no status line is shown.
+    events : str or file
+        Optional; filename (or ``-`` for standard output) or open file that
+        JSON-lines events are written to. Non-finite numbers are written as
+        ``null``.
+    interval : float
+        Optional; minimum time in seconds between updates of the status line.
+        Defaults to 0.5 s on a terminal, where the line is redrawn in place,
+        and 10 s otherwise.
+
+    """
+    def __init__(self, num_datasets, stream=None, events=None, interval=None):
+        self.num_datasets = num_datasets
+        self.stream = stream
+        self.tty = stream is not None and getattr(stream, 'isatty', lambda: False)()
+        if interval is None:
+            interval = 0.5 if self.tty else 10.
+        self.interval = interval
+
+        self.events = events
+        self.close_events = False
+        if events == '-':
+            self.events = sys.stdout
+        elif isinstance(events, str):
+            self.events = open(events, 'a')
+            self.close_events = True
+
+        self.start_time = time.time()
+        self.last_update = None
+        self.line_length = 0
+        self.total_done = 0
+        self.total_failed = 0
+
+        self.dataset = None
+        self.dataset_number = 0
+        self.num_cases = 0
+        self.done = 0
+        self.failed = 0
+        self.active = 0
+
+    def event(self, name, **fields):
+        """Write event to event stream, if any.
+
+        Parameters
+        ----------
+        name : str
+            Name of event
+        fields
+            Other fields of event
+
+        """
+        if self.events is None:
+            return
+        fields.update({'event': name, 'time': time.time()})
+        self.events.write(json.dumps(json_value(fields), sort_keys=True,
+                                     allow_nan=False
+                                     ) + '\n')
+        self.events.flush()
+
+    @property
+    def rate(self):
+        """Cases finished per second, over the run so far.
+        """
+        elapsed = time.time() - self.start_time
+        if not self.total_done or elapsed <= 0.:
+            return 0.
+        return self.total_done / elapsed
+
+    @property
+    def eta(self):
+        """Estimated time in seconds to finish the current dataset.
+        """
+        if not self.rate:
+            return None
+        return (self.num_cases - self.done) / self.rate
+
+    def status_line(self):
+        """Text of status line.
+        """
+        return ('{} ({}/{}): {} done, {} remaining | {:.2f} cases/s | '
+                'ETA {} | {} workers active | {} failed'.format(
+                    self.dataset, self.dataset_number, self.num_datasets,
+                    self.done, self.num_cases - self.done, self.rate,
+                    format_duration(self.eta), self.active, self.total_failed
+                    ))
+
+    def update(self, force=False):
+        """Show status line, at most once per interval unless forced.
+        """
+        if self.stream is None:
+            return
+        now = time.time()
+        if (not force and self.last_update is not None and
+                now - self.last_update < self.interval
+                ):
+            return
+        self.last_update = now
+
+        line = self.status_line()
+        if self.tty:
+            # Redraw in place, blanking any remains of a longer line
+            self.stream.write('\r' + line.ljust(self.line_length))
+            self.line_length = len(line)
+        else:
+            self.stream.write(line + '\n')
+        self.stream.flush()
+
+    def start_run(self, model):
+        """Record start of evaluation of a model.
+        """
+        self.event('run-start', model=model, datasets=self.num_datasets)
+
+    def start_dataset(self, dataset, num_cases):
+        """Record start of dataset.
+
+        Parameters
+        ----------
+        dataset : str
+            Name of dataset
+        num_cases : int
+            Number of cases to be run
+
+        """
+        self.dataset = dataset
+        self.dataset_number += 1
+        self.num_cases = num_cases
+        self.done = 0
+        self.failed = 0
+        self.active = 0
+        self.event('dataset-start', dataset=dataset, cases=num_cases)
+        self.update(force=True)
+
+    def case_finished(self, case, status, active=0, **fields):
+        """Record case finished, successfully or not.
+
+        Parameters
+        ----------
+        case : str
+            Case ID
+        status : str
+            Status of case (see :mod:`pyteck.results`)
+        active : int
+            Number of workers still running cases
+        fields
+            Other fields of event (e.g., telemetry of case)
+
+        """
+        self.done += 1
+        self.total_done += 1
+        self.active = active
+        if status in [STATUS_TIMED_OUT, STATUS_FAILED]:
+            self.failed += 1
+            self.total_failed += 1
+
+        fields.update({'dataset': self.dataset, 'case': case,
+                       'status': status, 'done': self.done,
+                       'remaining': self.num_cases - self.done,
+                       'rate': self.rate, 'eta': self.eta,
+                       'active workers': active, 'failures': self.total_failed,
+                       })
+        self.event('case', **fields)
+        self.update()
+
+    def finish_dataset(self, **fields):
+        """Record end of current dataset.
+
+        Parameters
+        ----------
+        fields
+            Other fields of event (e.g., error function)
+
+        """
+        self.active = 0
+        self.update(force=True)
+        if self.tty:
+            self.stream.write('\n')
+            self.line_length = 0
+        fields.update({'dataset': self.dataset, 'cases': self.num_cases,
+                       'failures': self.failed,
+                       })
+        self.event('dataset-end', **fields)
+
+    def finish_run(self, **fields):
+        """Record end of evaluation.
+
+        Parameters
+        ----------
+        fields
+            Other fields of event (e.g., overall error function)
+
+        """
+        fields.update({'cases': self.total_done, 'failures': self.total_failed,
+                       'elapsed': time.time() - self.start_time,
+                       })
+        self.event('run-end', **fields)
+
+    def close(self):
+        """Close event stream, if opened here.
+        """
+        if self.close_events:
+            self.events.close()
@@ -0,0 +1,234 @@
+"""Recompute model error metrics from stored results, without re-simulating.
+
+Simulated ignition delays are read from a results database (see
+:mod:`pyteck.database`), and the standard deviations, error functions, and
+deviation functions of each dataset recomputed, e.g., for a different list of
+datasets or minimum standard deviation. Only datasets without stored results
+are simulated.
+"""
+
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import os
+from os.path import splitext, basename
+import tempfile
+
+import numpy
+
+# Local imports
+from .database import ResultsDatabase
+from .results import STATUS_SKIPPED
+from .eval_model import (evaluate_model, estimate_std_dev,
+                         dataset_error_functions
+                         )
+
+
+def get_changing_values(temperatures, pressures):
+    """Identify variable changing across datapoints, from stored values.
+
+    Follows :func:`pyteck.eval_model.get_changing_variable`: if both vary, or
+    neither does, temperature is used.
+
+    Parameters
+    ----------
+    temperatures : numpy.ndarray
+        Temperatures of datapoints
+    pressures : numpy.ndarray
+        Pressures of datapoints
+
+    Returns
+    -------
+    variable : numpy.ndarray
+        Values of changing variable
+
+    """
+    temperature_changes = numpy.any(temperatures != temperatures[0])
+    pressure_changes = numpy.any(pressures != pressures[0])
+    if pressure_changes and temperature_changes:
+        print('Warning: multiple changing variables. Using temperature.')
+    if pressure_changes and not temperature_changes:
+        return pressures
+    return temperatures
+
+
+def score_datasets(model_name, dataset_list, stored_results, min_std_dev=None,
+                   print_results=False
+                   ):
+    """Calculate error metrics of datasets from stored results.
+
+    Parameters
+    ----------
+    model_name : str
+        Name of model
+    dataset_list : list of str
+        Names of datasets
+    stored_results : dict
+        Stored results of each dataset, from
+        :meth:`pyteck.database.ResultsDatabase.latest_results`
+    min_std_dev : float
+        Optional; minimum allowable standard deviation. Defaults to
+        :data:`pyteck.eval_model.min_deviation`.
+    print_results : bool
+        If ``True``, print results to screen.
+
+    Returns
+    -------
+    output : dict
+        Dictionary with error metrics of each dataset, and overall
+
+    """
+    output = {'model': model_name, 'datasets': []}
+    error_func_sets = numpy.zeros(len(dataset_list))
+    dev_func_sets = numpy.zeros(len(dataset_list))
+
+    for idx_set, dataset in enumerate(dataset_list):
+        results = stored_results[dataset]
+        ignition_delays_exp = results['experimental_delay']
+
+        variable = get_changing_values(results['temperature'],
+                                       results['pressure']
+                                       )
+        standard_dev = estimate_std_dev(variable,
+                                        numpy.log(ignition_delays_exp),
+                                        min_std_dev
+                                        )
+        dataset_meta = {'dataset': dataset, 'dataset_id': idx_set,
+                        'standard deviation': float(standard_dev)
+                        }
+
+        # As in evaluate_model, skipped datasets are left out of the error
+        # function, but count as zero deviation.
+        if numpy.all(results['status'] == STATUS_SKIPPED):
+            error_func_sets[idx_set] = numpy.nan
+            continue
+
+        error_func, dev_func = dataset_error_functions(
+            ignition_delays_exp, results['simulated_delay'], standard_dev
+            )
+        error_func_sets[idx_set] = error_func
+        dev_func_sets[idx_set] = dev_func
+        dataset_meta['error function'] = float(error_func)
+        dataset_meta['absolute deviation'] = float(dev_func)
+        output['datasets'].append(dataset_meta)
+
+        if print_results:
+            print(dataset + ': error function ' + repr(error_func) +
+                  ', absolute deviation ' + repr(dev_func)
+                  )
+
+    output['average error function'] = float(numpy.nanmean(error_func_sets))
+    output['error function standard deviation'] = float(
+        numpy.nanstd(error_func_sets)
+        )
+    output['average deviation function'] = float(numpy.nanmean(dev_func_sets))
+
+    if print_results:
+        print('overall error function: ' +
+              repr(output['average error function'])
+              )
+        print('error standard deviation: ' +
+              repr(output['error function standard deviation'])
+              )
+        print('absolute deviation function: ' +
+              repr(output['average deviation function'])
+              )
+
+    return output
+
+
+def rescore_model(model_name, dataset_file, results_database,
+                  min_std_dev=None, spec_keys_file=None, data_path='data',
+                  model_path='models', results_path='results',
+                  model_variant_file=None, num_threads=None,
+                  print_results=False, skip_validation=False
+                  ):
+    """Recompute error metrics of a model from results stored in a database.
+
+    Datasets without stored results for the model are first simulated with
+    :func:`pyteck.eval_model.evaluate_model`, adding their results to the
+    database as a new run. Its results file, covering only those datasets, is
+    written to ``<model>-missing-results.yaml`` in ``results_path``. Stored
+    results are only taken from complete runs, so datasets of an interrupted
+    run are simulated again.
+
+    Parameters
+    ----------
+    model_name : str
+        Chemical kinetic model filename
+    dataset_file : str
+        Name of file with list of data files
+    results_database : str
+        Name of SQLite results database
+    min_std_dev : float
+        Optional; minimum allowable standard deviation. Defaults to
+        :data:`pyteck.eval_model.min_deviation`.
+    spec_keys_file : str
+        Name of YAML file identifying important species. Only needed if
+        datasets need to be simulated.
+    data_path : str
+        Local path for data files. Optional; default = 'data'
+    model_path : str
+        Local path for model file. Optional; default = 'models'
+    results_path : str
+        Local path for creating results files. Optional; default = 'results'
+    model_variant_file : str
+        Name of YAML file identifying ranges of conditions for variants of the
+        kinetic model. Optional; default = ``None``
+    num_threads : int
+        Number of CPU threads to use for performing simulations in parallel.
+    print_results : bool
+        If ``True``, print results of the model evaluation to screen.
+    skip_validation : bool
+        If ``True``, skips validation of ChemKED files.
+
+    Returns
+    -------
+    output : dict
+        Dictionary with error metrics of each dataset, and overall
+
+    """
+    with open(dataset_file, 'r') as f:
+        dataset_list = f.read().splitlines()
+
+    with ResultsDatabase(results_database) as database:
+        stored_results = database.latest_results(model_name)
+
+    missing = [dataset for dataset in dataset_list
+               if dataset not in stored_results
+               ]
+    if missing:
+        if spec_keys_file is None:
+            raise ValueError('Species keys file needed to simulate datasets '
+                             'without stored results: ' + ', '.join(missing)
+                             )
+        if print_results:
+            print('Simulating ' + str(len(missing)) + ' datasets without '
+                  'stored results'
+                  )
+
+        fd, missing_file = tempfile.mkstemp(suffix='.txt', text=True)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write('\n'.join(missing) + '\n')
+            evaluate_model(model_name, spec_keys_file, missing_file,
+                           data_path, model_path, results_path,
+                           model_variant_file, num_threads,
+                           skip_validation=skip_validation,
+                           results_database=results_database,
+                           results_file=os.path.join(
+                               results_path, splitext(basename(model_name))[0] +
+                               '-missing-results.yaml'
+                               )
+                           )
+        finally:
+            os.remove(missing_file)
+
+        with ResultsDatabase(results_database) as database:
+            stored_results = database.latest_results(model_name)
+
+    return score_datasets(model_name, dataset_list, stored_results,
+                          min_std_dev, print_results
+                          )
@@ -0,0 +1,350 @@
+"""Tabular export of model evaluation results.
+
+Results are written with one row per (model, dataset, datapoint) and numeric
+columns in SI units, to Parquet or Arrow IPC files when PyArrow is installed,
+or to CSV files otherwise. Rows are written incrementally as datasets finish.
+"""
+
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import os
+import csv
+
+import numpy
+
+result_columns = [('model', 'string'),
+                  ('dataset', 'string'),
+                  ('dataset_id', 'int64'),
+                  ('datapoint', 'int64'),
+                  ('temperature', 'float64'),
+                  ('pressure', 'float64'),
+                  ('experimental_delay', 'float64'),
+                  ('simulated_delay', 'float64'),
+                  ('first_stage_delay', 'float64'),
+                  ('standard_deviation', 'float64'),
+                  ('deviation', 'float64'),
+                  ('error', 'float64'),
+                  ('status', 'string'),
+                  ]
+"""list: names and types of results table columns.
+
+Temperature is in kelvin, pressure in pascal, and ignition delays in seconds.
+``deviation`` is the datapoint's contribution to the absolute deviation
+function, and ``error`` its contribution to the error function.
+"""
+
+STATUS_OK = 'ok'
+"""str: simulation finished and ignition was detected"""
+STATUS_NO_IGNITION = 'no-ignition'
+"""str: simulation finished, but no ignition was detected"""
+STATUS_SKIPPED = 'skipped'
+"""str: dataset not simulated (e.g., species missing from model)"""
+STATUS_TIMED_OUT = 'timed-out'
+"""str: simulation stopped at a limit on wall time, steps, or rows"""
+STATUS_FAILED = 'failed'
+"""str: simulation raised an error, including on every retry"""
+
+
+def dataset_results(model_name, dataset, dataset_id, temperatures, pressures,
+                    exp_delays, sim_delays=None, first_stage_delays=None,
+                    standard_dev=numpy.nan, status=None, datapoint_ids=None
+                    ):
+    """Build results table columns for the datapoints of a dataset.
+
+    Parameters
+    ----------
+    model_name : str
+        Name of model
+    dataset : str
+        Name of dataset
+    dataset_id : int
+        Index of dataset in list of datasets
+    temperatures : array_like of float
+        Initial temperatures, in K
+    pressures : array_like of float
+        Initial pressures, in Pa
+    exp_delays : array_like of float
+        Experimental ignition delays, in s
+    sim_delays : array_like of float
+        Optional; simulated ignition delays, in s. A value of zero means no
+        ignition was detected. If not given, the dataset was not simulated.
+    first_stage_delays : array_like of float
+        Optional; simulated first-stage ignition delays, in s
+    standard_dev : float
+        Standard deviation of the (logarithm of) experimental ignition delays
+    status : str
+        Optional; status applied to all datapoints. By default, determined
+        from the simulated ignition delays.
+    datapoint_ids : array_like of int
+        Optional; indices of datapoints in dataset. By default, the values
+        are taken to be all datapoints, in order.
+
+    Returns
+    -------
+    columns : dict
+        Dictionary of column name to list or array of values
+
+    """
+    exp_delays = numpy.asarray(exp_delays, dtype=float)
+    num = len(exp_delays)
+    if sim_delays is None:
+        sim_delays = numpy.full(num, numpy.nan)
+        if status is None:
+            status = STATUS_SKIPPED
+    sim_delays = numpy.asarray(sim_delays, dtype=float)
+    if first_stage_delays is None:
+        first_stage_delays = numpy.full(num, numpy.nan)
+    if datapoint_ids is None:
+        datapoint_ids = numpy.arange(num)
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        deviation = (numpy.log(sim_delays) - numpy.log(exp_delays)) / standard_dev
+    error = numpy.power(deviation, 2)
+
+    if status is None:
+        statuses = [STATUS_OK if delay > 0. else STATUS_NO_IGNITION
+                    for delay in sim_delays
+                    ]
+    else:
+        statuses = [status] * num
+
+    return {'model': [model_name] * num,
+            'dataset': [dataset] * num,
+            'dataset_id': numpy.full(num, dataset_id, dtype=numpy.int64),
+            'datapoint': numpy.asarray(datapoint_ids, dtype=numpy.int64),
+            'temperature': numpy.asarray(temperatures, dtype=float),
+            'pressure': numpy.asarray(pressures, dtype=float),
+            'experimental_delay': exp_delays,
+            'simulated_delay': sim_delays,
+            'first_stage_delay': numpy.asarray(first_stage_delays,
+                                               dtype=float
+                                               ),
+            'standard_deviation': numpy.full(num, standard_dev, dtype=float),
+            'deviation': deviation,
+            'error': error,
+            'status': statuses,
+            }
+
+
+class ResultsWriter(object):
+    """Base class for incrementally writing results tables.
+
+    Columns given to :meth:`write` are buffered, and written once at least
+    ``batch_size`` rows have accumulated, or when the writer is closed.
+
+    Parameters
+    ----------
+    filename : str
+        Name of results file
+    batch_size : int
+        Number of rows to buffer before writing
+
+    """
+    def __init__(self, filename, batch_size=1):
+        self.filename = filename
+        self.batch_size = batch_size
+        self._buffer = []
+        self._buffered_rows = 0
+
+    def write(self, columns):
+        """Add rows to results table.
+
+        Parameters
+        ----------
+        columns : dict
+            Dictionary of column name to values, as from
+            :func:`dataset_results`
+
+        """
+        num = len(columns['dataset'])
+        if num == 0:
+            return
+        self._buffer.append(columns)
+        self._buffered_rows += num
+        if self._buffered_rows >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write any buffered rows.
+        """
+        if not self._buffer:
+            return
+        columns = {}
+        for name, _ in result_columns:
+            columns[name] = numpy.concatenate(
+                [numpy.asarray(batch[name], dtype=object if
+                               isinstance(batch[name], list) else None
+                               )
+                 for batch in self._buffer
+                 ])
+        self._write_batch(columns)
+        self._buffer = []
+        self._buffered_rows = 0
+
+    def close(self):
+        """Write any buffered rows and close file.
+        """
+        self.flush()
+        self._close()
+
+    def _write_batch(self, columns):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CSVResultsWriter(ResultsWriter):
+    """Write results table to CSV file, with header row.
+    """
+    def __init__(self, filename, batch_size=1):
+        super(CSVResultsWriter, self).__init__(filename, batch_size)
+        self._file = open(filename, 'w')
+        self._writer = csv.writer(self._file, lineterminator='\n')
+        self._writer.writerow([name for name, _ in result_columns])
+
+    def _write_batch(self, columns):
+        rows = zip(*[columns[name].tolist() for name, _ in result_columns])
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class ArrowResultsWriter(ResultsWriter):
+    """Write results table to Parquet or Arrow IPC file, using PyArrow.
+
+    Parameters
+    ----------
+    filename : str
+        Name of results file
+    file_format : {'parquet', 'arrow'}
+        Format of results file
+    batch_size : int
+        Number of rows to buffer before writing a row group/record batch
+
+    """
+    def __init__(self, filename, file_format='parquet', batch_size=10000):
+        super(ArrowResultsWriter, self).__init__(filename, batch_size)
+        import pyarrow
+        self._pyarrow = pyarrow
+        self.schema = pyarrow.schema([(name, getattr(pyarrow, col_type)())
+                                      for name, col_type in result_columns
+                                      ])
+        if file_format == 'parquet':
+            import pyarrow.parquet
+            self._writer = pyarrow.parquet.ParquetWriter(filename, self.schema)
+        elif file_format == 'arrow':
+            import pyarrow.ipc
+            self._writer = pyarrow.ipc.new_file(filename, self.schema)
+        else:
+            raise ValueError('Unknown results file format: ' + file_format)
+
+    def _write_batch(self, columns):
+        table = self._pyarrow.Table.from_pydict(
+            {name: columns[name] for name, _ in result_columns},
+            schema=self.schema
+            )
+        self._writer.write_table(table)
+
+    def _close(self):
+        self._writer.close()
+
+
+arrow_formats = {'.parquet': 'parquet', '.pq': 'parquet',
+                 '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow',
+                 }
+"""dict: file extensions written with PyArrow, and their formats"""
+
+
+def open_results_writer(filename):
+    """Open writer for results table, with format based on file extension.
+
+    Parquet (``.parquet``) and Arrow IPC (``.arrow``, ``.feather``) files
+    need PyArrow; if it is not installed, a CSV file with the same base name
+    is written instead.
+
+    Parameters
+    ----------
+    filename : str
+        Name of results file
+
+    Returns
+    -------
+    writer : ResultsWriter
+        Writer for results table
+
+    """
+    base, ext = os.path.splitext(filename)
+    ext = ext.lower()
+    if ext in arrow_formats:
+        try:
+            import pyarrow
+        except ImportError:
+            filename = base + '.csv'
+            print('Warning: PyArrow not installed; writing results table to ' +
+                  filename
+                  )
+        else:
+            return ArrowResultsWriter(filename, arrow_formats[ext])
+    elif ext != '.csv':
+        raise ValueError('Results table must be Parquet, Arrow, or CSV file, '
+                         'not ' + filename
+                         )
+    return CSVResultsWriter(filename)
+
+
+def read_results_table(filename):
+    """Read results table written by :func:`open_results_writer`.
+
+    Parameters
+    ----------
+    filename : str
+        Name of Parquet, Arrow IPC, or CSV results file
+
+    Returns
+    -------
+    columns : dict
+        Dictionary of column name to ``numpy.ndarray`` of values
+
+    """
+    base, ext = os.path.splitext(filename)
+    ext = ext.lower()
+    if arrow_formats.get(ext) == 'parquet':
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(filename)
+    elif arrow_formats.get(ext) == 'arrow':
+        import pyarrow.ipc
+        with pyarrow.OSFile(filename, 'rb') as source:
+            table = pyarrow.ipc.open_file(source).read_all()
+    else:
+        table = None
+
+    if table is not None:
+        return {name: table.column(name).to_numpy(zero_copy_only=False)
+                for name, _ in result_columns
+                }
+
+    columns = {name: [] for name, _ in result_columns}
+    with open(filename, 'r') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            for name, _ in result_columns:
+                columns[name].append(row[name])
+
+    for name, col_type in result_columns:
+        if col_type == 'string':
+            columns[name] = numpy.array(columns[name], dtype=object)
+        else:
+            columns[name] = numpy.array(columns[name], dtype=col_type)
+    return columns
@@ -9,26 +9,34 @@ from __future__ import division
 
 # Standard libraries
 import os
+import time
+import hashlib
 from collections import namedtuple
 import numpy
 
-# Related modules
-try:
-    import cantera as ct
-    ct.suppress_thermo_warnings()
-except ImportError:
-    print("Error: Cantera must be installed.")
-    raise
-
-try:
-    import tables
-except ImportError:
-    print('PyTables must be installed')
-    raise
-
 # Local imports
-from .utils import units
+from .utils import units, import_cantera, import_tables
 from .detect_peaks import detect_peaks
+from .mechanisms import find_species_target
+
+volume_profiles = {}
+"""dict: shared :class:`VolumeProfile` objects, keyed by volume history hash"""
+
+_volume_history_cache = {}
+"""dict: pressure-rise volume histories, keyed by conditions"""
+
+read_buffer_size = 2**24
+"""int: maximum bytes of integration results read from file at once"""
+
+default_ignition_definitions = [{'target': 'pressure', 'type': 'd/dt max'},
+                                {'target': 'temperature', 'type': 'd/dt max'},
+                                {'target': 'OH', 'type': 'max'},
+                                {'target': 'OH*', 'type': 'max'},
+                                {'target': 'CH', 'type': 'max'},
+                                {'target': 'CH*', 'type': 'max'},
+                                ]
+"""list: ignition definitions evaluated for each case besides that of its dataset"""
+
 
 def first_derivative(x, y):
     """Evaluates first derivative using second-order finite differences.
@@ -46,6 +54,129 @@ def first_derivative(x, y):
     return numpy.gradient(y, x, edge_order=2)
 
 
+def read_column(table, name, index=None, buffer_size=None):
+    """Reads one column of a results table, in chunks of rows.
+
+    Only ``buffer_size`` bytes of rows are held in memory at once, so that
+    taking, e.g., the mass fraction of one species does not load the mass
+    fractions of all species at all times.
+
+    :param table: Table of integration results
+    :type table: tables.Table
+    :param str name: Name of column
+    :param index: Optional; index (or list of indices) of elements of
+        multidimensional column
+    :type index: int or list
+    :param int buffer_size: Optional; maximum bytes of rows read at once
+        (default :data:`read_buffer_size`)
+    :return: Values of column, with one column per index if a list is given
+    :rtype: numpy.ndarray
+    """
+    if buffer_size is None:
+        buffer_size = read_buffer_size
+
+    num_rows = table.nrows
+    chunk_rows = max(1, buffer_size // table.rowsize)
+    # Align with HDF5 chunks, so that each is read only once
+    chunk_rows = max(table.chunkshape[0],
+                     chunk_rows - chunk_rows % table.chunkshape[0]
+                     )
+
+    shape = (num_rows,)
+    if isinstance(index, list):
+        shape = (num_rows, len(index))
+    values = numpy.empty(shape, dtype=table.coldtypes[name].base)
+    for start in range(0, num_rows, chunk_rows):
+        stop = min(start + chunk_rows, num_rows)
+        chunk = table.read(start, stop, field=name)
+        if index is not None:
+            chunk = chunk[:, index]
+        values[start:stop] = chunk
+    return values
+
+
+def ignition_definition_name(definition):
+    """Name of ignition definition, e.g. ``'OH* max'``.
+
+    :param dict definition: Ignition definition, with ``target`` and ``type``
+        as in ChemKED ``ignition-type``
+    :return: Name of definition
+    :rtype: str
+    """
+    return definition['target'] + ' ' + definition['type']
+
+
+def parse_ignition_definition(text):
+    """Parse ignition definition given as ``target:type``.
+
+    :param str text: Ignition target and type, e.g. ``'OH*:max'``
+    :return: Ignition definition, with ``target`` and ``type``
+    :rtype: dict
+    """
+    target, sep, ignition_type = text.partition(':')
+    if not sep or not target or ignition_type not in ['max', 'd/dt max', '1/2 max']:
+        raise ValueError('Ignition definition ' + text + ' not of the form '
+                         'target:type, with type max, d/dt max, or 1/2 max'
+                         )
+    return {'target': target, 'type': ignition_type}
+
+
+def find_ignition_delays(time, target, ignition_type, compression_time=None):
+    """Find ignition delays from a trajectory of an ignition target.
+
+    :param numpy.ndarray time: Times of trajectory
+    :param numpy.ndarray target: Values of ignition target (e.g., pressure)
+    :param str ignition_type: Type of ignition definition, one of
+        ``'max'``, ``'d/dt max'``, or ``'1/2 max'``
+    :param float compression_time: Optional; compression time of RCM case,
+        subtracted from delays
+    :return: Ignition delays in order, the last being the overall delay
+    :rtype: numpy.ndarray
+    """
+    # Analysis for ignition depends on type specified
+    if ignition_type in ['max', 'd/dt max']:
+        if ignition_type == 'd/dt max':
+            # Evaluate derivative
+            target = first_derivative(time, target)
+
+        # Get indices of peaks
+        ind = detect_peaks(target)
+
+        # Fall back on derivative if max value doesn't work.
+        if len(ind) == 0 and ignition_type == 'max':
+            target = first_derivative(time, target)
+            ind = detect_peaks(target)
+
+        # Get index of largest peak (overall ignition delay)
+        max_ind = ind[numpy.argmax(target[ind])]
+
+        # Will need to subtract compression time for RCM
+        time_comp = 0.0
+        if compression_time is not None:
+            time_comp = compression_time
+
+        ign_delays = time[ind[numpy.where((time[ind[ind <= max_ind]] - time_comp)
+                                          > 0.
+                                         )]] - time_comp
+    elif ignition_type == '1/2 max':
+        # maximum value, and associated index
+        max_val = numpy.max(target)
+        ind = detect_peaks(target)
+        max_ind = ind[numpy.argmax(target[ind])]
+
+        # TODO: interpolate for actual half-max value
+        # Find index associated with the 1/2 max value, but only consider
+        # points before the peak
+        half_idx = (numpy.abs(target[0:max_ind] - 0.5 * max_val)).argmin()
+        ign_delays = numpy.array([time[half_idx]])
+
+        # TODO: detect two-stage ignition when 1/2 max type?
+    else:
+        raise ValueError('Ignition type ' + str(ignition_type) + ' not supported')
+
+    return ign_delays
+
+
 def sample_rising_pressure(time_end, init_pres, freq, pressure_rise_rate):
     """Samples pressure for particular frequency assuming linear rise.
 
@@ -61,36 +192,187 @@ def sample_rising_pressure(time_end, init_pres, freq, pressure_rise_rate):
     return [times, pressures]
 
 
-def create_volume_history(mech, temp, pres, reactants, pres_rise, time_end):
+def volume_history_cache_key(mech, temp, pres, reactants, pres_rise,
+                             time_end, rtol
+                             ):
+    """Creates key identifying a pressure-rise volume history.
+
+    :param str mech: Cantera-format mechanism file
+    :param float temp: Initial temperature in K
+    :param float pres: Initial pressure in Pa
+    :param reactants: Reactants composition in mole fraction
+    :type reactants: str or numpy.ndarray
+    :param float pres_rise: Pressure rise rate, in s^-1
+    :param float time_end: End time of simulation in s
+    :param float rtol: Relative tolerance of volume sampling
+    :return: Hexadecimal digest identifying the volume history
+    :rtype: str
+    """
+    if os.path.isfile(mech):
+        mech = os.path.abspath(mech)
+    if isinstance(reactants, str):
+        reactants = reactants.encode('utf-8')
+    else:
+        reactants = numpy.asarray(reactants, dtype=numpy.float64).tobytes()
+
+    digest = hashlib.sha1(repr((mech, float(temp), float(pres),
+                                float(pres_rise), float(time_end), float(rtol)
+                                )).encode('utf-8')
+                          )
+    digest.update(reactants)
+    return digest.hexdigest()
+
+
+def create_volume_history(mech, temp, pres, reactants, pres_rise, time_end,
+                          rtol=1.e-6, cache_path=None
+                          ):
     """Constructs a volume profile based on intiial conditions and pressure rise.
 
+    Volumes are sampled adaptively: starting from a coarse uniform grid,
+    intervals are bisected until linear interpolation between neighboring
+    samples reproduces the volume within ``rtol``. Spacing never goes below
+    that of uniform sampling at 20 kHz. Results are cached in memory, and
+    also in ``cache_path`` if given, so that cases sharing the same mixture,
+    conditions, and pressure rise only calculate the profile once.
+
+    :param str mech: Cantera-format mechanism file
+    :param float temp: Initial temperature in K
+    :param float pres: Initial pressure in Pa
+    :param str reactants: Reactants composition in mole fraction
+    :param float pres_rise: Pressure rise rate, in s^-1
+    :param float time_end: End time of simulation in s
+    :param float rtol: Relative tolerance of volume sampling
+    :param str cache_path: Optional directory for cached volume histories
+    :return: List of times and volumes
+    :rtype: list of numpy.ndarray
+    """
+    key = volume_history_cache_key(mech, temp, pres, reactants,
+                                   pres_rise, time_end, rtol
+                                   )
+    cache_file = None
+    if cache_path:
+        cache_file = os.path.join(cache_path, key + '.npz')
+
+    if key in _volume_history_cache:
+        times, volumes = _volume_history_cache[key]
+    elif cache_file is not None and os.path.isfile(cache_file):
+        with numpy.load(cache_file) as data:
+            times, volumes = data['times'], data['volumes']
+    else:
+        times, volumes = sample_volume_history(mech, temp, pres, reactants,
+                                               pres_rise, time_end, rtol
+                                               )
+
+    times.flags.writeable = False
+    volumes.flags.writeable = False
+    _volume_history_cache[key] = (times, volumes)
+
+    if cache_file is not None and not os.path.isfile(cache_file):
+        if not os.path.isdir(cache_path):
+            os.makedirs(cache_path, exist_ok=True)
+        # Write to temporary file first, in case other processes are reading
+        temp_file = cache_file + '.{}.tmp'.format(os.getpid())
+        with open(temp_file, 'wb') as f:
+            numpy.savez(f, times=times, volumes=volumes)
+        os.replace(temp_file, cache_file)
+
+    return [times, volumes]
+
+
+def sample_volume_history(mech, temp, pres, reactants, pres_rise, time_end,
+                          rtol
+                          ):
+    """Adaptively samples isentropic volume under linearly rising pressure.
+
     :param str mech: Cantera-format mechanism file
     :param float temp: Initial temperature in K
     :param float pres: Initial pressure in Pa
     :param str reactants: Reactants composition in mole fraction
     :param float pres_rise: Pressure rise rate, in s^-1
     :param float time_end: End time of simulation in s
+    :param float rtol: Relative tolerance of linearly interpolated volume
     :return: List of times and volumes
     :rtype: list of numpy.ndarray
     """
-    gas = ct.Solution(mech)
+    ct = import_cantera()
+    gas = ct.Solution(mech, transport_model=None)
     gas.TPX = temp, pres, reactants
     initial_entropy = gas.entropy_mass
     initial_density = gas.density
 
-    # Sample pressure at 20 kHz
-    freq = 2.0e4
-    [times, pressures] = sample_rising_pressure(time_end, pres, freq, pres_rise)
-
-    # Calculate volume profile based on pressure
-    volumes = numpy.zeros((len(pressures)))
-    for i, p in enumerate(pressures):
-        gas.SP = initial_entropy, p
-        volumes[i] = initial_density / gas.density
+    def volume(time):
+        """Isentropic volume at the linearly rising pressure at ``time``."""
+        gas.SP = initial_entropy, pres * (pres_rise * time + 1.0)
+        return initial_density / gas.density
+
+    # Minimum spacing is that of sampling at 20 kHz
+    min_step = 1.0 / 2.0e4
+
+    # Initial coarse samples
+    times = numpy.linspace(0.0, time_end, 17)
+    volumes = numpy.array([volume(t) for t in times])
+
+    # Bisect intervals until linear interpolation is accurate
+    refine = numpy.ones(times.size - 1, dtype=bool)
+    while numpy.any(refine):
+        refine &= numpy.diff(times) > 2.0 * min_step
+        idx, = numpy.where(refine)
+        if idx.size == 0:
+            break
+
+        mid_times = 0.5 * (times[idx] + times[idx + 1])
+        mid_volumes = numpy.array([volume(t) for t in mid_times])
+        error = numpy.abs(mid_volumes - 0.5 * (volumes[idx] + volumes[idx + 1]))
+
+        # Insert new samples, then flag both halves of inaccurate intervals
+        # for further refinement
+        inaccurate = error > rtol * numpy.abs(mid_volumes)
+        times = numpy.insert(times, idx + 1, mid_times)
+        volumes = numpy.insert(volumes, idx + 1, mid_volumes)
+        new_refine = numpy.zeros(times.size - 1, dtype=bool)
+        new_positions = idx + numpy.arange(idx.size)
+        new_refine[new_positions] = inaccurate
+        new_refine[new_positions + 1] = inaccurate
+        refine = new_refine
 
     return [times, volumes]
 
 
+def volume_history_key(volume_history):
+    """Hashes the content of a volume history.
+
+    Volumes are normalized by the initial volume, consistent with
+    :class:`VolumeProfile`, so histories that produce the same wall velocity
+    share the same key.
+
+    :param VolumeHistory volume_history: time and volume history
+    :return: Hexadecimal digest of the time and normalized volume values
+    :rtype: str
+    """
+    times = numpy.ascontiguousarray(volume_history.time.to('second').magnitude,
+                                    dtype=numpy.float64
+                                    )
+    volumes = numpy.ascontiguousarray(volume_history.volume.magnitude /
+                                      volume_history.volume.magnitude[0],
+                                      dtype=numpy.float64
+                                      )
+    digest = hashlib.sha1(times.tobytes())
+    digest.update(volumes.tobytes())
+    return digest.hexdigest()
+
+
+def register_volume_profiles(profiles):
+    """Makes shared volume profiles available to this process.
+
+    Used as the initializer of worker processes, so that each shared
+    :class:`VolumeProfile` is sent once per worker rather than once per case.
+
+    :param dict profiles: :class:`VolumeProfile` objects keyed by
+        :func:`volume_history_key`
+    """
+    volume_profiles.update(profiles)
+
+
 class VolumeProfile(object):
     """Set the velocity of reactor moving wall via specified volume profile.
 
@@ -118,7 +400,9 @@ class VolumeProfile(object):
         # The time and volume are each stored as a ``numpy.array`` in the
         # properties dictionary. The volume is normalized by the first volume
         # element so that a unit area can be used to calculate the velocity.
-        self.times = volume_history.time.magnitude
+        self.times = numpy.array(volume_history.time.to('second').magnitude,
+                                 dtype=numpy.float64
+                                 )
         volumes = (volume_history.volume.magnitude /
                    volume_history.volume.magnitude[0]
                    )
@@ -126,6 +410,14 @@ class VolumeProfile(object):
         # The velocity is calculated by the second-order central differences.
         self.velocity = first_derivative(self.times, volumes)
 
+        # Minimum difference between volume profile times, used to limit
+        # the integrator time step
+        self.min_time_step = numpy.min(numpy.diff(self.times))
+
+        # Profiles may be shared between cases, so guard against changes
+        self.times.flags.writeable = False
+        self.velocity.flags.writeable = False
+
     def __call__(self, time):
         """Return (interpolated) velocity when called during a time step.
 
@@ -135,6 +427,33 @@ class VolumeProfile(object):
         """
         return numpy.interp(time, self.times, self.velocity, left=0., right=0.)
 
+    def as_func1(self):
+        """Return velocity profile as a Cantera-native tabulated function.
+
+        A native function avoids calling back into Python on every evaluation
+        by the integrator. Points are added just outside the time range
+        (within a relative distance of 1e-10) so that the velocity is zero
+        there, consistent with :meth:`__call__`. Falls back on the profile
+        itself for versions of Cantera without tabulated functions.
+
+        :return: Velocity function of time
+        :rtype: cantera.Func1 or VolumeProfile
+        """
+        ct = import_cantera()
+        tabulated = getattr(ct, 'Tabulated1', None)
+        if tabulated is None:
+            tabulated = getattr(ct, 'TabulatedFunction', None)
+        if tabulated is None:
+            return self
+
+        offset = 1.e-10 * (self.times[-1] - self.times[0])
+        times = numpy.concatenate(([self.times[0] - offset],
+                                   self.times,
+                                   [self.times[-1] + offset]
+                                   ))
+        velocity = numpy.concatenate(([0.], self.velocity, [0.]))
+        return tabulated(times, velocity)
+
 
 class PressureRiseProfile(VolumeProfile):
     r"""Set the velocity of reactor moving wall via specified pressure rise.
@@ -165,7 +484,7 @@ class PressureRiseProfile(VolumeProfile):
     """
 
     def __init__(self, mech_filename, initial_temp, initial_pres,
-                 reactants, pressure_rise, time_end
+                 reactants, pressure_rise, time_end, cache_path=None
                  ):
         """Set the initial values of properties needed for velocity.
 
@@ -175,17 +494,68 @@ class PressureRiseProfile(VolumeProfile):
         :param str reactants: Reactants composition in mole fraction
         :param float pres_rise: Pressure rise rate in s^-1
         :param float time_end: End time of simulation in s
+        :param str cache_path: Optional directory for cached volume histories
         """
 
         [self.times, volumes] = create_volume_history(
                     mech_filename, initial_temp, initial_pres,
-                    reactants, pressure_rise, time_end
+                    reactants, pressure_rise, time_end, cache_path=cache_path
                     )
 
         # Calculate velocity by second-order finite difference
         self.velocity = first_derivative(self.times, volumes)
 
 
+class CaseSpec(object):
+    """Compact description of a simulation case, sent to worker processes.
+
+    Holds initial conditions as floats and the composition as arrays of
+    species indices and amounts, with species names, the species key, and
+    model files shared with each worker once. A volume history is referred
+    to by its key (see :func:`register_volume_profiles`). A case spec also
+    provides the attributes of :class:`pyked.chemked.DataPoint` used by
+    :class:`Simulation`, so that it can stand in for the datapoint.
+    """
+    __slots__ = ('case_id', 'data_file', 'kind', 'apparatus', 'temperature',
+                 'pressure', 'ignition_delay', 'pressure_rise',
+                 'compression_time', 'species', 'amounts', 'composition_type',
+                 'ignition_type', 'ignition_target', 'volume_history_key',
+                 'model_index', 'solver_settings',
+                 )
+
+    # Volume histories are only shared by key
+    volume_history = None
+
+    def __init__(self, sim, species_index, model_index=0, solver_settings=None):
+        """Create compact description of simulation case.
+
+        :param Simulation sim: Simulation case
+        :param dict species_index: Index of each species name in shared list
+        :param int model_index: Index of model file in shared list
+        :param dict solver_settings: Optional; settings passed to
+            :meth:`Simulation.setup_case`
+        """
+        self.case_id = sim.meta['id']
+        self.data_file = sim.meta.get('data-file')
+        self.kind = sim.kind
+        self.apparatus = sim.apparatus
+        self.temperature = sim.temperature
+        self.pressure = sim.pressure
+        self.ignition_delay = sim.ignition_delay
+        self.pressure_rise = sim.pressure_rise
+        self.compression_time = sim.compression_time
+        self.species = numpy.array([species_index[name]
+                                    for name, _ in sim.composition
+                                    ], dtype=numpy.int32)
+        self.amounts = numpy.array([amount for _, amount in sim.composition])
+        self.composition_type = sim.properties.composition_type
+        self.ignition_type = dict(sim.properties.ignition_type)
+        self.ignition_target = None
+        self.volume_history_key = sim.meta.get('volume-history')
+        self.model_index = model_index
+        self.solver_settings = solver_settings or {}
+
+
 class Simulation(object):
     """Class for ignition delay simulations."""
 
@@ -206,63 +576,146 @@ class Simulation(object):
         self.meta = meta
         self.properties = properties
 
-    def setup_case(self, model_file, species_key, path=''):
+        # Numerical values in SI units, converted once here so that setting
+        # up and processing the case does not need to handle units.
+        self.temperature = properties.temperature.to('kelvin').magnitude
+        self.pressure = properties.pressure.to('pascal').magnitude
+        self.ignition_delay = properties.ignition_delay.to('second').magnitude
+
+        self.pressure_rise = None
+        if properties.pressure_rise is not None:
+            self.pressure_rise = properties.pressure_rise.to('1 / second').magnitude
+
+        self.compression_time = None
+        if properties.compression_time is not None:
+            self.compression_time = properties.compression_time.to('second').magnitude
+
+        # Species names and amounts of initial mixture
+        self.composition = [(spec['species-name'], spec['amount'].magnitude)
+                            for spec in properties.composition
+                            ]
+
+    @classmethod
+    def from_spec(cls, spec, species_names):
+        """Create simulation case from compact description.
+
+        :param CaseSpec spec: Description of case, used as its properties
+        :param list species_names: Shared list of species names
+        :return: Simulation case
+        :rtype: Simulation
+        """
+        sim = cls.__new__(cls)
+        sim.kind = spec.kind
+        sim.apparatus = spec.apparatus
+        sim.meta = {'id': spec.case_id, 'data-file': spec.data_file}
+        if spec.volume_history_key is not None:
+            sim.meta['volume-history'] = spec.volume_history_key
+        sim.properties = spec
+
+        sim.temperature = spec.temperature
+        sim.pressure = spec.pressure
+        sim.ignition_delay = spec.ignition_delay
+        sim.pressure_rise = spec.pressure_rise
+        sim.compression_time = spec.compression_time
+        sim.composition = [(species_names[idx], float(amount))
+                           for idx, amount in zip(spec.species, spec.amounts)
+                           ]
+        return sim
+
+    def setup_case(self, model_file, species_key, path='', solver_settings=None,
+                   solutions=None, species_indices=None,
+                   ignition_definitions=None):
         """Sets up the simulation case to be run.
 
+        Solver settings may include ``rtol`` and ``atol`` (integrator
+        tolerances), ``max_time_step_fraction`` (maximum time step, as a
+        fraction of the end time), ``max_err_test_fails``, and ``reactor``
+        (name of Cantera reactor class, ``IdealGasReactor`` by default).
+
+        Cantera ``Solution`` objects given in ``solutions`` are reused rather
+        than loaded again from file, and any loaded are added to it, so that
+        cases run one after another share them. Models are loaded without
+        transport data, which is not needed.
+
         :param str model_file: Filename for Cantera-format model
         :param dict species_key: Dictionary with species names for `model_file`
         :param str path: Path for data file
+        :param dict solver_settings: Optional; settings of reactor and integrator
+        :param dict solutions: Optional; Cantera ``Solution`` objects keyed by
+            filename
+        :param dict species_indices: Optional; index of species and ignition
+            targets in model, as recorded by
+            :func:`pyteck.mechanisms.compile_mechanism`
+        :param list ignition_definitions: Optional; ignition definitions (with
+            ``target`` and ``type``) evaluated by :meth:`process_results`
+            besides that of the dataset, if their targets are in the model.
+            Defaults to :data:`default_ignition_definitions`.
         """
+        if solver_settings is None:
+            solver_settings = {}
+        if solutions is None:
+            solutions = {}
 
-        self.gas = ct.Solution(model_file)
-
-        # Convert ignition delay to seconds
-        self.properties.ignition_delay.ito('second')
+        ct = import_cantera()
+        if model_file not in solutions:
+            solutions[model_file] = ct.Solution(model_file, transport_model=None)
+        self.gas = solutions[model_file]
 
         # Set end time of simulation to 100 times the experimental ignition delay
-        self.time_end = 100. * self.properties.ignition_delay.magnitude
-
-        # Initial temperature needed in Kelvin for Cantera
-        self.properties.temperature.ito('kelvin')
-
-        # Initial pressure needed in Pa for Cantera
-        self.properties.pressure.ito('pascal')
+        self.time_end = 100. * self.ignition_delay
 
         # convert reactant names to those needed for model
-        reactants = [species_key[spec['species-name']] + ':' + str(spec['amount'].magnitude)
-                     for spec in self.properties.composition
-                     ]
-        reactants = ','.join(reactants)
+        if species_indices is not None:
+            reactants = numpy.zeros(self.gas.n_species)
+            for name, amount in self.composition:
+                reactants[species_indices[species_key[name]]] += amount
+        else:
+            reactants = [species_key[name] + ':' + str(amount)
+                         for name, amount in self.composition
+                         ]
+            reactants = ','.join(reactants)
 
         # Reactants given in format for Cantera
         if self.properties.composition_type in ['mole fraction', 'mole percent']:
-            self.gas.TPX = (self.properties.temperature.magnitude,
-                            self.properties.pressure.magnitude,
-                            reactants
-                            )
+            self.gas.TPX = self.temperature, self.pressure, reactants
         elif self.properties.composition_type == 'mass fraction':
-            self.gas.TPY = (self.properties.temperature.magnitude,
-                            self.properties.pressure.magnitude,
-                            reactants
-                            )
+            self.gas.TPY = self.temperature, self.pressure, reactants
         else:
             raise(BaseException('error: not supported'))
             return
 
-        # Create non-interacting ``Reservoir`` on other side of ``Wall``
-        env = ct.Reservoir(ct.Solution('air.xml'))
+        # Volume history may be shared across cases via
+        # :func:`register_volume_profiles`, with only its key carried here
+        volume_profile = None
+        if self.meta.get('volume-history') in volume_profiles:
+            volume_profile = volume_profiles[self.meta['volume-history']]
+        elif self.properties.volume_history is not None:
+            volume_profile = VolumeProfile(self.properties.volume_history)
 
-        # All reactors are ``IdealGasReactor`` objects
-        self.reac = ct.IdealGasReactor(self.gas)
-        if self.apparatus == 'shock tube' and self.properties.pressure_rise is None:
+        # Create non-interacting ``Reservoir`` on other side of ``Wall``
+        if 'air' not in solutions:
+            try:
+                solutions['air'] = ct.Solution('air.yaml', transport_model=None)
+            except ct.CanteraError:
+                # Cantera before 2.5 only has XML input files, which 3.0 drops
+                solutions['air'] = ct.Solution('air.xml', transport_model=None)
+        env = ct.Reservoir(solutions['air'])
+
+        # Reactors are ``IdealGasReactor`` objects unless otherwise specified
+        reactor_type = getattr(ct, solver_settings.get('reactor', 'IdealGasReactor'))
+        self.reac = reactor_type(self.gas)
+        if self.apparatus == 'shock tube' and self.pressure_rise is None:
             # Shock tube modeled by constant UV
             self.wall = ct.Wall(self.reac, env, A=1.0, velocity=0)
 
-        elif self.apparatus == 'shock tube' and self.properties.pressure_rise is not None:
+        elif self.apparatus == 'shock tube' and self.pressure_rise is not None:
             # Shock tube modeled by constant UV with isentropic compression
 
-            # Need to convert pressure rise units to seconds
-            self.properties.pressure_rise.ito('1 / second')
+            # Volume histories cached alongside results, to be shared with
+            # other cases and later runs
+            volume_history_path = None
+            if path:
+                volume_history_path = os.path.join(path, 'volume-histories')
 
             self.wall = ct.Wall(self.reac, env, A=1.0,
                                 velocity=PressureRiseProfile(
@@ -270,27 +723,24 @@ class Simulation(object):
                                     self.gas.T,
                                     self.gas.P,
                                     self.gas.X,
-                                    self.properties.pressure_rise.magnitude,
-                                    self.time_end
-                                    )
+                                    self.pressure_rise,
+                                    self.time_end,
+                                    cache_path=volume_history_path
+                                    ).as_func1()
                                 )
 
         elif (self.apparatus == 'rapid compression machine' and
-              self.properties.volume_history is None
+              volume_profile is None
               ):
             # Rapid compression machine modeled by constant UV
             self.wall = ct.Wall(self.reac, env, A=1.0, velocity=0)
 
         elif (self.apparatus == 'rapid compression machine' and
-              self.properties.volume_history is not None
+              volume_profile is not None
               ):
             # Rapid compression machine modeled with volume-time history
-
-            # First convert time units if necessary
-            self.properties.volume_history.time.ito('second')
-
             self.wall = ct.Wall(self.reac, env, A=1.0,
-                                velocity=VolumeProfile(self.properties.volume_history)
+                                velocity=volume_profile.as_func1()
                                 )
 
         # Number of solution variables is number of species + mass,
@@ -300,59 +750,109 @@ class Simulation(object):
         # Create ``ReactorNet`` newtork
         self.reac_net = ct.ReactorNet([self.reac])
 
-        # Set maximum time step based on volume-time history, if present
-        if self.properties.volume_history is not None:
-            # Minimum difference between volume profile times
-            min_time = numpy.min(numpy.diff(self.properties.volume_history.time.magnitude))
-            self.reac_net.set_max_time_step(min_time)
+        # Set maximum time step based on volume-time history, if present,
+        # and on solver settings
+        max_time_step = None
+        if volume_profile is not None:
+            max_time_step = volume_profile.min_time_step
+        if 'max_time_step_fraction' in solver_settings:
+            step = solver_settings['max_time_step_fraction'] * self.time_end
+            max_time_step = step if max_time_step is None else min(step, max_time_step)
+        self.max_time_step = max_time_step
+        if max_time_step is not None:
+            try:
+                self.reac_net.max_time_step = max_time_step
+            except AttributeError:
+                # Older versions of Cantera only have the setter method
+                self.reac_net.set_max_time_step(max_time_step)
+
+        if 'rtol' in solver_settings:
+            self.reac_net.rtol = solver_settings['rtol']
+        if 'atol' in solver_settings:
+            self.reac_net.atol = solver_settings['atol']
+        if 'max_err_test_fails' in solver_settings:
+            self.reac_net.max_err_test_fails = solver_settings['max_err_test_fails']
 
         # Check if species ignition target, that species is present.
         if self.properties.ignition_type['target'] not in ['pressure', 'temperature']:
             # Other targets are species
             spec = self.properties.ignition_type['target']
 
-            # Try finding species in upper- and lower-case
-            try_list = [spec, spec.lower()]
-
-            # If excited radical, may need to fall back to nonexcited species
-            if spec[-1] == '*':
-                try_list += [spec[:-1], spec[:-1].lower()]
-
-            ind = None
-            for sp in try_list:
-                try:
-                    ind = self.gas.species_index(sp)
-                    break
-                except ValueError:
-                    pass
+            # Try finding species in upper- and lower-case, or nonexcited
+            if species_indices is not None and spec in species_indices:
+                ind = species_indices[spec]
+            else:
+                ind = find_species_target(spec, self.gas.species_names)
 
-            if ind:
+            if ind is not None:
+                definition = dict(self.properties.ignition_type)
                 self.properties.ignition_target = ind
                 self.properties.ignition_type = self.properties.ignition_type['type']
             else:
                 print('Warning: ' + spec + ' not found in model; '
                       'falling back on pressure.'
                       )
+                definition = {'target': 'pressure', 'type': 'd/dt max'}
                 self.properties.ignition_target = 'pressure'
                 self.properties.ignition_type = 'd/dt max'
         else:
+            definition = dict(self.properties.ignition_type)
             self.properties.ignition_target = self.properties.ignition_type['target']
             self.properties.ignition_type = self.properties.ignition_type['type']
+        self.meta['ignition-definition'] = ignition_definition_name(definition)
+
+        # Other ignition definitions, evaluated from the same results, for
+        # those targets present in the model
+        if ignition_definitions is None:
+            ignition_definitions = default_ignition_definitions
+        self.meta['ignition-definitions'] = []
+        for definition in ignition_definitions:
+            name = ignition_definition_name(definition)
+            if name == self.meta['ignition-definition']:
+                continue
+            target = definition['target']
+            if target not in ['pressure', 'temperature']:
+                if species_indices is not None and target in species_indices:
+                    target = species_indices[target]
+                else:
+                    target = find_species_target(target, self.gas.species_names)
+                if target is None:
+                    continue
+            self.meta['ignition-definitions'].append(
+                (name, target, definition['type'])
+                )
 
         # Set file for later data file
         file_path = os.path.join(path, self.meta['id'] + '.h5')
         self.meta['save-file'] = file_path
 
-    def run_case(self, restart=False):
+    def run_case(self, restart=False, max_wall_time=None, max_steps=None,
+                 max_rows=None):
         """Run simulation case set up ``setup_case``.
 
-        :param bool restart: If ``True``, skip if results file exists.
+        Results are written to ``meta['save-file']`` with a ``.partial``
+        suffix, which is only renamed once the integration reaches the end
+        time, so that a restart never takes an interrupted case as complete.
+        If a limit is reached, integration stops, the results so far are kept
+        in the partial file (which ``meta['save-file']`` then points to), and
+        ``meta['status']`` is set to ``'timed-out'``, with the limit reached
+        in ``meta['timeout']``.
+
+        Wall time, numbers of steps and rows, and other costs of the case are
+        recorded in ``meta['telemetry']``.
+
+        :param bool restart: If ``True``, skip if complete results file exists.
+        :param float max_wall_time: Optional; maximum wall time of integration in s
+        :param int max_steps: Optional; maximum number of integrator steps
+        :param int max_rows: Optional; maximum number of rows of results saved
         """
 
         if restart and os.path.isfile(self.meta['save-file']):
             print('Skipped existing case ', self.meta['id'])
             return
 
+        tables = import_tables()
+
         # Save simulation results in hdf5 table format.
         table_def = {'time': tables.Float64Col(pos=0),
                      'temperature': tables.Float64Col(pos=1),
@@ -363,7 +863,8 @@ class Simulation(object):
                           ),
                      }
 
-        with tables.open_file(self.meta['save-file'], mode='w',
+        partial_file = self.meta['save-file'] + '.partial'
+        with tables.open_file(partial_file, mode='w',
                               title=self.meta['id']
                               ) as h5file:
 
@@ -382,10 +883,31 @@ class Simulation(object):
             # Add ``timestep`` to table
             timestep.append()
 
+            start_time = time.time()
+            num_steps = 0
+            num_rows = 1
+            timeout = None
+
             # Main time integration loop; continue integration while time of
             # the ``ReactorNet`` is less than specified end time.
             while self.reac_net.time < self.time_end:
+                timeout = None
+                if max_steps is not None and num_steps >= max_steps:
+                    timeout = 'steps'
+                elif max_rows is not None and num_rows >= max_rows:
+                    timeout = 'rows'
+                elif (max_wall_time is not None and
+                      time.time() - start_time > max_wall_time
+                      ):
+                    timeout = 'wall time'
+                if timeout is not None:
+                    self.meta['status'] = 'timed-out'
+                    self.meta['timeout'] = timeout
+                    print('Case ', self.meta['id'], ' timed out (' + timeout + ')')
+                    break
+
                 self.reac_net.step()
+                num_steps += 1
 
                 # Interpolate to end time if step took us beyond that point
                 if self.reac_net.time > self.time_end:
@@ -423,6 +945,7 @@ class Simulation(object):
 
                 # Add ``timestep`` to table
                 timestep.append()
+                num_rows += 1
 
                 # Save values for next step in case of interpolation needed
                 prev_time = self.reac_net.time
@@ -434,75 +957,91 @@ class Simulation(object):
             # Write ``table`` to disk
             table.flush()
 
+        if timeout is not None:
+            self.meta['save-file'] = partial_file
+        else:
+            os.replace(partial_file, self.meta['save-file'])
+
+        # Cost of case, e.g. for calibrating estimates of later runs
+        self.meta['telemetry'] = {'wall time': time.time() - start_time,
+                                  'steps': num_steps,
+                                  'rows': num_rows,
+                                  'species': self.gas.n_species,
+                                  'reactions': self.gas.n_reactions,
+                                  'end time': self.time_end,
+                                  'max time step': self.max_time_step,
+                                  'file size': os.path.getsize(self.meta['save-file']),
+                                  }
+
         print('Done with case ', self.meta['id'])
 
     def process_results(self):
         """Process integration results to obtain ignition delay.
+
+        The ignition delay follows the ignition definition of the dataset. Any
+        other ignition definitions set up by :meth:`setup_case` are evaluated
+        from the same integration results, read in the same pass, and their
+        overall and first-stage delays (in s) stored in
+        ``meta['ignition-delays']`` by name, along with that of the dataset.
         """
 
+        tables = import_tables()
+
+        alternatives = self.meta.get('ignition-definitions', [])
+        targets = [self.properties.ignition_target] + [
+            target for _, target, _ in alternatives
+            ]
+        species = sorted(set(target for target in targets
+                             if target not in ['pressure', 'temperature']
+                             ))
+
         # Load saved integration results
         with tables.open_file(self.meta['save-file'], 'r') as h5file:
             # Load Table with Group name simulation
             table = h5file.root.simulation
 
-            time = table.col('time')
-            if self.properties.ignition_target == 'pressure':
-                target = table.col('pressure')
-            elif self.properties.ignition_target == 'temperature':
-                target = table.col('temperature')
-            else:
-                target = table.col('mass_fractions')[:, self.properties.ignition_target]
-
-        # add units to time
-        time = time * units.second
-
-        # Analysis for ignition depends on type specified
-        if self.properties.ignition_type in ['max', 'd/dt max']:
-            if self.properties.ignition_type == 'd/dt max':
-                # Evaluate derivative
-                target = first_derivative(time.magnitude, target)
-
-            # Get indices of peaks
-            ind = detect_peaks(target)
-
-            # Fall back on derivative if max value doesn't work.
-            if len(ind) == 0 and self.properties.ignition_type == 'max':
-                target = first_derivative(time.magnitude, target)
-                ind = detect_peaks(target)
-
-            # Get index of largest peak (overall ignition delay)
-            max_ind = ind[numpy.argmax(target[ind])]
-
-            # Will need to subtract compression time for RCM
-            time_comp = 0.0
-            if self.properties.compression_time is not None:
-                time_comp = self.properties.compression_time
-
-            ign_delays = time[ind[numpy.where((time[ind[ind <= max_ind]] - time_comp)
-                                              > 0. * units.second
-                                             )]] - time_comp
-        elif self.properties.ignition_type == '1/2 max':
-            # maximum value, and associated index
-            max_val = numpy.max(target)
-            ind = detect_peaks(target)
-            max_ind = ind[numpy.argmax(target[ind])]
-
-            # TODO: interpolate for actual half-max value
-            # Find index associated with the 1/2 max value, but only consider
-            # points before the peak
-            half_idx = (numpy.abs(target[0:max_ind] - 0.5 * max_val)).argmin()
-            ign_delays = [time[half_idx]]
-
-            # TODO: detect two-stage ignition when 1/2 max type?
+            # Read only the needed columns, and for species targets only
+            # those species, a block of rows at a time
+            time = read_column(table, 'time')
+            values = {name: read_column(table, name)
+                      for name in ['pressure', 'temperature'] if name in targets
+                      }
+            if species:
+                mass_fractions = read_column(table, 'mass_fractions', species)
+                for idx, target in enumerate(species):
+                    values[target] = mass_fractions[:, idx]
+
+        ign_delays = find_ignition_delays(time,
+                                          values[self.properties.ignition_target],
+                                          self.properties.ignition_type,
+                                          self.compression_time
+                                          )
+
+        if 'ignition-definition' in self.meta:
+            delays = {self.meta['ignition-definition']: ign_delays}
+            for name, target, ignition_type in alternatives:
+                try:
+                    delays[name] = find_ignition_delays(time, values[target],
+                                                        ignition_type,
+                                                        self.compression_time
+                                                        )
+                except (ValueError, IndexError):
+                    # e.g., no peak of target
+                    delays[name] = numpy.array([])
+            self.meta['ignition-delays'] = {
+                name: [float(found[-1]) if len(found) > 0 else 0.0,
+                       float(found[0]) if len(found) > 1 else numpy.nan
+                       ] for name, found in delays.items()
+                }
 
         # Overall ignition delay
         if len(ign_delays) > 0:
-            self.meta['simulated-ignition-delay'] = ign_delays[-1]
+            self.meta['simulated-ignition-delay'] = ign_delays[-1] * units.second
         else:
             self.meta['simulated-ignition-delay'] = 0.0 * units.second
 
         # First-stage ignition delay
         if len(ign_delays) > 1:
-            self.meta['simulated-first-stage-delay'] = ign_delays[0]
+            self.meta['simulated-first-stage-delay'] = ign_delays[0] * units.second
         else:
             self.meta['simulated-first-stage-delay'] = numpy.nan * units.second
@@ -0,0 +1,604 @@
+"""Bootstrap confidence intervals of model error metrics.
+
+The normalized deviation of each datapoint, i.e., the difference of the
+logarithms of the simulated and experimental ignition delays over the
+standard deviation of its dataset, is kept in one NumPy array, with
+datapoints grouped by dataset. Error and deviation functions of each dataset
+(and their averages over datasets) are then computed for many bootstrap
+resamples at once, as array operations on a block of resamples, rather than
+looping over datasets and resamples.
+
+Datapoints are resampled within each dataset, so that each dataset keeps its
+size; optionally, datasets are also resampled, for the variability of the
+overall metrics between datasets. Two models are compared by resampling the
+same datapoints for both (a paired bootstrap).
+"""
+
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+import numpy
+
+# Local imports
+from .database import ResultsDatabase, format_table
+from .results import STATUS_SKIPPED
+from .eval_model import estimate_std_dev
+from .rescore import get_changing_values
+
+max_block_size = 2**22
+"""int: maximum number of resampled deviations held in memory at once"""
+
+
+def confidence_interval(samples, estimate, confidence=0.95):
+    """Percentile confidence interval of bootstrap samples of a metric.
+
+    Parameters
+    ----------
+    samples : numpy.ndarray
+        Bootstrap samples, along first axis
+    estimate : float or numpy.ndarray
+        Metric of original data
+    confidence : float
+        Confidence level of interval
+
+    Returns
+    -------
+    interval : dict
+        ``estimate``, ``lower`` and ``upper`` bounds, and ``standard error``
+
+    """
+    tail = 50. * (1. - confidence)
+    with numpy.errstate(invalid='ignore'):
+        lower, upper = numpy.nanpercentile(samples, [tail, 100. - tail], axis=0)
+        standard_error = numpy.nanstd(samples, axis=0)
+    return {'estimate': estimate, 'lower': lower, 'upper': upper,
+            'standard error': standard_error,
+            }
+
+
+class ModelErrors(object):
+    """Normalized deviations of the datapoints of a model, by dataset.
+
+    Parameters
+    ----------
+    model : str
+        Name of model
+    datasets : list of str
+        Names of datasets
+    dataset_index : numpy.ndarray
+        Index in ``datasets`` of each datapoint
+    deviations : numpy.ndarray
+        Normalized deviation of each datapoint; NaN values (e.g., failed
+        cases) are ignored, as in :func:`pyteck.eval_model.dataset_error_functions`
+    datapoints : numpy.ndarray
+        Optional; ID of each datapoint within its dataset, for pairing with
+        other models. Defaults to the order within each dataset.
+
+    """
+    def __init__(self, model, datasets, dataset_index, deviations,
+                 datapoints=None):
+        dataset_index = numpy.asarray(dataset_index, dtype=int)
+        deviations = numpy.asarray(deviations, dtype=float)
+        if datapoints is None:
+            datapoints = numpy.zeros(len(deviations), dtype=int)
+            for idx in range(len(datasets)):
+                in_dataset = dataset_index == idx
+                datapoints[in_dataset] = numpy.arange(numpy.sum(in_dataset))
+        datapoints = numpy.asarray(datapoints, dtype=int)
+
+        # Datapoints kept contiguous by dataset
+        order = numpy.lexsort((datapoints, dataset_index))
+        self.model = model
+        self.datasets = list(datasets)
+        self.dataset_index = dataset_index[order]
+        self.deviations = deviations[order]
+        self.datapoints = datapoints[order]
+
+        self.counts = numpy.bincount(self.dataset_index,
+                                     minlength=len(self.datasets)
+                                     )
+        if numpy.any(self.counts == 0):
+            raise ValueError('Datasets without datapoints: ' + ', '.join(
+                [name for name, count in zip(self.datasets, self.counts)
+                 if count == 0
+                 ]))
+        self.offsets = numpy.concatenate([[0], numpy.cumsum(self.counts)[:-1]])
+
+    @classmethod
+    def from_results(cls, model, results, dataset_list=None, min_std_dev=None):
+        """Normalized deviations from stored results of a model.
+
+        Standard deviations of datasets are estimated as in
+        :func:`pyteck.rescore.score_datasets`, and skipped datasets left out.
+
+        Parameters
+        ----------
+        model : str
+            Name of model
+        results : dict
+            Stored results of each dataset, from
+            :meth:`pyteck.database.ResultsDatabase.latest_results`
+        dataset_list : list of str
+            Optional; names of datasets to include. Defaults to all.
+        min_std_dev : float
+            Optional; minimum allowable standard deviation
+
+        Returns
+        -------
+        errors : ModelErrors
+            Normalized deviations of datapoints
+
+        """
+        if dataset_list is None:
+            dataset_list = sorted(results)
+
+        datasets = []
+        dataset_index = []
+        deviations = []
+        datapoints = []
+        for dataset in dataset_list:
+            if dataset not in results:
+                print('Warning: no stored results of model ' + model +
+                      ' for dataset ' + dataset
+                      )
+                continue
+            dataset_results = results[dataset]
+            if numpy.all(numpy.asarray(dataset_results['status']) ==
+                         STATUS_SKIPPED
+                         ):
+                continue
+
+            delays_exp = dataset_results['experimental_delay']
+            variable = get_changing_values(dataset_results['temperature'],
+                                           dataset_results['pressure']
+                                           )
+            standard_dev = estimate_std_dev(variable, numpy.log(delays_exp),
+                                            min_std_dev
+                                            )
+            with numpy.errstate(divide='ignore'):
+                deviations.append((numpy.log(dataset_results['simulated_delay']) -
+                                   numpy.log(delays_exp)
+                                   ) / standard_dev)
+            dataset_index.append(numpy.full(len(delays_exp), len(datasets)))
+            datapoints.append(dataset_results['datapoint'])
+            datasets.append(dataset)
+
+        if not datasets:
+            raise ValueError('No results of model ' + model)
+
+        return cls(model, datasets, numpy.concatenate(dataset_index),
+                   numpy.concatenate(deviations), numpy.concatenate(datapoints)
+                   )
+
+    @classmethod
+    def from_database(cls, filename, model, dataset_list=None,
+                      min_std_dev=None):
+        """Normalized deviations from a results database.
+
+        Parameters
+        ----------
+        filename : str
+            Name of SQLite results database
+        model : str
+            Name of model
+        dataset_list : list of str
+            Optional; names of datasets to include. Defaults to all.
+        min_std_dev : float
+            Optional; minimum allowable standard deviation
+
+        Returns
+        -------
+        errors : ModelErrors
+            Normalized deviations of datapoints
+
+        """
+        with ResultsDatabase(filename) as database:
+            results = database.latest_results(model)
+        return cls.from_results(model, results, dataset_list, min_std_dev)
+
+    def subset(self, keys, dataset_order=None):
+        """Datapoints with given dataset names and IDs.
+
+        Parameters
+        ----------
+        keys : set of tuple
+            ``(dataset, datapoint)`` pairs
+        dataset_order : list of str
+            Optional; order of datasets in the subset (e.g., that of another
+            model). Defaults to the order of this model.
+
+        Returns
+        -------
+        errors : ModelErrors
+            Normalized deviations of datapoints in ``keys``
+
+        """
+        names = numpy.array(self.datasets, dtype=object)[self.dataset_index]
+        keep = numpy.array([(name, datapoint) in keys for name, datapoint in
+                            zip(names, self.datapoints)
+                            ], dtype=bool)
+        if dataset_order is None:
+            dataset_order = self.datasets
+        datasets = [name for name in dataset_order if name in set(names[keep])]
+        index = {name: idx for idx, name in enumerate(datasets)}
+        return ModelErrors(self.model, datasets,
+                           [index[name] for name in names[keep]],
+                           self.deviations[keep], self.datapoints[keep]
+                           )
+
+    def dataset_metrics(self, deviations=None):
+        """Error and deviation functions of each dataset.
+
+        Parameters
+        ----------
+        deviations : numpy.ndarray
+            Optional; deviations of datapoints in the last axis (e.g., one
+            row per resample). Defaults to the original deviations.
+
+        Returns
+        -------
+        error_funcs : numpy.ndarray
+            Error function of each dataset, in the last axis
+        dev_funcs : numpy.ndarray
+            Deviation function of each dataset, in the last axis
+
+        """
+        if deviations is None:
+            deviations = self.deviations
+        valid = ~numpy.isnan(deviations)
+        deviations = numpy.where(valid, deviations, 0.)
+
+        counts = numpy.add.reduceat(valid, self.offsets, axis=-1)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            error_funcs = (numpy.add.reduceat(deviations**2, self.offsets, axis=-1) /
+                           counts
+                           )
+            dev_funcs = (numpy.add.reduceat(deviations, self.offsets, axis=-1) /
+                         counts
+                         )
+        return error_funcs, dev_funcs
+
+    def metrics(self):
+        """Error and deviation functions of each dataset, and averages.
+
+        Returns
+        -------
+        output : dict
+            Metrics of model, with the same keys as
+            :func:`pyteck.eval_model.evaluate_model`
+
+        """
+        error_funcs, dev_funcs = self.dataset_metrics()
+        return {'model': self.model,
+                'datasets': [{'dataset': dataset, 'error function': float(error),
+                              'absolute deviation': float(deviation),
+                              } for dataset, error, deviation in
+                             zip(self.datasets, error_funcs, dev_funcs)
+                             ],
+                'average error function': float(numpy.nanmean(error_funcs)),
+                'average deviation function': float(numpy.nanmean(dev_funcs)),
+                }
+
+    def resample(self, num_resamples, rng, block_size=None):
+        """Indices of bootstrap resamples of datapoints, in blocks.
+
+        Datapoints of each dataset are resampled from that dataset.
+
+        Parameters
+        ----------
+        num_resamples : int
+            Number of resamples
+        rng : numpy.random.RandomState
+            Random number generator
+        block_size : int
+            Optional; number of resamples in each block. Defaults to the most
+            that keep :data:`max_block_size` deviations in memory.
+
+        Yields
+        ------
+        indices : numpy.ndarray
+            Indices of datapoints, one row per resample
+
+        """
+        num_datapoints = len(self.deviations)
+        if block_size is None:
+            block_size = max(1, max_block_size // num_datapoints)
+
+        counts = numpy.repeat(self.counts, self.counts)
+        offsets = numpy.repeat(self.offsets, self.counts)
+        for start in range(0, num_resamples, block_size):
+            num_block = min(block_size, num_resamples - start)
+            uniform = rng.random_sample((num_block, num_datapoints))
+            yield offsets + (uniform * counts).astype(int)
+
+    def bootstrap(self, num_resamples=2000, confidence=0.95,
+                  resample_datasets=False, seed=None, block_size=None):
+        """Bootstrap confidence intervals of error metrics.
+
+        Parameters
+        ----------
+        num_resamples : int
+            Number of bootstrap resamples
+        confidence : float
+            Confidence level of intervals
+        resample_datasets : bool
+            If ``True``, datasets are also resampled for the averages over
+            datasets, including the variability between datasets.
+        seed : int
+            Optional; seed of random number generator
+        block_size : int
+            Optional; number of resamples computed at once
+
+        Returns
+        -------
+        output : dict
+            Confidence intervals (see :func:`confidence_interval`) of the
+            error and deviation functions of each dataset, and of their
+            averages
+
+        """
+        rng = numpy.random.RandomState(seed)
+        samples = [self._resampled_metrics(indices, rng, resample_datasets)
+                   for indices in self.resample(num_resamples, rng, block_size)
+                   ]
+        samples = [numpy.concatenate(values) for values in zip(*samples)]
+        error_funcs, dev_funcs, average_errors, average_devs = samples
+
+        estimates = self.metrics()
+        output = {'model': self.model, 'resamples': num_resamples,
+                  'confidence': confidence, 'datasets': [],
+                  'average error function': confidence_interval(
+                      average_errors, estimates['average error function'],
+                      confidence
+                      ),
+                  'average deviation function': confidence_interval(
+                      average_devs, estimates['average deviation function'],
+                      confidence
+                      ),
+                  }
+        error_intervals = confidence_interval(
+            error_funcs, [dataset['error function']
+                          for dataset in estimates['datasets']], confidence
+            )
+        dev_intervals = confidence_interval(
+            dev_funcs, [dataset['absolute deviation']
+                        for dataset in estimates['datasets']], confidence
+            )
+        for idx, dataset in enumerate(self.datasets):
+            output['datasets'].append({
+                'dataset': dataset,
+                'error function': {key: float(value[idx]) for key, value in
+                                   error_intervals.items()
+                                   },
+                'absolute deviation': {key: float(value[idx]) for key, value in
+                                       dev_intervals.items()
+                                       },
+                })
+        for key in ['average error function', 'average deviation function']:
+            output[key] = {name: float(value) for name, value in output[key].items()}
+        return output
+
+    def _resampled_metrics(self, indices, rng, resample_datasets=False):
+        """Metrics of a block of resamples of datapoints (and datasets).
+        """
+        error_funcs, dev_funcs = self.dataset_metrics(self.deviations[indices])
+        dataset_indices = None
+        if resample_datasets:
+            dataset_indices = rng.randint(len(self.datasets),
+                                          size=error_funcs.shape
+                                          )
+        return (error_funcs, dev_funcs,
+                average_over_datasets(error_funcs, dataset_indices),
+                average_over_datasets(dev_funcs, dataset_indices)
+                )
+
+
+def average_over_datasets(values, dataset_indices=None):
+    """Average metrics of datasets, for each resample.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Metric of each dataset, one row per resample
+    dataset_indices : numpy.ndarray
+        Optional; resampled datasets of each row
+
+    Returns
+    -------
+    averages : numpy.ndarray
+        Average over datasets of each row, ignoring NaN values
+
+    """
+    if dataset_indices is not None:
+        values = numpy.take_along_axis(values, dataset_indices, axis=1)
+    with numpy.errstate(invalid='ignore'):
+        valid = ~numpy.isnan(values)
+        return (numpy.where(valid, values, 0.).sum(axis=1) /
+                valid.sum(axis=1)
+                )
+
+
+def compare_models(errors_a, errors_b, num_resamples=2000, confidence=0.95,
+                   resample_datasets=False, seed=None, block_size=None):
+    """Paired bootstrap comparison of the error metrics of two models.
+
+    Only datapoints with results for both models are compared, matched by
+    dataset name and datapoint ID, and the same resamples of datapoints (and
+    datasets) are used for both.
+
+    Parameters
+    ----------
+    errors_a : ModelErrors
+        Normalized deviations of first model
+    errors_b : ModelErrors
+        Normalized deviations of second model
+    num_resamples : int
+        Number of bootstrap resamples
+    confidence : float
+        Confidence level of intervals
+    resample_datasets : bool
+        If ``True``, datasets are also resampled.
+    seed : int
+        Optional; seed of random number generator
+    block_size : int
+        Optional; number of resamples computed at once
+
+    Returns
+    -------
+    output : dict
+        Confidence intervals of the difference (first minus second model) of
+        the average error and deviation functions, the fraction of resamples
+        in which the first model has the lower average error function, and
+        the two-sided bootstrap p-value of the difference in average error
+        function
+
+    """
+    keys = (set(zip(numpy.array(errors_a.datasets)[errors_a.dataset_index],
+                    errors_a.datapoints)) &
+            set(zip(numpy.array(errors_b.datasets)[errors_b.dataset_index],
+                    errors_b.datapoints))
+            )
+    if not keys:
+        raise ValueError('No datapoints in common between models ' +
+                         errors_a.model + ' and ' + errors_b.model
+                         )
+    errors_a = errors_a.subset(keys)
+    errors_b = errors_b.subset(keys, errors_a.datasets)
+    if (errors_a.datasets != errors_b.datasets or
+            not numpy.array_equal(errors_a.dataset_index, errors_b.dataset_index) or
+            not numpy.array_equal(errors_a.datapoints, errors_b.datapoints)
+            ):
+        # e.g., datapoint IDs repeated within a dataset
+        raise ValueError('Datapoints of models ' + errors_a.model + ' and ' +
+                         errors_b.model + ' cannot be paired'
+                         )
+
+    rng = numpy.random.RandomState(seed)
+    error_diffs = []
+    dev_diffs = []
+    for indices in errors_a.resample(num_resamples, rng, block_size):
+        dataset_indices = None
+        if resample_datasets:
+            dataset_indices = rng.randint(len(errors_a.datasets),
+                                          size=(len(indices), len(errors_a.datasets))
+                                          )
+        metrics_a = errors_a.dataset_metrics(errors_a.deviations[indices])
+        metrics_b = errors_b.dataset_metrics(errors_b.deviations[indices])
+        error_diffs.append(average_over_datasets(metrics_a[0], dataset_indices) -
+                           average_over_datasets(metrics_b[0], dataset_indices)
+                           )
+        dev_diffs.append(average_over_datasets(metrics_a[1], dataset_indices) -
+                         average_over_datasets(metrics_b[1], dataset_indices)
+                         )
+    error_diffs = numpy.concatenate(error_diffs)
+    dev_diffs = numpy.concatenate(dev_diffs)
+
+    estimate_a = errors_a.metrics()
+    estimate_b = errors_b.metrics()
+    error_diff = (estimate_a['average error function'] -
+                  estimate_b['average error function']
+                  )
+    dev_diff = (estimate_a['average deviation function'] -
+                estimate_b['average deviation function']
+                )
+    output = {'models': [errors_a.model, errors_b.model],
+              'datasets': len(errors_a.datasets),
+              'datapoints': len(keys),
+              'resamples': num_resamples,
+              'confidence': confidence,
+              'average error function': [estimate_a['average error function'],
+                                         estimate_b['average error function']
+                                         ],
+              'error function difference': {
+                  key: float(value) for key, value in
+                  confidence_interval(error_diffs, error_diff, confidence).items()
+                  },
+              'deviation function difference': {
+                  key: float(value) for key, value in
+                  confidence_interval(dev_diffs, dev_diff, confidence).items()
+                  },
+              'probability first better': float(numpy.mean(error_diffs < 0.)),
+              'p-value': float(min(1., 2. * min(numpy.mean(error_diffs <= 0.),
+                                                numpy.mean(error_diffs >= 0.)
+                                                ))),
+              }
+    return output
+
+
+def format_bootstrap(output):
+    """Format bootstrap confidence intervals of a model as text table.
+
+    Parameters
+    ----------
+    output : dict
+        Confidence intervals, from :meth:`ModelErrors.bootstrap`
+
+    Returns
+    -------
+    text : str
+        Table of error and deviation functions of each dataset and overall
+
+    """
+    header = ['dataset', 'error function', 'lower', 'upper',
+              'deviation function', 'lower', 'upper'
+              ]
+    rows = [[dataset['dataset'], dataset['error function']['estimate'],
+             dataset['error function']['lower'],
+             dataset['error function']['upper'],
+             dataset['absolute deviation']['estimate'],
+             dataset['absolute deviation']['lower'],
+             dataset['absolute deviation']['upper'],
+             ] for dataset in output['datasets']
+            ]
+    error = output['average error function']
+    deviation = output['average deviation function']
+    rows.append(['overall', error['estimate'], error['lower'], error['upper'],
+                 deviation['estimate'], deviation['lower'], deviation['upper'],
+                 ])
+    return ('{}: {:g}% confidence intervals from {} resamples\n'.format(
+                output['model'], 100. * output['confidence'],
+                output['resamples']
+                ) + format_table(header, rows)
+            )
+
+
+def format_comparison(output):
+    """Format paired bootstrap comparison of two models as text.
+
+    Parameters
+    ----------
+    output : dict
+        Comparison, from :func:`compare_models`
+
+    Returns
+    -------
+    text : str
+        Difference of error metrics, with confidence intervals
+
+    """
+    model_a, model_b = output['models']
+    header = ['difference', 'estimate', 'lower', 'upper', 'standard error']
+    rows = [[name, output[key]['estimate'], output[key]['lower'],
+             output[key]['upper'], output[key]['standard error']
+             ] for name, key in [('error function', 'error function difference'),
+                                 ('deviation function',
+                                  'deviation function difference'),
+                                 ]
+            ]
+    return '\n'.join([
+        '{} - {}: {} datapoints in {} datasets, {:g}% confidence intervals '
+        'from {} resamples'.format(model_a, model_b, output['datapoints'],
+                                   output['datasets'],
+                                   100. * output['confidence'],
+                                   output['resamples']
+                                   ),
+        format_table(header, rows),
+        'average error functions: {:.6g}, {:.6g}'.format(
+            *output['average error function']
+            ),
+        'probability {} better: {:.4g}'.format(
+            model_a, output['probability first better']
+            ),
+        'p-value: {:.4g}'.format(output['p-value']),
+        ])
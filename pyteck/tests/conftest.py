@@ -0,0 +1,55 @@
+"""Configuration of test suite.
+
+Performance benchmarks are marked with ``benchmark``, and only run when
+the ``--run-benchmarks`` option is given. The end-to-end regression gate,
+which compares the throughput and results of a model evaluation with a
+stored baseline, is marked with ``regression``, and only run when the
+``--run-regression`` option is given; ``--update-baseline`` replaces the
+baseline with the new results instead.
+"""
+
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption('--run-benchmarks',
+                     action='store_true',
+                     default=False,
+                     help='Run performance benchmarks.'
+                     )
+    parser.addoption('--run-regression',
+                     action='store_true',
+                     default=False,
+                     help='Run end-to-end performance and accuracy '
+                          'regression gate.'
+                     )
+    parser.addoption('--update-baseline',
+                     action='store_true',
+                     default=False,
+                     help='Replace baseline of regression gate with new '
+                          'results (implies --run-regression).'
+                     )
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers',
+                            'benchmark: performance benchmark, only run with '
+                            '--run-benchmarks'
+                            )
+    config.addinivalue_line('markers',
+                            'regression: end-to-end regression gate, only run '
+                            'with --run-regression'
+                            )
+
+
+def pytest_collection_modifyitems(config, items):
+    run_regression = (config.getoption('--run-regression') or
+                      config.getoption('--update-baseline')
+                      )
+    skip_benchmark = pytest.mark.skip(reason='needs --run-benchmarks option')
+    skip_regression = pytest.mark.skip(reason='needs --run-regression option')
+    for item in items:
+        if 'benchmark' in item.keywords and not config.getoption('--run-benchmarks'):
+            item.add_marker(skip_benchmark)
+        if 'regression' in item.keywords and not run_regression:
+            item.add_marker(skip_regression)
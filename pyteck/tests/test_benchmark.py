@@ -0,0 +1,205 @@
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import os
+import pkg_resources
+
+# Third-party libraries
+import pytest
+from pyked.chemked import ChemKED
+
+# Local imports
+from ..benchmark import (generate_dataset, compare_baseline, environment,
+                         run_benchmark, read_baseline, write_baseline,
+                         invalid_results
+                         )
+
+baseline_file = 'regression-baseline.json'
+"""str: baseline of end-to-end regression gate, in the tests directory"""
+
+
+def relative_location(file):
+    file_path = os.path.join(file)
+    return pkg_resources.resource_filename(__name__, file_path)
+
+
+def make_record(throughput=10., delays=None, failed=None, error=1.5):
+    """Benchmark record with given throughput, delays, and failed cases.
+    """
+    if delays is None:
+        delays = {'a.yaml': [1.e-3, 2.e-3, 3.e-3], 'b.yaml': [5.e-4]}
+    return {'cases per second': throughput, 'delays': delays,
+            'failed cases': failed or [], 'average error function': error
+            }
+
+
+class TestGenerateDataset:
+    """
+    """
+    def test_valid(self, tmpdir):
+        filename = str(tmpdir.join('generated.yaml'))
+        generate_dataset(filename, 10, seed=1)
+        properties = ChemKED(filename)
+        assert len(properties.datapoints) == 10
+        assert properties.experiment_type == 'ignition delay'
+        temperatures = [dp.temperature.to('kelvin').magnitude
+                        for dp in properties.datapoints
+                        ]
+        assert all(1000. <= temp <= 1400. for temp in temperatures)
+
+    def test_reproducible(self, tmpdir):
+        filenames = [str(tmpdir.join(name))
+                     for name in ['a.yaml', 'b.yaml', 'c.yaml']
+                     ]
+        generate_dataset(filenames[0], 5, seed=1)
+        generate_dataset(filenames[1], 5, seed=1)
+        generate_dataset(filenames[2], 5, seed=2)
+        texts = []
+        for filename in filenames:
+            with open(filename, 'r') as f:
+                texts.append(f.read())
+        assert texts[0] == texts[1]
+        assert texts[0] != texts[2]
+
+
+class TestCompareBaseline:
+    """
+    """
+    def test_unchanged(self):
+        assert compare_baseline(make_record(), make_record()) == []
+
+    def test_throughput(self):
+        """Ensure only losses of throughput past tolerance are regressions.
+        """
+        assert compare_baseline(make_record(7.5), make_record(10.)) == []
+        assert compare_baseline(make_record(50.), make_record(10.)) == []
+
+        problems = compare_baseline(make_record(6.5), make_record(10.))
+        assert len(problems) == 1
+        assert problems[0].startswith('throughput regressed')
+        assert compare_baseline(make_record(6.5), make_record(10.),
+                                min_throughput=0.5
+                                ) == []
+
+    def test_drift(self):
+        """Ensure each drifted delay reported, including missing delays.
+        """
+        record = make_record(delays={'a.yaml': [1.0005e-3, 2.1e-3, 3.e-3],
+                                     'b.yaml': [1.e-3]
+                                     })
+        problems = compare_baseline(record, make_record())
+        assert len(problems) == 2
+        assert problems[0].startswith('a.yaml, datapoint 1')
+        assert problems[1].startswith('b.yaml, datapoint 0')
+
+        assert compare_baseline(record, make_record(), rtol=0.1) == [problems[1]]
+
+    def test_invalid(self):
+        """Ensure missing and zero delays and infinite errors reported once.
+        """
+        record = make_record(delays={'a.yaml': [1.e-3, 2.e-3, float('nan')],
+                                     'b.yaml': [0.]
+                                     }, error=float('inf'))
+        problems = ['a.yaml, datapoint 2: no ignition delay (nan s)',
+                    'b.yaml, datapoint 0: no ignition delay (0 s)',
+                    'average error function inf'
+                    ]
+        assert invalid_results(record) == problems
+        assert compare_baseline(record, make_record()) == problems
+        assert compare_baseline(record, record) == problems
+        assert invalid_results(make_record()) == []
+
+    def test_failed_cases(self):
+        record = make_record(failed=['a.yaml, a_2'])
+        assert compare_baseline(record, make_record()) == [
+            'failed cases: a.yaml, a_2'
+            ]
+
+    def test_datasets(self):
+        record = make_record(delays={'a.yaml': [1.e-3, 2.e-3],
+                                     'c.yaml': [5.e-4]
+                                     })
+        problems = compare_baseline(record, make_record())
+        assert problems == ['datasets differ from baseline: a.yaml, c.yaml '
+                            'vs. a.yaml, b.yaml',
+                            'a.yaml: 2 datapoints, baseline 3'
+                            ]
+
+    def test_read_write(self, tmpdir):
+        filename = str(tmpdir.join('baseline.json'))
+        record = make_record()
+        write_baseline(record, filename)
+        assert read_baseline(filename) == record
+
+    def test_write_invalid(self, tmpdir):
+        """Ensure records with failed cases, missing or zero delays, or
+        infinite errors not stored.
+        """
+        filename = str(tmpdir.join('baseline.json'))
+        with pytest.raises(ValueError) as excinfo:
+            write_baseline(make_record(failed=['a.yaml, a_2']), filename)
+        assert 'a.yaml, a_2' in str(excinfo.value)
+
+        record = make_record(delays={'a.yaml': [float('nan')]})
+        with pytest.raises(ValueError) as excinfo:
+            write_baseline(record, filename)
+        assert 'a.yaml, datapoint 0' in str(excinfo.value)
+
+        record = make_record(delays={'a.yaml': [1.e-3], 'b.yaml': [0.]})
+        with pytest.raises(ValueError) as excinfo:
+            write_baseline(record, filename)
+        assert 'b.yaml, datapoint 0: no ignition' in str(excinfo.value)
+
+        with pytest.raises(ValueError) as excinfo:
+            write_baseline(make_record(error=float('inf')), filename)
+        assert 'average error function inf' in str(excinfo.value)
+        assert not os.path.isfile(filename)
+
+
+class TestRegression:
+    """
+    """
+    @pytest.mark.regression
+    def test_regression(self, request, record_property, tmpdir, monkeypatch):
+        """Compare evaluation of fixtures and generated dataset with baseline.
+
+        The RCM fixture is left out, since with GRI-Mech 3.0 it ignites
+        during compression, giving no ignition delay.
+        """
+        monkeypatch.chdir(str(tmpdir))
+        generated = str(tmpdir.join('generated_st.yaml'))
+        generate_dataset(generated, 40, seed=0)
+        datasets = [relative_location(name) for name in
+                    ['testfile_st.yaml', 'testfile_st2.yaml']
+                    ] + [generated]
+
+        record = run_benchmark('gri30.yaml', relative_location('spec_keys.yaml'),
+                               datasets, str(tmpdir.join('benchmark')),
+                               model_path=''
+                               )
+        stats = ['cases', 'wall time', 'cases per second', 'peak memory',
+                 'output size'
+                 ]
+        for key in stats:
+            record_property(key, record[key])
+
+        filename = relative_location(baseline_file)
+        if request.config.getoption('--update-baseline'):
+            write_baseline(record, filename)
+            return
+        if not os.path.isfile(filename):
+            pytest.skip('no baseline; create with --update-baseline')
+
+        baseline = read_baseline(filename)
+        if baseline['environment']['cantera'] != environment()['cantera']:
+            pytest.skip('baseline from Cantera {}; update with '
+                        '--update-baseline'.format(baseline['environment']['cantera'])
+                        )
+        problems = compare_baseline(record, baseline)
+        assert not problems, '\n'.join(
+            problems + ['{}: {:.6g}, baseline {:.6g}'.format(
+                key, record[key], baseline[key]
+                ) for key in stats]
+            )
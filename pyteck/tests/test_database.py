@@ -0,0 +1,180 @@
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import os
+
+import numpy
+import pytest
+
+# Local imports
+from .. import database
+from ..database import ResultsDatabase, summarize, list_runs, format_table
+from ..results import dataset_results
+from ..__main__ import main
+
+
+def add_run(db, model_name, error_scale=1., finish=True):
+    """Add run with two datasets, at low and high pressure.
+    """
+    run_id = db.start_run(model_name, 'datasets.txt', {'option': True})
+    with db.writer(run_id, batch_size=3) as writer:
+        writer.write(dataset_results(
+            model_name, 'low.yaml', 0, [1000., 1100.],
+            [1. * database.atm, 2. * database.atm], [1.e-3, 1.e-3],
+            [1.e-3 * numpy.exp(error_scale), 1.e-3], standard_dev=1.
+            ))
+        writer.write(dataset_results(
+            model_name, 'high.yaml', 1, [800., 900., 1000.],
+            [50. * database.atm] * 3, [1.e-3, 1.e-3, 1.e-3],
+            [1.e-3, 0., 1.e-3 * numpy.exp(2. * error_scale)], standard_dev=1.
+            ))
+    if finish:
+        db.finish_run(run_id, {'average error function': error_scale})
+    return run_id
+
+
+@pytest.fixture
+def results_db(tmpdir):
+    filename = str(tmpdir.join('results.db'))
+    with ResultsDatabase(filename) as db:
+        add_run(db, 'model_a.cti')
+        add_run(db, 'model_b.cti')
+        add_run(db, 'model_b.cti', error_scale=3.)
+        add_run(db, 'model_b.cti', error_scale=5., finish=False)
+    return filename
+
+
+class TestResultsDatabase:
+    """
+    """
+    def test_runs(self, results_db):
+        """Ensure runs recorded with status and overall results.
+        """
+        with ResultsDatabase(results_db) as db:
+            header, rows = list_runs(db.connection)
+        assert [row[1] for row in rows] == ['model_a.cti', 'model_b.cti',
+                                            'model_b.cti', 'model_b.cti'
+                                            ]
+        assert [row[2] for row in rows] == ['complete'] * 3 + ['running']
+        assert rows[2][5] == 3.
+
+    def test_datapoints(self, results_db):
+        """Ensure all datapoints stored, with NaN values as NULL.
+        """
+        with ResultsDatabase(results_db) as db:
+            count, = db.connection.execute(
+                'SELECT COUNT(*) FROM datapoints').fetchone()
+            first_stage = db.connection.execute(
+                'SELECT DISTINCT first_stage_delay FROM datapoints'
+                ).fetchall()
+        assert count == 4 * 5
+        assert first_stage == [(None,)]
+
+    def test_summarize_latest(self, results_db):
+        """Ensure only latest complete run of each model summarized.
+        """
+        with ResultsDatabase(results_db) as db:
+            header, rows = summarize(db.connection, temperature_range=(None, 950.))
+        assert header == ['model', 'datapoints', 'no ignition', 'skipped',
+                          'timed out', 'failed', 'error function',
+                          'absolute deviation'
+                          ]
+        assert [row[:6] for row in rows] == [('model_a.cti', 2, 1, 0, 0, 0),
+                                             ('model_b.cti', 2, 1, 0, 0, 0)
+                                             ]
+        # No ignition at 900 K
+        assert rows[1][6] == float('inf')
+
+        with ResultsDatabase(results_db) as db:
+            header, rows = summarize(db.connection, all_runs=True)
+        assert [row[1] for row in rows] == [5, 15]
+
+    def test_summarize_pressure(self, results_db):
+        """Ensure datapoints selected by pressure, in atm.
+        """
+        with ResultsDatabase(results_db) as db:
+            header, rows = summarize(db.connection, by='dataset',
+                                     pressure_range=(40., None),
+                                     models=['model_b.cti']
+                                     )
+        assert [row[:3] for row in rows] == [('high.yaml', 3, 1)]
+
+    def test_summarize_dataset_average(self, results_db):
+        """Ensure error function of model is average of dataset averages.
+        """
+        with ResultsDatabase(results_db) as db:
+            header, rows = summarize(db.connection, models=['model_b.cti'],
+                                     temperature_range=(950., None)
+                                     )
+        # Errors of 9 and 0 at low pressure, and 36 at high pressure
+        assert rows[0][1] == 3
+        assert rows[0][6] == pytest.approx((4.5 + 36.) / 2.)
+        assert rows[0][7] == pytest.approx((1.5 + 6.) / 2.)
+
+    def test_summarize_statuses(self, tmpdir):
+        """Ensure each status other than ok counted separately.
+        """
+        filename = str(tmpdir.join('results.db'))
+        with ResultsDatabase(filename) as db:
+            run_id = db.start_run('model.cti', 'datasets.txt', {})
+            with db.writer(run_id) as writer:
+                writer.write(dataset_results(
+                    'model.cti', 'a.yaml', 0, [1000.] * 3, [1.e6] * 3,
+                    [1.e-3] * 3, [1.e-3, 0., 0.]
+                    ))
+                writer.write(dataset_results(
+                    'model.cti', 'b.yaml', 1, [1000.] * 2, [1.e6] * 2,
+                    [1.e-3] * 2
+                    ))
+                for idx, status in enumerate(['timed-out', 'failed', 'failed']):
+                    writer.write(dataset_results(
+                        'model.cti', 'c.yaml', 2, [1000.], [1.e6], [1.e-3],
+                        [numpy.nan], status=status, datapoint_ids=[idx]
+                        ))
+            db.finish_run(run_id, {})
+
+            header, rows = summarize(db.connection)
+            assert rows[0][:6] == ('model.cti', 8, 2, 2, 1, 2)
+
+            header, rows = summarize(db.connection, by='dataset')
+        assert [row[:6] for row in rows] == [('a.yaml', 3, 2, 0, 0, 0),
+                                             ('b.yaml', 2, 0, 2, 0, 0),
+                                             ('c.yaml', 3, 0, 0, 1, 2)
+                                             ]
+
+    def test_format_table(self):
+        text = format_table(['model', 'error'], [('a', 1.23456789), ('bc', 2.)])
+        assert text.splitlines() == ['model  error', 'a      1.23457',
+                                     'bc     2'
+                                     ]
+
+    def test_query_command(self, results_db, capsys):
+        """Ensure query command prints summary.
+        """
+        assert main(['query', results_db, '--min-pressure', '40']) == 0
+        lines = capsys.readouterr()[0].splitlines()
+        assert lines[0].split()[0] == 'model'
+        assert [line.split()[:3] for line in lines[1:]] == [
+            ['model_a.cti', '3', '1'], ['model_b.cti', '3', '1']
+            ]
+
+        assert main(['query', results_db, '--sql',
+                     'SELECT COUNT(*) AS num FROM runs']) == 0
+        assert capsys.readouterr()[0].split() == ['num', '4']
+
+    def test_latest_results(self, results_db):
+        """Ensure datapoints of latest complete run of each dataset returned.
+        """
+        with ResultsDatabase(results_db) as db:
+            results = db.latest_results('model_b.cti')
+            assert db.latest_results('model_c.cti') == {}
+        assert sorted(results) == ['high.yaml', 'low.yaml']
+        high = results['high.yaml']
+        numpy.testing.assert_array_equal(high['datapoint'], [0, 1, 2])
+        numpy.testing.assert_allclose(high['simulated_delay'],
+                                      [1.e-3, 0., 1.e-3 * numpy.exp(6.)]
+                                      )
+        assert numpy.all(numpy.isnan(high['first_stage_delay']))
+        assert list(high['status']) == ['ok', 'no-ignition', 'ok']
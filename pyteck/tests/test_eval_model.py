@@ -5,6 +5,11 @@ from __future__ import division
 # Standard libraries
 import os
 import pkg_resources
+import sqlite3
+import json
+import shutil
+import copy
+from collections import namedtuple
 
 # Third-party libraries
 import numpy
@@ -36,8 +41,10 @@ except ImportError:
 
 # Local imports
 from .. import eval_model
-from ..simulation import Simulation
-from ..utils import units
+from ..simulation import Simulation, CaseSpec
+from ..results import read_results_table
+from ..database import summarize, list_runs
+from ..utils import units, import_cantera, yaml_load, yaml_dump
 from ..exceptions import UndefinedKeywordError
 
 
@@ -104,6 +111,76 @@ class TestEstimateStandardDeviation:
         assert standard_dev == eval_model.min_deviation
 
 
+class TestSimulationWorker:
+    """
+    """
+    def relative_location(self, file):
+        file_path = os.path.join(file)
+        return pkg_resources.resource_filename(__name__, file_path)
+
+    def test_shared_data(self):
+        """Ensure case run from spec and shared data gives same ignition delay.
+        """
+        filename = self.relative_location('testfile_st.yaml')
+        properties = ChemKED(filename)
+        simulations = eval_model.create_simulations(filename, properties)
+        species_names = sorted(set(name for name, _ in simulations[0].composition))
+
+        with TemporaryDirectory() as temp_dir:
+            eval_model.initialize_worker(
+                {}, {'model files': ['h2o2.cti'], 'species names': species_names,
+                     'species key': {'H2': 'H2', 'O2': 'O2', 'Ar': 'AR'},
+                     'species indices': [None], 'results path': temp_dir,
+                     'restart': False, 'limits': {},
+                     })
+            spec = CaseSpec(simulations[0],
+                            {name: idx for idx, name in enumerate(species_names)}
+                            )
+            sim = eval_model.simulation_worker(spec)
+            assert not hasattr(sim, 'gas')
+            sim.process_results()
+
+            reference = simulations[0]
+            reference.setup_case('h2o2.cti', {'H2': 'H2', 'O2': 'O2', 'Ar': 'AR'},
+                                 os.path.join(temp_dir, 'reference')
+                                 )
+            os.makedirs(os.path.join(temp_dir, 'reference'))
+            reference.run_case()
+            reference.process_results()
+
+        assert (sim.meta['simulated-ignition-delay'] ==
+                reference.meta['simulated-ignition-delay']
+                )
+
+
+class TestErrorAccumulator:
+    """
+    """
+    def test_same_as_arrays(self):
+        """Ensure running sums match error functions of whole dataset.
+        """
+        rng = numpy.random.RandomState(0)
+        exp = rng.uniform(1.e-4, 1.e-2, 50)
+        sim = exp * numpy.exp(rng.normal(0., 0.5, 50))
+        sim[3] = numpy.nan
+
+        accumulator = eval_model.ErrorAccumulator(0.2)
+        for idx in rng.permutation(50):
+            accumulator.add(exp[idx], sim[idx])
+
+        error_func, dev_func = eval_model.dataset_error_functions(exp, sim, 0.2)
+        assert accumulator.count == 49
+        assert numpy.isclose(accumulator.error_function, error_func)
+        assert numpy.isclose(accumulator.deviation_function, dev_func)
+
+    def test_no_ignition(self):
+        accumulator = eval_model.ErrorAccumulator(0.1)
+        assert numpy.isnan(accumulator.error_function)
+        accumulator.add(1.e-3, 0.)
+        assert accumulator.error_function == numpy.inf
+        assert accumulator.deviation_function == -numpy.inf
+
+
 class TestGetChangingVariable:
     """
     """
@@ -193,9 +270,169 @@ class TestGetChangingVariable:
         assert len(variable) == num
         assert numpy.allclose(variable, [c.temperature.magnitude for c in cases])
 
+class TestShareVolumeHistories:
+    """
+    """
+    def relative_location(self, file):
+        file_path = os.path.join(file)
+        return pkg_resources.resource_filename(__name__, file_path)
+
+    def test_shared_rcm_history(self):
+        """Ensure identical RCM volume histories share one profile.
+        """
+        filename = self.relative_location('testfile_rcm.yaml')
+        properties = ChemKED(filename)
+        properties.datapoints.append(ChemKED(filename).datapoints[0])
+
+        simulations = eval_model.create_simulations(filename, properties)
+        volume_profiles = eval_model.share_volume_histories(simulations)
+
+        assert len(volume_profiles) == 1
+        key = list(volume_profiles.keys())[0]
+        for sim in simulations:
+            assert sim.meta['volume-history'] == key
+            assert sim.properties.volume_history is None
+
+    def test_no_volume_history(self):
+        """Ensure shock tube cases are unaffected.
+        """
+        filename = self.relative_location('testfile_st.yaml')
+        properties = ChemKED(filename)
+
+        simulations = eval_model.create_simulations(filename, properties)
+        volume_profiles = eval_model.share_volume_histories(simulations)
+
+        assert volume_profiles == {}
+        assert all(['volume-history' not in sim.meta for sim in simulations])
+
+
+class TestCaseKey:
+    """
+    """
+    def simulations(self):
+        file_path = os.path.join('testfile_st.yaml')
+        filename = pkg_resources.resource_filename(__name__, file_path)
+        return eval_model.create_simulations(filename, ChemKED(filename))
+
+    def test_quantize(self):
+        assert eval_model.quantize(None, 1.e-6) is None
+        assert eval_model.quantize(0., 1.e-6) == 0
+        assert (eval_model.quantize(1000., 1.e-6) ==
+                eval_model.quantize(1000. * (1. + 1.e-8), 1.e-6)
+                )
+        assert (eval_model.quantize(1000., 1.e-6) !=
+                eval_model.quantize(1000. * (1. + 1.e-4), 1.e-6)
+                )
+        assert eval_model.quantize(-2., 1.e-6) < 0
+        assert eval_model.quantize(0.25, 0.1, relative=False) == 2
+
+    def test_identical(self):
+        """Ensure key independent of dataset, order and scale of composition.
+        """
+        sim_a = self.simulations()[0]
+        sim_b = self.simulations()[0]
+        sim_b.meta['id'] = 'other_0'
+        sim_b.ignition_delay *= 2.
+        sim_b.composition = [(name, 100. * amount)
+                             for name, amount in reversed(sim_b.composition)
+                             ]
+        assert (eval_model.case_key(sim_a, 'h2o2.cti') ==
+                eval_model.case_key(sim_b, 'h2o2.cti')
+                )
+
+    def test_different(self):
+        sims = self.simulations()
+        keys = set(eval_model.case_key(sim, 'h2o2.cti') for sim in sims)
+        assert len(keys) == len(sims)
+        assert (eval_model.case_key(sims[0], 'h2o2.cti') !=
+                eval_model.case_key(sims[0], 'h2o2-variant.cti')
+                )
+        sim = self.simulations()[0]
+        sim.pressure_rise = 10.
+        assert (eval_model.case_key(sim, 'h2o2.cti') !=
+                eval_model.case_key(sims[0], 'h2o2.cti')
+                )
+
+    def test_share_result(self):
+        """Ensure results shared only if end time and definition covered.
+        """
+        simulated, sim = self.simulations()[:2]
+        simulated.meta.update({'simulated-ignition-delay': 1.e-4 * units.second,
+                               'simulated-first-stage-delay': numpy.nan * units.second,
+                               'ignition-definition': 'pressure d/dt max',
+                               'ignition-delays': {'pressure d/dt max': [1.e-4, numpy.nan],
+                                                   'OH max': [1.1e-4, 5.e-5],
+                                                   },
+                               'telemetry': {'steps': 100},
+                               })
+        simulated.ignition_delay = 2. * sim.ignition_delay
+        result = eval_model.case_result(simulated, 'pressure d/dt max')
+        assert 'telemetry' not in result['meta']
+
+        shared = eval_model.share_result(result, sim, 'OH max')
+        assert shared is sim
+        assert sim.meta['id'] == 'testfile_st_1'
+        assert sim.meta['duplicate of'] == 'testfile_st_0'
+        assert sim.meta['simulated-ignition-delay'].magnitude == 1.1e-4
+        assert sim.meta['simulated-first-stage-delay'].magnitude == 5.e-5
+        assert 'telemetry' not in sim.meta
+        # shared results unchanged
+        assert result['meta']['ignition-definition'] == 'pressure d/dt max'
+
+        sim = self.simulations()[1]
+        assert eval_model.share_result(result, sim, 'CH max') is None
+        result['ignition delay'] = 0.5 * sim.ignition_delay
+        assert eval_model.share_result(result, sim, 'pressure d/dt max') is None
+
+
+class TestResolveModelFiles:
+    """
+    """
+    model_variant = {'model.cti': {'bath gases': {'N2': '_N2', 'Ar': '_Ar'},
+                                   'pressures': {'1': '_1atm', '10': '_10atm',
+                                                 '100': '_100atm'
+                                                 },
+                                   }
+                     }
+
+    def case(self, composition, pressure):
+        return namedtuple('Case', ['composition', 'pressure'])(composition, pressure)
+
+    def test_no_variants(self):
+        """Ensure same model file used for all cases without variants.
+        """
+        cases = [self.case([('H2', 0.1)], 101325.)] * 3
+        assert (eval_model.resolve_model_files('other.cti', 'models',
+                                               self.model_variant, cases
+                                               ) ==
+                [os.path.join('models', 'other.cti')] * 3
+                )
+
+    def test_variants(self):
+        """Ensure closest pressure and predominant bath gas chosen per case.
+        """
+        cases = [self.case([('H2', 0.1), ('N2', 0.9)], 101325.),
+                 self.case([('H2', 0.1), ('N2', 0.3), ('Ar', 0.6)], 4.e6),
+                 self.case([('H2', 0.1), ('N2', 0.6), ('Ar', 0.3)], 2.e7),
+                 self.case([('H2', 0.1), ('He', 0.9)], 6.e5),
+                 ]
+        model_files = eval_model.resolve_model_files('model.cti', '',
+                                                     self.model_variant, cases
+                                                     )
+        assert model_files == ['model.cti_N2_1atm', 'model.cti_Ar_10atm',
+                               'model.cti_N2_100atm', 'model.cti_Ar_10atm'
+                               ]
+
+
 class TestEvalModel:
     """
     """
+    @pytest.fixture(autouse=True)
+    def working_directory(self, tmpdir, monkeypatch):
+        """Run in temporary directory, where results file is written.
+        """
+        monkeypatch.chdir(str(tmpdir))
+
     def relative_location(self, file):
         file_path = os.path.join(file)
         return pkg_resources.resource_filename(__name__, file_path)
@@ -217,3 +454,381 @@ class TestEvalModel:
             assert numpy.isclose(output['average error function'], 58.78211242028232, rtol=1.e-3)
             assert numpy.isclose(output['error function standard deviation'], 0.0, rtol=1.e-3)
             assert numpy.isclose(output['average deviation function'], 7.635983785416241, rtol=1.e-3)
+
+    def test_telemetry(self):
+        """Ensure costs of each case added to telemetry of results path.
+        """
+        with TemporaryDirectory() as temp_dir:
+            for _ in range(2):
+                eval_model.evaluate_model(
+                                      'h2o2.cti',
+                                      self.relative_location('spec_keys.yaml'),
+                                      self.relative_location('dataset_file.txt'),
+                                      data_path=self.relative_location(''),
+                                      model_path='',
+                                      results_path=temp_dir,
+                                      num_threads=1
+                                      )
+            with open(os.path.join(temp_dir, eval_model.telemetry_file), 'r') as f:
+                records = [json.loads(line) for line in f]
+
+        # appended by each run
+        assert len(records) == 10
+        assert sorted(record['case'] for record in records[:5]) == [
+            'testfile_st_' + str(idx) for idx in range(5)
+            ]
+        for record in records:
+            assert record['model'] == 'h2o2.cti'
+            assert record['dataset'] == 'testfile_st.yaml'
+            assert record['status'] == 'ok'
+            assert record['species'] == 10
+            assert record['rows'] == record['steps'] + 1
+            assert record['wall time'] > 0.
+            assert record['file size'] > 0
+            assert record['max time step'] is None
+
+    def test_events(self):
+        """Ensure progress events written for each case.
+        """
+        with TemporaryDirectory() as temp_dir:
+            events_file = os.path.join(temp_dir, 'events.jsonl')
+            output = eval_model.evaluate_model(
+                                      'h2o2.cti',
+                                      self.relative_location('spec_keys.yaml'),
+                                      self.relative_location('dataset_file.txt'),
+                                      data_path=self.relative_location(''),
+                                      model_path='',
+                                      results_path=temp_dir,
+                                      num_threads=2,
+                                      events=events_file
+                                      )
+            with open(events_file, 'r') as f:
+                events = [json.loads(line) for line in f]
+
+        assert [event['event'] for event in events] == (
+            ['run-start', 'dataset-start'] + ['case'] * 5 +
+            ['dataset-end', 'run-end']
+            )
+        cases = [event for event in events if event['event'] == 'case']
+        assert sorted(event['case'] for event in cases) == [
+            'testfile_st_' + str(idx) for idx in range(5)
+            ]
+        assert [event['remaining'] for event in cases] == [4, 3, 2, 1, 0]
+        assert all(event['active workers'] <= 2 for event in cases)
+        assert all(event['steps'] > 0 for event in cases)
+        assert events[-1]['average error function'] == output['average error function']
+
+    def test_events_stdout(self, capfd):
+        """Ensure only events on standard output, and other output on standard error.
+        """
+        with TemporaryDirectory() as temp_dir:
+            output = eval_model.evaluate_model(
+                                      'h2o2.cti',
+                                      self.relative_location('spec_keys.yaml'),
+                                      self.relative_location('dataset_file.txt'),
+                                      data_path=self.relative_location(''),
+                                      model_path='',
+                                      results_path=temp_dir,
+                                      num_threads=2,
+                                      print_results=True,
+                                      events='-',
+                                      results_file=os.path.join(temp_dir, 'results.yaml')
+                                      )
+        out, err = capfd.readouterr()
+        events = [json.loads(line) for line in out.splitlines()]
+        assert [event['event'] for event in events] == (
+            ['run-start', 'dataset-start'] + ['case'] * 5 +
+            ['dataset-end', 'run-end']
+            )
+        assert events[-1]['average error function'] == output['average error function']
+        assert 'overall error function' in err
+        assert 'Done with case' not in err
+
+    def test_ignition_definitions(self):
+        """Ensure other ignition definitions stored, with reported unchanged.
+        """
+        with TemporaryDirectory() as temp_dir:
+            output = eval_model.evaluate_model(
+                                      'h2o2.cti',
+                                      self.relative_location('spec_keys.yaml'),
+                                      self.relative_location('dataset_file.txt'),
+                                      data_path=self.relative_location(''),
+                                      model_path='',
+                                      results_path=temp_dir,
+                                      num_threads=2,
+                                      ignition_definitions=[
+                                          {'target': 'temperature', 'type': 'd/dt max'},
+                                          {'target': 'OH*', 'type': 'max'},
+                                          {'target': 'CH', 'type': 'max'},
+                                          ]
+                                      )
+        assert numpy.isclose(output['average error function'], 58.78211242028232, rtol=1.e-3)
+        for datapoint in output['datasets'][0]['datapoints']:
+            assert datapoint['ignition definition'] == 'pressure d/dt max'
+            # CH not in model; OH* found as OH
+            delays = datapoint['ignition delays']
+            assert sorted(delays) == ['OH* max', 'pressure d/dt max',
+                                      'temperature d/dt max'
+                                      ]
+            assert (delays['pressure d/dt max']['ignition delay'] ==
+                    datapoint['simulated ignition delay']
+                    )
+            reported = units.Quantity(delays['pressure d/dt max']['ignition delay'])
+            for name in ['OH* max', 'temperature d/dt max']:
+                delay = units.Quantity(delays[name]['ignition delay'])
+                assert numpy.isclose(delay.magnitude, reported.magnitude, rtol=0.1)
+
+    def write_duplicate_datasets(self, temp_dir):
+        """Write dataset with a repeated datapoint, and a copy of the dataset
+        with composition in mole percent and a different ignition definition.
+        """
+        with open(self.relative_location('testfile_st.yaml'), 'r') as f:
+            dataset = yaml_load(f)
+        repeated = copy.deepcopy(dataset['datapoints'][0])
+        repeated['ignition-delay'] = ['600 us']
+        dataset['datapoints'].append(repeated)
+        with open(os.path.join(temp_dir, 'a.yaml'), 'w') as f:
+            yaml_dump(dataset, f)
+
+        with open(self.relative_location('testfile_st.yaml'), 'r') as f:
+            dataset = yaml_load(f)
+        for datapoint in dataset['datapoints']:
+            datapoint['composition'] = copy.deepcopy(datapoint['composition'])
+            datapoint['composition']['kind'] = 'mole percent'
+            for species in datapoint['composition']['species']:
+                species['amount'] = [100. * species['amount'][0]]
+            datapoint['ignition-type'] = {'target': 'temperature',
+                                          'type': 'd/dt max'
+                                          }
+        with open(os.path.join(temp_dir, 'b.yaml'), 'w') as f:
+            yaml_dump(dataset, f)
+
+        dataset_file = os.path.join(temp_dir, 'datasets.txt')
+        with open(dataset_file, 'w') as f:
+            f.write('a.yaml\nb.yaml\n')
+        return dataset_file
+
+    def test_deduplication(self):
+        """Ensure identical cases simulated once, within and across datasets.
+        """
+        with TemporaryDirectory() as temp_dir:
+            dataset_file = self.write_duplicate_datasets(temp_dir)
+            results_path = os.path.join(temp_dir, 'results')
+            output = eval_model.evaluate_model(
+                                      'h2o2.cti',
+                                      self.relative_location('spec_keys.yaml'),
+                                      dataset_file,
+                                      data_path=temp_dir,
+                                      model_path='',
+                                      results_path=results_path,
+                                      num_threads=2
+                                      )
+            with open(os.path.join(results_path, eval_model.telemetry_file), 'r') as f:
+                assert len(f.read().splitlines()) == 5
+
+            output_all = eval_model.evaluate_model(
+                                      'h2o2.cti',
+                                      self.relative_location('spec_keys.yaml'),
+                                      dataset_file,
+                                      data_path=temp_dir,
+                                      model_path='',
+                                      results_path=results_path,
+                                      num_threads=2,
+                                      deduplicate=False
+                                      )
+
+        assert output['deduplication'] == {'cases': 11, 'simulated cases': 5,
+                                           'ratio': 2.2
+                                           }
+        assert output_all['deduplication']['simulated cases'] == 11
+
+        # Repeated datapoint simulated once, by case with longer end time
+        datapoints = output['datasets'][0]['datapoints']
+        assert datapoints[0]['duplicate of'] == 'a_5'
+        assert 'duplicate of' not in datapoints[5]
+        assert (datapoints[0]['simulated ignition delay'] ==
+                datapoints[5]['simulated ignition delay']
+                )
+
+        # Copied dataset shares results, with its own ignition definition
+        for idx, datapoint in enumerate(output['datasets'][1]['datapoints']):
+            assert datapoint['duplicate of'] in ['a_' + str(idx), 'a_5']
+            assert datapoint['ignition definition'] == 'temperature d/dt max'
+            assert (datapoint['simulated ignition delay'] ==
+                    datapoint['ignition delays']['temperature d/dt max']['ignition delay']
+                    )
+
+        for dataset, dataset_all in zip(output['datasets'], output_all['datasets']):
+            assert numpy.isclose(dataset['error function'],
+                                 dataset_all['error function'], rtol=1.e-3
+                                 )
+
+    def test_max_in_flight(self):
+        """Ensure results unchanged with one case in flight at a time.
+        """
+        with TemporaryDirectory() as temp_dir:
+            output = eval_model.evaluate_model(
+                                      'h2o2.cti',
+                                      self.relative_location('spec_keys.yaml'),
+                                      self.relative_location('dataset_file.txt'),
+                                      data_path=self.relative_location(''),
+                                      model_path='',
+                                      results_path=temp_dir,
+                                      num_threads=1,
+                                      max_in_flight=1
+                                      )
+        assert numpy.isclose(output['average error function'], 58.78211242028232, rtol=1.e-3)
+        assert numpy.isclose(output['average deviation function'], 7.635983785416241, rtol=1.e-3)
+        assert all(datapoint is not None for datapoint in
+                   output['datasets'][0]['datapoints']
+                   )
+
+    def test_max_steps(self):
+        """Ensure cases stopped at step limit marked as timed out.
+        """
+        with TemporaryDirectory() as temp_dir:
+            results_table = os.path.join(temp_dir, 'results.csv')
+            output = eval_model.evaluate_model(
+                                      'h2o2.cti',
+                                      self.relative_location('spec_keys.yaml'),
+                                      self.relative_location('dataset_file.txt'),
+                                      data_path=self.relative_location(''),
+                                      model_path='',
+                                      results_path=temp_dir,
+                                      num_threads=1,
+                                      results_table=results_table,
+                                      max_steps=5
+                                      )
+            columns = read_results_table(results_table)
+
+        num_datapoints = len(output['datasets'][0]['datapoints'])
+        assert len(output['timed out cases']) == num_datapoints
+        assert set(case['limit'] for case in output['timed out cases']) == set(['steps'])
+        assert set(columns['status']) == set(['timed-out'])
+        assert numpy.all(numpy.isnan(columns['simulated_delay']))
+        assert numpy.isnan(output['average error function'])
+
+    def test_failed_cases(self):
+        """Ensure failing cases retried, then recorded, without stopping run.
+        """
+        with TemporaryDirectory() as temp_dir:
+            # Species key without O2, so setting up each case fails
+            spec_keys_file = os.path.join(temp_dir, 'spec_keys.yaml')
+            with open(spec_keys_file, 'w') as f:
+                f.write('h2o2.cti:\n  H2: H2\n  Ar: AR\n')
+
+            output = eval_model.evaluate_model(
+                                      'h2o2.cti', spec_keys_file,
+                                      self.relative_location('dataset_file.txt'),
+                                      data_path=self.relative_location(''),
+                                      model_path='',
+                                      results_path=temp_dir,
+                                      num_threads=1,
+                                      retry_ladder=[{'rtol': 1.e-12}]
+                                      )
+
+        datapoints = output['datasets'][0]['datapoints']
+        assert len(output['case failures']) == len(datapoints)
+        for record in output['case failures']:
+            assert not record['recovered']
+            assert [attempt['solver settings'] for attempt in record['attempts']] == [
+                {}, {'rtol': 1.e-12}
+                ]
+            assert set(attempt['error'] for attempt in record['attempts']) == set(['KeyError'])
+        assert set(datapoint['status'] for datapoint in datapoints) == set(['failed'])
+        assert numpy.isnan(output['average error function'])
+
+    def test_compiled_mechanisms(self):
+        """Ensure compiled mechanism used for model file, with same results.
+        """
+        ct = import_cantera()
+        model_files = [os.path.join(path, 'h2o2.yaml')
+                       for path in ct.get_data_directories()
+                       if os.path.isfile(os.path.join(path, 'h2o2.yaml'))
+                       ]
+        if not model_files:
+            pytest.skip('h2o2.yaml model not found')
+
+        with TemporaryDirectory() as temp_dir:
+            model_path = os.path.join(temp_dir, 'models')
+            os.makedirs(model_path)
+            shutil.copy(model_files[0], model_path)
+            spec_keys_file = os.path.join(temp_dir, 'spec_keys.yaml')
+            with open(spec_keys_file, 'w') as f:
+                f.write('h2o2.yaml:\n  H2: H2\n  O2: O2\n  Ar: AR\n')
+
+            output = eval_model.evaluate_model(
+                                      'h2o2.yaml', spec_keys_file,
+                                      self.relative_location('dataset_file.txt'),
+                                      data_path=self.relative_location(''),
+                                      model_path=model_path,
+                                      results_path=temp_dir,
+                                      num_threads=1
+                                      )
+            compiled = os.listdir(os.path.join(temp_dir, 'compiled-mechanisms'))
+            assert sorted(os.path.splitext(name)[1] for name in compiled) == [
+                '.json', '.yaml'
+                ]
+        assert numpy.isclose(output['average error function'], 58.78211242028232, rtol=1.e-3)
+        assert numpy.isclose(output['average deviation function'], 7.635983785416241, rtol=1.e-3)
+
+    def test_results_table(self):
+        """Ensure results table has one row per datapoint, consistent with output.
+        """
+        with TemporaryDirectory() as temp_dir:
+            results_table = os.path.join(temp_dir, 'results.csv')
+            results_database = os.path.join(temp_dir, 'results.db')
+            output = eval_model.evaluate_model(
+                                      'h2o2.cti',
+                                      self.relative_location('spec_keys.yaml'),
+                                      self.relative_location('dataset_file.txt'),
+                                      data_path=self.relative_location(''),
+                                      model_path='',
+                                      results_path=temp_dir,
+                                      num_threads=1,
+                                      results_table=results_table,
+                                      results_database=results_database
+                                      )
+            columns = read_results_table(results_table)
+
+            connection = sqlite3.connect(results_database)
+            header, summary = summarize(connection)
+            runs = list_runs(connection)[1]
+            connection.close()
+
+        num_datapoints = sum(len(dataset['datapoints'])
+                             for dataset in output['datasets']
+                             )
+        assert len(columns['datapoint']) == num_datapoints
+        assert set(columns['model']) == set(['h2o2.cti'])
+        assert set(columns['status']) == set(['ok'])
+
+        for idx, dataset in enumerate(output['datasets']):
+            rows = columns['dataset_id'] == dataset['dataset_id']
+            assert numpy.isclose(numpy.nanmean(columns['error'][rows]),
+                                 dataset['error function']
+                                 )
+            assert numpy.isclose(numpy.nanmean(columns['deviation'][rows]),
+                                 dataset['absolute deviation']
+                                 )
+            for idx_dp, datapoint in enumerate(dataset['datapoints']):
+                row = numpy.where(rows & (columns['datapoint'] == idx_dp))[0][0]
+                assert numpy.isclose(
+                    columns['temperature'][row],
+                    units(datapoint['temperature']).to('kelvin').magnitude
+                    )
+                assert numpy.isclose(
+                    columns['simulated_delay'][row],
+                    units(datapoint['simulated ignition delay']).to('s').magnitude
+                    )
+
+        # Database has same datapoints, and overall results
+        assert len(summary) == 1
+        model, num, no_ignition, skipped, timed_out, failed, error, deviation = summary[0]
+        assert (model, num, no_ignition, skipped, timed_out, failed) == (
+            'h2o2.cti', num_datapoints, 0, 0, 0, 0
+            )
+        assert numpy.isclose(error, numpy.nanmean(columns['error']))
+        assert len(runs) == 1
+        assert runs[0][2] == 'complete'
+        assert numpy.isclose(runs[0][5], output['average error function'])
@@ -0,0 +1,73 @@
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import sys
+import subprocess
+
+import pytest
+
+heavy_modules = ['cantera', 'tables', 'scipy', 'pint', 'yaml', 'pyked']
+"""list(str): dependencies that should only be imported when needed"""
+
+import_time_budget = 0.2
+"""float: maximum time in seconds for importing :mod:`pyteck`"""
+
+
+def imported_modules(args):
+    """Run Python with ``-X importtime`` and return imported modules with times.
+
+    Parameters
+    ----------
+    args : list(str)
+        Arguments passed to the Python interpreter
+
+    Returns
+    -------
+    modules : dict
+        Cumulative import time in seconds, keyed by module name
+
+    """
+    output = subprocess.run([sys.executable, '-X', 'importtime'] + args,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            universal_newlines=True, check=True
+                            ).stderr
+
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = float(cumulative) * 1.e-6
+    return modules
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='requires -X importtime')
+class TestImport:
+    """
+    """
+    def test_no_heavy_imports(self):
+        """Ensure importing pyteck does not import heavy dependencies.
+        """
+        modules = imported_modules(['-c', 'import pyteck'])
+        assert 'pyteck' in modules
+        for module in heavy_modules:
+            assert module not in modules
+
+    def test_help_no_heavy_imports(self):
+        """Ensure command-line help does not import heavy dependencies.
+        """
+        modules = imported_modules(['-m', 'pyteck', '--help'])
+        for module in heavy_modules:
+            assert module not in modules
+
+    @pytest.mark.benchmark
+    def test_import_time(self):
+        """Ensure importing pyteck stays within time budget.
+
+        Wall time depends on the machine and its load, so this only runs with
+        the benchmarks; the tests above check the imports themselves.
+        """
+        modules = imported_modules(['-c', 'import pyteck'])
+        assert modules['pyteck'] < import_time_budget
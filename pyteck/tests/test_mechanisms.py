@@ -0,0 +1,221 @@
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import os
+import json
+import shutil
+import pkg_resources
+
+import numpy
+import pytest
+from pyked.chemked import ChemKED
+
+# Local imports
+from ..mechanisms import (find_species_target, compile_mechanism,
+                          compiled_filenames
+                          )
+from ..eval_model import create_simulations, compile_model
+from ..utils import import_cantera, yaml_load
+from ..__main__ import main
+
+species_key = {'H2': 'H2', 'O2': 'O2', 'Ar': 'AR'}
+
+
+def relative_location(file):
+    file_path = os.path.join(file)
+    return pkg_resources.resource_filename(__name__, file_path)
+
+
+@pytest.fixture
+def h2o2_model(tmpdir):
+    """Copy of hydrogen model included with Cantera.
+    """
+    ct = import_cantera()
+    for path in ct.get_data_directories():
+        for name in ['h2o2.yaml', 'h2o2.cti']:
+            if os.path.isfile(os.path.join(path, name)):
+                model_file = str(tmpdir.join(name))
+                shutil.copy(os.path.join(path, name), model_file)
+                return model_file
+    pytest.skip('h2o2 model not found')
+
+
+@pytest.fixture
+def gri30_model(tmpdir):
+    """Copy of GRI-Mech 3.0 model included with Cantera.
+    """
+    ct = import_cantera()
+    for path in ct.get_data_directories():
+        if os.path.isfile(os.path.join(path, 'gri30.yaml')):
+            model_file = str(tmpdir.join('gri30.yaml'))
+            shutil.copy(os.path.join(path, 'gri30.yaml'), model_file)
+            return model_file
+    pytest.skip('gri30 model not found')
+
+
+class TestFindSpeciesTarget:
+    """
+    """
+    def test_found(self):
+        assert find_species_target('OH', ['H2', 'O2', 'OH']) == 2
+
+    def test_lower_case(self):
+        assert find_species_target('OH', ['h2', 'o2', 'oh']) == 2
+
+    def test_excited(self):
+        """Ensure excited species preferred, with fallback to nonexcited.
+        """
+        assert find_species_target('OH*', ['OH', 'OH*']) == 1
+        assert find_species_target('OH*', ['OH', 'H2']) == 0
+
+    def test_first_species(self):
+        assert find_species_target('OH', ['OH', 'H2']) == 0
+
+    def test_missing(self):
+        assert find_species_target('CH*', ['OH', 'H2']) is None
+
+
+class TestCompileMechanism:
+    """
+    """
+    def test_compile(self, h2o2_model, tmpdir):
+        """Ensure compiled mechanism has no transport data, and same species.
+        """
+        cache_path = str(tmpdir.join('compiled'))
+        mechanism_file, species_indices = compile_mechanism(
+            h2o2_model, species_key, cache_path
+            )
+        assert os.path.dirname(mechanism_file) == cache_path
+
+        with open(mechanism_file, 'r') as f:
+            mechanism = yaml_load(f)
+        assert all('transport' not in phase for phase in mechanism['phases'])
+        assert all('transport' not in species for species in mechanism['species'])
+
+        ct = import_cantera()
+        gas = ct.Solution(mechanism_file, transport_model=None)
+        for name in species_key.values():
+            assert species_indices[name] == gas.species_index(name)
+        # excited species falls back on OH
+        assert species_indices['OH*'] == species_indices['OH'] == gas.species_index('OH')
+        assert 'CH' not in species_indices
+
+        if h2o2_model.endswith('.yaml'):
+            source = ct.Solution(h2o2_model)
+            assert gas.species_names == source.species_names
+            assert gas.n_reactions == source.n_reactions
+
+    def test_species_names(self, gri30_model, tmpdir):
+        """Ensure species names such as NO kept as names, not booleans.
+        """
+        mechanism_file, species_indices = compile_mechanism(
+            gri30_model, {'NO': 'NO', 'O2': 'O2'}, str(tmpdir.join('compiled'))
+            )
+        ct = import_cantera()
+        gas = ct.Solution(mechanism_file, transport_model=None)
+        source = ct.Solution(gri30_model)
+        assert gas.species_names == source.species_names
+        assert gas.n_reactions == source.n_reactions
+        assert species_indices['NO'] == source.species_index('NO')
+
+    def test_cached(self, h2o2_model, tmpdir):
+        """Ensure compiled mechanism reused until model or key changes.
+        """
+        cache_path = str(tmpdir.join('compiled'))
+        mechanism_file, species_indices = compile_mechanism(
+            h2o2_model, species_key, cache_path
+            )
+        modified = os.path.getmtime(mechanism_file)
+        os.utime(mechanism_file, (modified - 100., modified - 100.))
+
+        assert compile_mechanism(h2o2_model, species_key, cache_path) == (
+            mechanism_file, species_indices
+            )
+        assert os.path.getmtime(mechanism_file) == modified - 100.
+        assert sorted(os.listdir(cache_path)) == sorted(
+            [os.path.basename(mechanism_file),
+             os.path.basename(compiled_filenames(h2o2_model, species_key,
+                                                 cache_path
+                                                 )[1])
+             ])
+
+        # forced, or with another key, compiled again
+        compile_mechanism(h2o2_model, species_key, cache_path, force=True)
+        assert os.path.getmtime(mechanism_file) != modified - 100.
+
+        other_file, _ = compile_mechanism(h2o2_model, {'H2': 'H2'}, cache_path)
+        assert other_file != mechanism_file
+
+        with open(h2o2_model, 'a') as f:
+            f.write('\n')
+        assert compiled_filenames(h2o2_model, species_key, cache_path)[0] != mechanism_file
+
+    def test_index_file(self, h2o2_model, tmpdir):
+        cache_path = str(tmpdir.join('compiled'))
+        _, species_indices = compile_mechanism(h2o2_model, species_key, cache_path)
+        index_file = compiled_filenames(h2o2_model, species_key, cache_path)[1]
+        with open(index_file, 'r') as f:
+            index = json.load(f)
+        assert index['model'] == h2o2_model
+        assert index['species indices'] == species_indices
+
+    def test_setup_case(self, h2o2_model, tmpdir):
+        """Ensure case set up with compiled mechanism and species indices.
+        """
+        mechanism_file, species_indices = compile_mechanism(
+            h2o2_model, species_key, str(tmpdir.join('compiled'))
+            )
+        filename = relative_location('testfile_st.yaml')
+        cases = [create_simulations(filename, ChemKED(filename))[0]
+                 for _ in range(2)
+                 ]
+        cases[0].setup_case(h2o2_model, species_key, str(tmpdir))
+        cases[1].setup_case(mechanism_file, species_key, str(tmpdir),
+                            species_indices=species_indices
+                            )
+
+        numpy.testing.assert_allclose(cases[1].gas.X, cases[0].gas.X)
+        assert cases[1].gas.T == cases[0].gas.T
+        assert cases[1].gas.P == cases[0].gas.P
+        assert (cases[1].properties.ignition_target ==
+                cases[0].properties.ignition_target
+                )
+
+    def test_command(self, h2o2_model, tmpdir, capsys):
+        """Ensure command compiles models with species key of model.
+        """
+        model_path, model = os.path.split(h2o2_model)
+        spec_keys_file = str(tmpdir.join('spec_keys.yaml'))
+        with open(spec_keys_file, 'w') as f:
+            f.write(os.path.splitext(model)[0] + ':\n  H2: H2\n  O2: O2\n  Ar: AR\n')
+        cache_path = str(tmpdir.join('compiled'))
+
+        assert main(['compile-mechanism', model, '-mp', model_path, '-k',
+                     spec_keys_file, '-o', cache_path
+                     ]) == 0
+        mechanism_file = compiled_filenames(h2o2_model, species_key, cache_path)[0]
+        assert os.path.isfile(mechanism_file)
+        assert mechanism_file in capsys.readouterr()[0]
+
+
+class TestCompileModel:
+    """
+    """
+    def test_fallback(self, tmpdir, capsys):
+        """Ensure model used as is, with warning, if compiling fails.
+        """
+        model_file = str(tmpdir.join('broken.yaml'))
+        with open(model_file, 'w') as f:
+            f.write('phases:\n- name: gas\n  species: [H2, missing]\n')
+
+        assert compile_model(model_file, species_key, str(tmpdir.join('compiled'))
+                             ) == (model_file, None)
+        assert 'Warning: using ' + model_file + ' without compiling' in capsys.readouterr()[0]
+
+    def test_compiled(self, h2o2_model, tmpdir):
+        cache_path = str(tmpdir.join('compiled'))
+        assert compile_model(h2o2_model, species_key, cache_path) == (
+            compile_mechanism(h2o2_model, species_key, cache_path)
+            )
@@ -5,6 +5,9 @@ from __future__ import division
 # Standard libraries
 import os
 import pkg_resources
+import subprocess
+import sys
+import time
 
 import numpy as np
 import pytest
@@ -26,6 +29,11 @@ from .. import parse_files_XML
 from ..simulation import Simulation
 from ..utils import units
 
+try:
+    from tempfile import TemporaryDirectory
+except ImportError:
+    from backports.tempfile import TemporaryDirectory
+
 #pytestmark = pytest.mark.skip(reason="XML converter not completed")
 
 class TestExperimentType:
@@ -275,3 +283,269 @@ class TestDataGroups:
             6.68100309742E+001
             ]) * units.cm3
         np.testing.assert_allclose(properties['volume'], volumes)
+
+
+def read_experiment_tree(filename):
+    """Reference parse of the whole file, using the in-memory tree.
+    """
+    root = etree.parse(filename).getroot()
+
+    properties = {}
+    properties['id'] = os.path.splitext(os.path.basename(filename))[0]
+    properties['data-file'] = os.path.basename(filename)
+    properties.update(parse_files_XML.get_file_metadata(root))
+    properties['kind'] = parse_files_XML.get_experiment_kind(root)
+    properties = parse_files_XML.get_common_properties(properties, root)
+    properties['ignition'] = parse_files_XML.get_ignition_type(root)
+    properties = parse_files_XML.get_datapoints(properties, root)
+    if 'volume' in properties:
+        min_volume_idx = np.argmin(properties['volume'])
+        properties['compression-time'] = properties['time'][min_volume_idx]
+    return properties
+
+
+def write_large_rcm_file(filename, num_points):
+    """Write synthetic RCM file with long volume history.
+    """
+    file_path = os.path.join('testfile_rcm.xml')
+    with open(pkg_resources.resource_filename(__name__, file_path)) as f:
+        lines = f.readlines()
+
+    # Keep everything but the datapoints of the volume-history dataGroup
+    start = next(i for i, line in enumerate(lines) if 'id="dg2"' in line)
+    end = next(i for i, line in enumerate(lines) if i > start and
+               '</dataGroup>' in line
+               )
+    header = [line for line in lines[start:end] if 'dataPoint' not in line and
+              '<x4>' not in line and '<x5>' not in line
+              ]
+
+    time = np.linspace(0., 0.1, num_points)
+    volume = 50. + 500. * np.abs(time - 0.03)
+    with open(filename, 'w') as f:
+        f.writelines(lines[:start])
+        f.writelines(header)
+        for t, v in zip(time, volume):
+            f.write('        <dataPoint>\n'
+                    '            <x4>{:.12E}</x4>\n'
+                    '            <x5>{:.12E}</x5>\n'
+                    '        </dataPoint>\n'.format(t, v)
+                    )
+        f.writelines(lines[end:])
+
+
+def peak_memory(func_name, filename):
+    """Increase in peak resident memory (in kB) of a process parsing a file.
+
+    Uses the high-water mark from ``/proc``, so only available on Linux.
+    """
+    code = ('from pyteck.tests.test_parse_files_xml import *\n'
+            'def vm_hwm():\n'
+            '    with open("/proc/self/status") as f:\n'
+            '        line = [l for l in f if l.startswith("VmHWM")][0]\n'
+            '    return int(line.split()[1])\n'
+            'before = vm_hwm()\n'
+            '{}({!r})\n'
+            'print(vm_hwm() - before)\n'
+            ).format(func_name, filename)
+    output = subprocess.check_output([sys.executable, '-c', code])
+    return int(output.decode().split()[-1])
+
+
+class TestReadExperiment:
+    """
+    """
+    @pytest.mark.parametrize('file_path', ['testfile_st.xml',
+                                           'testfile_st2.xml',
+                                           'testfile_rcm.xml'
+                                           ])
+    def test_same_as_tree(self, file_path):
+        """Ensure incremental reader gives the same properties as full tree.
+        """
+        filename = pkg_resources.resource_filename(__name__, file_path)
+
+        properties = parse_files_XML.read_experiment(filename)
+        reference = read_experiment_tree(filename)
+
+        assert set(properties.keys()) == set(reference.keys())
+        for key in reference:
+            if isinstance(reference[key], units.Quantity):
+                assert properties[key].units == reference[key].units
+                np.testing.assert_array_equal(properties[key].magnitude,
+                                              reference[key].magnitude
+                                              )
+            else:
+                assert properties[key] == reference[key]
+
+    def test_missing_file(self):
+        """Ensure error raised for missing file.
+        """
+        with pytest.raises(OSError):
+            parse_files_XML.read_experiment('not-a-file.xml')
+
+    def test_invalid_datapoint(self):
+        """Ensure datapoint values are still validated.
+        """
+        file_path = os.path.join('testfile_st.xml')
+        filename = pkg_resources.resource_filename(__name__, file_path)
+        with open(filename) as f:
+            contents = f.read().replace('<x1>1164.48</x1>', '<x1>-1164.48</x1>')
+
+        with TemporaryDirectory() as temp_dir:
+            bad_file = os.path.join(temp_dir, 'testfile_st.xml')
+            with open(bad_file, 'w') as f:
+                f.write(contents)
+            with pytest.raises(RuntimeError):
+                parse_files_XML.read_experiment(bad_file)
+
+    @pytest.mark.benchmark
+    @pytest.mark.skipif(not os.path.isfile('/proc/self/status'),
+                        reason='requires /proc to measure memory'
+                        )
+    def test_large_file(self):
+        """Compare incremental and full-tree parsing of large RCM file.
+        """
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, 'testfile_rcm.xml')
+            write_large_rcm_file(filename, 50000)
+
+            start = time.time()
+            reference = read_experiment_tree(filename)
+            time_tree = time.time() - start
+
+            start = time.time()
+            properties = parse_files_XML.read_experiment(filename)
+            time_stream = time.time() - start
+
+            np.testing.assert_array_equal(properties['volume'].magnitude,
+                                          reference['volume'].magnitude
+                                          )
+
+            memory_tree = peak_memory('read_experiment_tree', filename)
+            memory_stream = peak_memory('parse_files_XML.read_experiment',
+                                        filename
+                                        )
+
+        print('Full tree: {:.2f} s, {} kB; incremental: {:.2f} s, {} kB'.format(
+              time_tree, memory_tree, time_stream, memory_stream
+              ))
+        assert memory_stream < memory_tree
+
+
+class TestConvertXMLFiles:
+    """
+    """
+    def copy_test_files(self, path):
+        """Copy XML test files into given directory.
+        """
+        for file_path in ['testfile_st.xml', 'testfile_st2.xml',
+                          'testfile_rcm.xml'
+                          ]:
+            filename = pkg_resources.resource_filename(__name__, file_path)
+            with open(filename) as f, open(os.path.join(path, file_path),
+                                           'w') as f_out:
+                f_out.write(f.read())
+
+    def test_find_files(self):
+        """Ensure directories and glob patterns are expanded.
+        """
+        with TemporaryDirectory() as temp_dir:
+            self.copy_test_files(temp_dir)
+            os.mkdir(os.path.join(temp_dir, 'sub'))
+            with open(os.path.join(temp_dir, 'sub', 'other.xml'), 'w') as f:
+                f.write('<experiment/>')
+
+            filenames = parse_files_XML.find_XML_files([temp_dir])
+            assert len(filenames) == 4
+
+            filenames = parse_files_XML.find_XML_files(
+                [os.path.join(temp_dir, 'testfile_st*.xml'),
+                 os.path.join(temp_dir, 'testfile_st.xml')
+                 ])
+            assert [os.path.basename(f) for f in filenames] == [
+                'testfile_st.xml', 'testfile_st2.xml'
+                ]
+
+    def test_incremental_conversion(self):
+        """Ensure unchanged files skipped, and changed files converted again.
+        """
+        with TemporaryDirectory() as temp_dir:
+            data_dir = os.path.join(temp_dir, 'data')
+            output = os.path.join(temp_dir, 'output')
+            os.mkdir(data_dir)
+            self.copy_test_files(data_dir)
+
+            summary = parse_files_XML.convert_XML_files([data_dir], output,
+                                                        num_threads=1
+                                                        )
+            assert len(summary['converted']) == 3
+            assert not summary['skipped'] and not summary['failed']
+            for name in ['testfile_st', 'testfile_st2', 'testfile_rcm']:
+                assert os.path.isfile(os.path.join(output, name + '.yaml'))
+            assert os.path.isfile(os.path.join(output,
+                                               'conversion-manifest.json'
+                                               ))
+
+            summary = parse_files_XML.convert_XML_files([data_dir], output,
+                                                        num_threads=1
+                                                        )
+            assert len(summary['skipped']) == 3
+            assert not summary['converted'] and not summary['failed']
+
+            # Changed file, and changed options
+            with open(os.path.join(data_dir, 'testfile_st.xml'), 'a') as f:
+                f.write('\n')
+            summary = parse_files_XML.convert_XML_files([data_dir], output,
+                                                        num_threads=1
+                                                        )
+            assert summary['converted'] == [os.path.join(data_dir,
+                                                         'testfile_st.xml'
+                                                         )]
+            summary = parse_files_XML.convert_XML_files(
+                [data_dir], output, file_author='Someone', num_threads=1
+                )
+            assert len(summary['converted']) == 3
+
+            # Missing output
+            os.remove(os.path.join(output, 'testfile_rcm.yaml'))
+            summary = parse_files_XML.convert_XML_files(
+                [data_dir], output, file_author='Someone', num_threads=1
+                )
+            assert summary['converted'] == [os.path.join(data_dir,
+                                                         'testfile_rcm.xml'
+                                                         )]
+
+    def test_failed_conversion(self):
+        """Ensure failed files reported, and tried again on next run.
+        """
+        with TemporaryDirectory() as temp_dir:
+            self.copy_test_files(temp_dir)
+            bad_file = os.path.join(temp_dir, 'bad.xml')
+            with open(bad_file, 'w') as f:
+                f.write('<experiment>')
+
+            summary = parse_files_XML.convert_XML_files([temp_dir], temp_dir,
+                                                        num_threads=2
+                                                        )
+            assert len(summary['converted']) == 3
+            assert list(summary['failed'].keys()) == [bad_file]
+
+            summary = parse_files_XML.convert_XML_files([temp_dir], temp_dir,
+                                                        num_threads=2
+                                                        )
+            assert len(summary['skipped']) == 3
+            assert list(summary['failed'].keys()) == [bad_file]
+
+    def test_duplicate_names(self):
+        """Ensure files that would overwrite each other are reported.
+        """
+        with TemporaryDirectory() as temp_dir:
+            for sub in ['a', 'b']:
+                os.mkdir(os.path.join(temp_dir, sub))
+                self.copy_test_files(os.path.join(temp_dir, sub))
+
+            summary = parse_files_XML.convert_XML_files(
+                [temp_dir], os.path.join(temp_dir, 'output'), num_threads=1
+                )
+            assert len(summary['converted']) == 3
+            assert len(summary['failed']) == 3
@@ -0,0 +1,271 @@
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import os
+import json
+import pkg_resources
+
+import numpy
+import pytest
+
+# Local imports
+from ..plan import (fit_coefficients, model_features, calibrate,
+                    estimate_cases, plan_evaluation, read_telemetry,
+                    default_calibration
+                    )
+from ..utils import yaml_load
+from ..__main__ import main
+
+
+def relative_location(file):
+    file_path = os.path.join(file)
+    return pkg_resources.resource_filename(__name__, file_path)
+
+
+def make_records(calibration, num_records=20):
+    """Telemetry records of cases following given coefficients exactly.
+    """
+    rng = numpy.random.RandomState(0)
+    records = []
+    for _ in range(num_records):
+        species = int(rng.randint(10, 200))
+        reactions = int(rng.randint(30, 1000))
+        end_time = float(rng.uniform(1.e-3, 1.e-1))
+        max_time_step = None
+        forced_steps = 0.
+        if rng.rand() < 0.5:
+            max_time_step = float(rng.uniform(1.e-6, 1.e-5))
+            forced_steps = end_time / max_time_step
+        steps = numpy.dot(calibration['steps'], [1., forced_steps])
+        step_time = numpy.dot(calibration['step time'],
+                              [1., reactions, species**2]
+                              )
+        file_size = numpy.dot(calibration['file size'],
+                              [1., 8. * (steps + 1) * (species + 4)]
+                              )
+        records.append({'status': 'ok', 'species': species,
+                        'reactions': reactions, 'end time': end_time,
+                        'max time step': max_time_step, 'steps': steps,
+                        'rows': steps + 1, 'wall time': steps * step_time,
+                        'file size': file_size,
+                        'peak memory': numpy.dot(calibration['peak memory'],
+                                                 [1., reactions, species**2]
+                                                 ),
+                        })
+    return records
+
+
+class TestFitCoefficients:
+    """
+    """
+    def test_least_squares(self):
+        features = model_features(numpy.array([10., 50., 100., 20.]),
+                                  numpy.array([30., 300., 500., 900.])
+                                  )
+        values = features.dot([1., 2., 3.])
+        numpy.testing.assert_allclose(
+            fit_coefficients(features, values, [1., 1., 1.]), [1., 2., 3.]
+            )
+
+    def test_scaled_default(self):
+        """Ensure default scaled if measurements cannot determine all.
+        """
+        features = model_features(numpy.array([10., 10.]),
+                                  numpy.array([30., 30.])
+                                  )
+        values = 2. * features.dot([1., 2., 3.])
+        numpy.testing.assert_allclose(
+            fit_coefficients(features, values, [1., 2., 3.]), [2., 4., 6.]
+            )
+
+    def test_no_measurements(self):
+        assert fit_coefficients(numpy.zeros((0, 2)), numpy.zeros(0),
+                                [1., 2.]) == [1., 2.]
+
+
+class TestCalibrate:
+    """
+    """
+    def test_default(self):
+        assert calibrate([]) == default_calibration
+
+    def test_recovered(self):
+        """Ensure coefficients recovered from telemetry that follows them.
+        """
+        calibration = {'steps': [800., 1.5],
+                       'step time': [1.e-5, 2.e-6, 3.e-8],
+                       'file size': [3.e4, 1.2],
+                       'peak memory': [1.e8, 1.e4, 200.],
+                       }
+        fit = calibrate(make_records(calibration))
+        for key in calibration:
+            numpy.testing.assert_allclose(fit[key], calibration[key], rtol=1.e-6)
+
+    def test_timed_out_ignored(self):
+        records = make_records(default_calibration, 4)
+        for record in records:
+            record['status'] = 'timed-out'
+            record['steps'] = 10.
+        assert calibrate(records) == default_calibration
+
+    def test_read_telemetry(self, tmpdir):
+        records = make_records(default_calibration, 3)
+        filename = str(tmpdir.join('telemetry.jsonl'))
+        with open(filename, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        missing = str(tmpdir.join('missing.jsonl'))
+        assert read_telemetry([filename, missing]) == records
+
+
+class TestEstimateCases:
+    """
+    """
+    def test_forced_steps(self):
+        """Ensure steps increase with horizon over maximum time step.
+        """
+        estimates = estimate_cases(numpy.array([10., 10.]),
+                                   numpy.array([30., 30.]),
+                                   numpy.array([0.1, 0.1]),
+                                   numpy.array([numpy.nan, 1.e-5])
+                                   )
+        steps = default_calibration['steps']
+        numpy.testing.assert_allclose(estimates['steps'],
+                                      [steps[0], steps[0] + steps[1] * 1.e4]
+                                      )
+        assert estimates['cpu time'][1] > estimates['cpu time'][0]
+        assert estimates['file size'][1] > estimates['file size'][0]
+        assert estimates['peak memory'][1] == estimates['peak memory'][0]
+
+    def test_limits(self):
+        estimates = estimate_cases(numpy.array([10.]), numpy.array([30.]),
+                                   numpy.array([0.1]), numpy.array([1.e-5]),
+                                   max_steps=500
+                                   )
+        assert estimates['steps'][0] == 500.
+        estimates = estimate_cases(numpy.array([10.]), numpy.array([30.]),
+                                   numpy.array([0.1]), numpy.array([1.e-5]),
+                                   max_rows=100
+                                   )
+        assert estimates['steps'][0] == 99.
+
+    def test_model_size(self):
+        estimates = estimate_cases(numpy.array([10., 100.]),
+                                   numpy.array([30., 1000.]),
+                                   numpy.array([0.1, 0.1]),
+                                   numpy.array([numpy.nan, numpy.nan])
+                                   )
+        assert estimates['cpu time'][1] > estimates['cpu time'][0]
+        assert estimates['peak memory'][1] > estimates['peak memory'][0]
+
+
+class TestPlanEvaluation:
+    """
+    """
+    @pytest.fixture
+    def dataset_file(self, tmpdir):
+        filename = str(tmpdir.join('datasets.txt'))
+        with open(filename, 'w') as f:
+            f.write('testfile_st.yaml\ntestfile_rcm.yaml\n')
+        return filename
+
+    def test_plan(self, dataset_file):
+        """Ensure cases counted and costs estimated for each dataset.
+        """
+        output = plan_evaluation('h2o2.cti', dataset_file,
+                                 data_path=relative_location(''),
+                                 model_path='', num_threads=2
+                                 )
+        assert [dataset['cases'] for dataset in output['datasets']] == [5, 1]
+        assert output['cases'] == 6
+        assert output['mechanisms'] == 1
+        assert output['datasets'][0]['mechanisms'] == ['h2o2.cti']
+        assert output['telemetry records'] == 0
+        assert output['calibration'] == default_calibration
+
+        assert numpy.isclose(output['cpu hours'],
+                             sum(dataset['cpu hours']
+                                 for dataset in output['datasets']
+                                 ))
+        assert numpy.isclose(output['wall hours'], output['cpu hours'] / 2.)
+        assert output['disk usage'] > 0.
+        assert output['peak memory'] == 2. * output['peak worker memory']
+
+    def test_deduplication(self, tmpdir):
+        """Ensure repeated datasets not counted again.
+        """
+        dataset_file = str(tmpdir.join('datasets.txt'))
+        with open(dataset_file, 'w') as f:
+            f.write('testfile_st.yaml\ntestfile_rcm.yaml\ntestfile_st.yaml\n')
+        output = plan_evaluation('h2o2.cti', dataset_file,
+                                 data_path=relative_location(''),
+                                 model_path='', num_threads=1
+                                 )
+        assert [dataset['unique cases'] for dataset in output['datasets']] == [5, 1, 0]
+        assert output['cases'] == 11
+        assert output['unique cases'] == 6
+        assert numpy.isclose(output['deduplication ratio'], 11. / 6.)
+        assert output['datasets'][2]['cpu hours'] == 0.
+
+        output_all = plan_evaluation('h2o2.cti', dataset_file,
+                                     data_path=relative_location(''),
+                                     model_path='', num_threads=1,
+                                     deduplicate=False
+                                     )
+        assert output_all['unique cases'] == 11
+        assert numpy.isclose(output_all['cpu hours'],
+                             output['cpu hours'] + output['datasets'][0]['cpu hours']
+                             )
+
+    def test_calibration(self, dataset_file):
+        """Ensure estimates scale with calibration.
+        """
+        calibration = dict(default_calibration)
+        calibration['step time'] = [2. * value for value in
+                                    default_calibration['step time']
+                                    ]
+        output = plan_evaluation('h2o2.cti', dataset_file,
+                                 data_path=relative_location(''),
+                                 model_path='', num_threads=1
+                                 )
+        output_slow = plan_evaluation('h2o2.cti', dataset_file,
+                                      data_path=relative_location(''),
+                                      model_path='', num_threads=1,
+                                      calibration=calibration
+                                      )
+        assert numpy.isclose(output_slow['cpu hours'], 2. * output['cpu hours'])
+
+    def test_skipped(self, dataset_file, tmpdir):
+        """Ensure datasets with bath gas missing from model not counted.
+        """
+        spec_keys_file = str(tmpdir.join('spec_keys.yaml'))
+        with open(spec_keys_file, 'w') as f:
+            f.write('h2o2.cti:\n  H2: H2\n  O2: O2\n')
+        output = plan_evaluation('h2o2.cti', dataset_file, spec_keys_file,
+                                 data_path=relative_location(''),
+                                 model_path='', num_threads=1
+                                 )
+        assert all(dataset['skipped'] for dataset in output['datasets'])
+        assert output['cases'] == 0
+        assert output['cpu hours'] == 0.
+
+    def test_command(self, dataset_file, tmpdir, capsys):
+        """Ensure plan printed and written, calibrated with telemetry.
+        """
+        telemetry_file = str(tmpdir.join('telemetry.jsonl'))
+        with open(telemetry_file, 'w') as f:
+            for record in make_records(default_calibration, 3):
+                f.write(json.dumps(record) + '\n')
+        output_file = str(tmpdir.join('plan.yaml'))
+
+        assert main(['plan', '-m', 'h2o2.cti', '-d', dataset_file, '-dp',
+                     relative_location(''), '-mp', '', '--telemetry',
+                     telemetry_file, '-nt', '2', '-o', output_file
+                     ]) == 0
+        assert 'estimated wall time with 2 processes' in capsys.readouterr()[0]
+        with open(output_file, 'r') as f:
+            output = yaml_load(f)
+        assert output['cases'] == 6
+        assert output['telemetry records'] == 3
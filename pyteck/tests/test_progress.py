@@ -0,0 +1,121 @@
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import io
+import json
+
+import pytest
+
+# Local imports
+from ..progress import ProgressReporter, format_duration
+
+
+class TerminalStream(io.StringIO):
+    def isatty(self):
+        return True
+
+
+class TestFormatDuration:
+    """
+    """
+    def test_format(self):
+        assert format_duration(0.) == '0:00:00'
+        assert format_duration(61.4) == '0:01:01'
+        assert format_duration(3 * 3600 + 125) == '3:02:05'
+
+    def test_unknown(self):
+        assert format_duration(None) == '?'
+
+
+class TestProgressReporter:
+    """
+    """
+    def run_dataset(self, reporter):
+        reporter.start_run('model.cti')
+        reporter.start_dataset('a.yaml', 3)
+        reporter.case_finished('a_0', 'ok', 2, steps=100)
+        reporter.case_finished('a_1', 'failed', 1)
+        reporter.case_finished('a_2', 'timed-out', 0)
+        reporter.finish_dataset(**{'error function': 1.5})
+        reporter.finish_run()
+        reporter.close()
+
+    def test_events(self):
+        """Ensure events written for run, datasets, and cases.
+        """
+        events = io.StringIO()
+        self.run_dataset(ProgressReporter(1, events=events))
+        records = [json.loads(line) for line in events.getvalue().splitlines()]
+
+        assert [record['event'] for record in records] == [
+            'run-start', 'dataset-start', 'case', 'case', 'case',
+            'dataset-end', 'run-end'
+            ]
+        assert all('time' in record for record in records)
+        cases = records[2:5]
+        assert [case['done'] for case in cases] == [1, 2, 3]
+        assert [case['remaining'] for case in cases] == [2, 1, 0]
+        assert [case['failures'] for case in cases] == [0, 1, 2]
+        assert [case['active workers'] for case in cases] == [2, 1, 0]
+        assert cases[0]['steps'] == 100
+        assert all(case['rate'] > 0. for case in cases)
+        assert records[5]['error function'] == 1.5
+        assert records[5]['failures'] == 2
+        assert records[6]['cases'] == 3
+
+    def test_events_not_finite(self):
+        """Ensure NaN and infinite values written as null, which is valid JSON.
+        """
+        events = io.StringIO()
+        reporter = ProgressReporter(1, events=events)
+        reporter.event('dataset-end', **{'error function': float('nan'),
+                                         'values': [1., float('inf')],
+                                         })
+        line = events.getvalue()
+        assert 'NaN' not in line and 'Infinity' not in line
+        record = json.loads(line)
+        assert record['error function'] is None
+        assert record['values'] == [1., None]
+
+    def test_events_file(self, tmpdir):
+        filename = str(tmpdir.join('events.jsonl'))
+        self.run_dataset(ProgressReporter(1, events=filename))
+        with open(filename, 'r') as f:
+            assert len(f.read().splitlines()) == 7
+
+    def test_events_stdout(self, capsys):
+        self.run_dataset(ProgressReporter(1, events='-'))
+        assert len(capsys.readouterr()[0].splitlines()) == 7
+
+    def test_status_lines(self):
+        """Ensure status line written as lines, and throttled.
+        """
+        stream = io.StringIO()
+        self.run_dataset(ProgressReporter(2, stream, interval=0.))
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 5
+        assert lines[0].startswith('a.yaml (1/2): 0 done, 3 remaining')
+        assert 'ETA ?' in lines[0]
+        assert lines[-1].startswith('a.yaml (1/2): 3 done, 0 remaining')
+        assert lines[-1].endswith('0 workers active | 2 failed')
+
+        stream = io.StringIO()
+        self.run_dataset(ProgressReporter(2, stream, interval=100.))
+        # only start and end of dataset
+        assert len(stream.getvalue().splitlines()) == 2
+
+    def test_terminal(self):
+        """Ensure status line redrawn in place on a terminal.
+        """
+        stream = TerminalStream()
+        self.run_dataset(ProgressReporter(1, stream, interval=0.))
+        output = stream.getvalue()
+        assert output.count('\r') == 5
+        assert output.endswith('\n')
+        assert output.count('\n') == 1
+
+    def test_no_output(self, capsys):
+        self.run_dataset(ProgressReporter(1))
+        assert capsys.readouterr() == ('', '')
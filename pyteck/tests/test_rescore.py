@@ -0,0 +1,209 @@
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import os
+import pkg_resources
+import time
+
+import numpy
+import pytest
+
+# Local imports
+from ..database import ResultsDatabase, list_runs
+from ..results import dataset_results
+from ..rescore import rescore_model, score_datasets, get_changing_values
+from ..utils import yaml_load
+from ..__main__ import main
+
+
+def relative_location(file):
+    file_path = os.path.join(file)
+    return pkg_resources.resource_filename(__name__, file_path)
+
+
+@pytest.fixture
+def stored_db(tmpdir):
+    """Database with noisy Arrhenius dataset, and a skipped dataset.
+    """
+    temperatures = numpy.linspace(1000., 1400., 8)
+    exp_delays = 1.e-6 * numpy.exp(10000. / temperatures)
+    rng = numpy.random.RandomState(1)
+    sim_delays = exp_delays * numpy.exp(rng.normal(0., 0.3, len(exp_delays)))
+    exp_delays *= numpy.exp(rng.normal(0., 0.2, len(exp_delays)))
+
+    filename = str(tmpdir.join('results.db'))
+    with ResultsDatabase(filename) as db:
+        run_id = db.start_run('model.cti', 'datasets.txt', {})
+        with db.writer(run_id) as writer:
+            writer.write(dataset_results(
+                'model.cti', 'arrhenius.yaml', 0, temperatures,
+                [1.e6] * len(temperatures), exp_delays, sim_delays
+                ))
+            writer.write(dataset_results(
+                'model.cti', 'argon.yaml', 1, [1000., 1100.], [1.e6] * 2,
+                [1.e-3, 5.e-4]
+                ))
+        db.finish_run(run_id, {})
+
+    dataset_file = str(tmpdir.join('datasets.txt'))
+    with open(dataset_file, 'w') as f:
+        f.write('arrhenius.yaml\nargon.yaml\n')
+    return filename, dataset_file, exp_delays, sim_delays
+
+
+class TestGetChangingValues:
+    """
+    """
+    def test_temperature_changing(self):
+        values = get_changing_values(numpy.array([1000., 1100.]),
+                                     numpy.array([1.e5, 1.e5])
+                                     )
+        numpy.testing.assert_array_equal(values, [1000., 1100.])
+
+    def test_pressure_changing(self):
+        values = get_changing_values(numpy.array([1000., 1000.]),
+                                     numpy.array([1.e5, 2.e5])
+                                     )
+        numpy.testing.assert_array_equal(values, [1.e5, 2.e5])
+
+    def test_both_changing(self):
+        values = get_changing_values(numpy.array([1000., 1100.]),
+                                     numpy.array([1.e5, 2.e5])
+                                     )
+        numpy.testing.assert_array_equal(values, [1000., 1100.])
+
+
+class TestRescore:
+    """
+    """
+    def test_stored(self, stored_db):
+        """Ensure metrics recomputed from stored delays, skipping datasets.
+        """
+        filename, dataset_file, exp_delays, sim_delays = stored_db
+
+        start = time.time()
+        output = rescore_model('model.cti', dataset_file, filename)
+        assert time.time() - start < 1.
+
+        assert len(output['datasets']) == 1
+        dataset = output['datasets'][0]
+        deviation = ((numpy.log(sim_delays) - numpy.log(exp_delays)) /
+                     dataset['standard deviation']
+                     )
+        assert numpy.isclose(dataset['error function'],
+                             numpy.mean(deviation**2)
+                             )
+        assert numpy.isclose(dataset['absolute deviation'],
+                             numpy.mean(deviation)
+                             )
+
+        # skipped dataset counts as zero deviation, as in evaluate_model
+        assert numpy.isclose(output['average error function'],
+                             dataset['error function']
+                             )
+        assert numpy.isclose(output['average deviation function'],
+                             dataset['absolute deviation'] / 2.
+                             )
+
+    def test_min_deviation(self, stored_db):
+        """Ensure new minimum standard deviation changes metrics.
+        """
+        filename, dataset_file, _, _ = stored_db
+        output = rescore_model('model.cti', dataset_file, filename)
+        output_min = rescore_model('model.cti', dataset_file, filename,
+                                   min_std_dev=1.
+                                   )
+        assert output['datasets'][0]['standard deviation'] < 1.
+        assert output_min['datasets'][0]['standard deviation'] == 1.
+        assert (output_min['average error function'] <
+                output['average error function']
+                )
+
+    def test_interrupted_run(self, stored_db):
+        """Ensure partial results of interrupted run ignored.
+        """
+        filename, dataset_file, _, _ = stored_db
+        output = rescore_model('model.cti', dataset_file, filename)
+
+        with ResultsDatabase(filename) as db:
+            run_id = db.start_run('model.cti', 'datasets.txt', {})
+            with db.writer(run_id) as writer:
+                writer.write(dataset_results('model.cti', 'arrhenius.yaml', 0,
+                                             [1000.], [1.e6], [1.e-3], [2.e-3]
+                                             ))
+        assert rescore_model('model.cti', dataset_file, filename) == output
+
+    def test_missing_needs_keys(self, stored_db, tmpdir):
+        """Ensure error raised if datasets must be simulated without keys.
+        """
+        filename, _, _, _ = stored_db
+        dataset_file = str(tmpdir.join('more_datasets.txt'))
+        with open(dataset_file, 'w') as f:
+            f.write('arrhenius.yaml\nnew.yaml\n')
+        with pytest.raises(ValueError) as excinfo:
+            rescore_model('model.cti', dataset_file, filename)
+        assert 'new.yaml' in str(excinfo.value)
+
+    def test_simulate_missing(self, tmpdir, monkeypatch):
+        """Ensure only datasets without stored results are simulated.
+        """
+        monkeypatch.chdir(str(tmpdir))
+        filename = str(tmpdir.join('results.db'))
+        kwargs = dict(spec_keys_file=relative_location('spec_keys.yaml'),
+                      data_path=relative_location(''), model_path='',
+                      results_path=str(tmpdir), num_threads=1
+                      )
+
+        output = rescore_model('h2o2.cti', relative_location('dataset_file.txt'),
+                               filename, **kwargs
+                               )
+        assert numpy.isclose(output['average error function'],
+                             58.78211242028232, rtol=1.e-3
+                             )
+        assert numpy.isclose(output['average deviation function'],
+                             7.635983785416241, rtol=1.e-3
+                             )
+
+        # second time, nothing left to simulate
+        output_again = rescore_model('h2o2.cti',
+                                     relative_location('dataset_file.txt'),
+                                     filename, **kwargs
+                                     )
+        assert output_again == output
+        with ResultsDatabase(filename) as db:
+            assert len(list_runs(db.connection)[1]) == 1
+
+        # results file of the simulated datasets kept with other results
+        assert not tmpdir.join('h2o2-results.yaml').check()
+        assert tmpdir.join('h2o2-missing-results.yaml').check()
+
+    def test_command(self, stored_db, tmpdir, capsys):
+        """Ensure rescore command prints and writes results.
+        """
+        filename, dataset_file, _, _ = stored_db
+        output_file = str(tmpdir.join('rescored.yaml'))
+        assert main(['rescore', filename, '-m', 'model.cti', '-d',
+                     dataset_file, '--min-deviation', '1.0', '-o', output_file
+                     ]) == 0
+        assert 'overall error function' in capsys.readouterr()[0]
+        with open(output_file, 'r') as f:
+            output = yaml_load(f)
+        assert output['datasets'][0]['standard deviation'] == 1.
+
+    def test_score_datasets(self):
+        """Ensure repeated conditions averaged in standard deviation estimate.
+        """
+        stored = {'a.yaml': {'temperature': numpy.array([1000., 1000.]),
+                             'pressure': numpy.array([1.e5, 1.e5]),
+                             'experimental_delay': numpy.array([1.e-3, 1.e-3]),
+                             'simulated_delay': numpy.array([1.e-3, 0.]),
+                             'status': numpy.array(['ok', 'no-ignition'],
+                                                   dtype=object
+                                                   ),
+                             }
+                  }
+        output = score_datasets('model.cti', ['a.yaml'], stored)
+        assert output['datasets'][0]['standard deviation'] == 0.1
+        assert output['average error function'] == float('inf')
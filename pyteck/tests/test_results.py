@@ -0,0 +1,139 @@
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import os
+import sys
+
+import numpy
+import pytest
+
+# Local imports
+from .. import results
+from ..results import (dataset_results, open_results_writer,
+                       read_results_table, CSVResultsWriter,
+                       ArrowResultsWriter
+                       )
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+def example_results():
+    """Results for two small datasets, one of them skipped.
+    """
+    return [dataset_results('model.cti', 'set_a.yaml', 0,
+                            [1000., 1100., 1200.], [1.e5, 2.e5, 3.e5],
+                            [1.e-3, 2.e-3, 3.e-3],
+                            [1.e-3, 4.e-3, 0.], [numpy.nan, 1.e-3, numpy.nan],
+                            standard_dev=0.5
+                            ),
+            dataset_results('model.cti', 'set_b.yaml', 1,
+                            [900., 950.], [4.e6, 4.e6], [5.e-3, 6.e-3],
+                            standard_dev=0.25
+                            ),
+            ]
+
+
+class TestDatasetResults:
+    """
+    """
+    def test_columns(self):
+        """Ensure deviation, error, and status computed for each datapoint.
+        """
+        columns = example_results()[0]
+        assert set(columns.keys()) == set(name for name, _ in
+                                          results.result_columns
+                                          )
+        numpy.testing.assert_allclose(columns['deviation'][:2],
+                                      [0., numpy.log(2.) / 0.5]
+                                      )
+        numpy.testing.assert_allclose(columns['error'][:2],
+                                      [0., (numpy.log(2.) / 0.5)**2]
+                                      )
+        assert columns['status'] == ['ok', 'ok', 'no-ignition']
+        numpy.testing.assert_array_equal(columns['datapoint'], [0, 1, 2])
+
+    def test_datapoint_ids(self):
+        """Ensure given datapoint indices used, e.g. for one datapoint.
+        """
+        columns = dataset_results('model.cti', 'set_a.yaml', 0, [1000.],
+                                  [1.e5], [1.e-3], [2.e-3], datapoint_ids=[7]
+                                  )
+        numpy.testing.assert_array_equal(columns['datapoint'], [7])
+
+    def test_skipped(self):
+        """Ensure datasets without simulated delays marked as skipped.
+        """
+        columns = example_results()[1]
+        assert columns['status'] == ['skipped', 'skipped']
+        assert numpy.all(numpy.isnan(columns['simulated_delay']))
+        assert numpy.all(numpy.isnan(columns['error']))
+
+
+class TestResultsWriter:
+    """
+    """
+    def check_round_trip(self, filename):
+        with open_results_writer(filename) as writer:
+            for columns in example_results():
+                writer.write(columns)
+
+        table = read_results_table(filename)
+        expected = example_results()
+        for name, col_type in results.result_columns:
+            values = numpy.concatenate([numpy.asarray(c[name]) for c in expected])
+            if col_type == 'string':
+                assert list(table[name]) == list(values)
+            else:
+                numpy.testing.assert_array_equal(table[name], values)
+
+    def test_csv(self, tmpdir):
+        """Ensure CSV results table round-trips.
+        """
+        filename = str(tmpdir.join('results.csv'))
+        self.check_round_trip(filename)
+
+    @pytest.mark.skipif(pyarrow is None, reason='requires PyArrow')
+    @pytest.mark.parametrize('name', ['results.parquet', 'results.arrow'])
+    def test_arrow(self, tmpdir, name):
+        """Ensure Parquet and Arrow IPC results tables round-trip.
+        """
+        filename = str(tmpdir.join(name))
+        writer = open_results_writer(filename)
+        assert isinstance(writer, ArrowResultsWriter)
+        writer.close()
+        self.check_round_trip(filename)
+
+    def test_fallback_csv(self, tmpdir, monkeypatch):
+        """Ensure CSV written when PyArrow not available.
+        """
+        monkeypatch.setitem(sys.modules, 'pyarrow', None)
+        filename = str(tmpdir.join('results.parquet'))
+        writer = open_results_writer(filename)
+        assert isinstance(writer, CSVResultsWriter)
+        assert writer.filename == str(tmpdir.join('results.csv'))
+        writer.close()
+
+    def test_unknown_format(self, tmpdir):
+        with pytest.raises(ValueError):
+            open_results_writer(str(tmpdir.join('results.txt')))
+
+    def test_incremental(self, tmpdir):
+        """Ensure rows written once batch is full, and remaining on close.
+        """
+        filename = str(tmpdir.join('results.csv'))
+        writer = CSVResultsWriter(filename, batch_size=4)
+        first, second = example_results()
+
+        writer.write(first)
+        assert len(read_results_table(filename)['dataset']) == 0
+        writer.write(second)
+        assert len(read_results_table(filename)['dataset']) == 5
+
+        writer.write(first)
+        writer.close()
+        assert len(read_results_table(filename)['dataset']) == 8
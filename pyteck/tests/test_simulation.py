@@ -3,6 +3,10 @@ from __future__ import print_function
 from __future__ import division
 
 import os
+import sys
+import pickle
+import time
+import subprocess
 import pkg_resources
 import numpy as np
 import pytest
@@ -42,7 +46,7 @@ except ImportError:
 
 from .. import simulation
 from ..utils import units
-from ..eval_model import create_simulations
+from ..eval_model import create_simulations, default_retry_ladder
 
 
 class TestFirstDerivative:
@@ -153,6 +157,75 @@ class TestCreateVolumeHistory:
         assert np.allclose(times[-1], 1.0)
         assert np.allclose(volume, volumes[-1], rtol=1e-5)
 
+    def test_adaptive_sampling(self):
+        """Ensure adaptive samples match uniformly sampled volumes.
+        """
+        initial_pres = 1.0 * ct.one_atm
+        pres_rise = 0.05
+        end_time = 1.0
+        initial_temp = 300.
+        [times, volumes] = simulation.create_volume_history(
+                    'air.xml', initial_temp, initial_pres, 'N2:1.0',
+                    pres_rise, end_time
+                    )
+        # far fewer samples needed than with uniform 20 kHz sampling
+        assert times.size < 2.e4 * end_time
+        assert np.all(np.diff(times) > 0.)
+
+        gas = ct.Solution('air.xml')
+        gas.TPX = initial_temp, initial_pres, 'N2:1.0'
+        initial_entropy = gas.entropy_mass
+        initial_density = gas.density
+
+        [uniform_times, pressures] = simulation.sample_rising_pressure(
+            end_time, initial_pres, 2.e3, pres_rise
+            )
+        uniform_volumes = np.zeros(pressures.size)
+        for i, pres in enumerate(pressures):
+            gas.SP = initial_entropy, pres
+            uniform_volumes[i] = initial_density / gas.density
+
+        assert np.allclose(np.interp(uniform_times, times, volumes),
+                           uniform_volumes, rtol=1e-5
+                           )
+
+    def test_cached_volume_history(self):
+        """Ensure volume history is cached on disk and reused.
+        """
+        with TemporaryDirectory() as temp_dir:
+            [times, volumes] = simulation.create_volume_history(
+                        'air.xml', 300., ct.one_atm, 'N2:1.0', 0.05, 1.0,
+                        cache_path=temp_dir
+                        )
+            cache_files = os.listdir(temp_dir)
+            assert len(cache_files) == 1
+
+            # Clear in-memory cache to force reading from disk
+            simulation._volume_history_cache.clear()
+            [cached_times, cached_volumes] = simulation.create_volume_history(
+                        'air.xml', 300., ct.one_atm, 'N2:1.0', 0.05, 1.0,
+                        cache_path=temp_dir
+                        )
+            assert os.listdir(temp_dir) == cache_files
+            assert np.array_equal(times, cached_times)
+            assert np.array_equal(volumes, cached_volumes)
+
+    def test_cache_key(self):
+        """Ensure cache key depends on conditions.
+        """
+        key = simulation.volume_history_cache_key(
+            'air.xml', 300., ct.one_atm, 'N2:1.0', 0.05, 1.0, 1.e-6
+            )
+        assert key == simulation.volume_history_cache_key(
+            'air.xml', 300., ct.one_atm, 'N2:1.0', 0.05, 1.0, 1.e-6
+            )
+        assert key != simulation.volume_history_cache_key(
+            'air.xml', 300., ct.one_atm, 'N2:1.0', 0.06, 1.0, 1.e-6
+            )
+        assert key != simulation.volume_history_cache_key(
+            'air.xml', 300., ct.one_atm, 'N2:1.0', 0.05, 2.0, 1.e-6
+            )
+
 
 class TestVolumeProfile:
     """
@@ -183,6 +256,107 @@ class TestVolumeProfile:
                            rtol=1e-7, atol=1e-10
                            )
 
+    def test_min_time_step(self):
+        """Ensure minimum time step taken from volume history times.
+        """
+        times = np.array([0., 1.0, 1.5, 3.0])
+        volumes = np.array([1., 0.9, 0.8, 0.7])
+
+        volume_history = VolumeHistory(time=times * units.ms, volume=volumes * units.cm3)
+        volume_profile = simulation.VolumeProfile(volume_history)
+
+        assert np.isclose(volume_profile.min_time_step, 5.e-4)
+        assert not volume_profile.velocity.flags.writeable
+
+    def test_native_function(self):
+        """Ensure Cantera-native velocity function matches Python profile.
+        """
+        tmax = 10.
+        times = np.arange(0, tmax, 0.001)
+        volumes = np.cos(times)
+
+        volume_history = VolumeHistory(time=times * units.second, volume=volumes * units.cm3)
+        volume_profile = simulation.VolumeProfile(volume_history)
+        velocity = volume_profile.as_func1()
+
+        for time in np.linspace(-1., tmax + 1., 1001):
+            assert np.isclose(velocity(time), volume_profile(time),
+                              rtol=1e-12, atol=1e-14
+                              )
+
+    @pytest.mark.benchmark
+    def test_native_function_speedup(self):
+        """Compare integration of RCM case using native and Python velocity.
+        """
+        file_path = os.path.join('testfile_rcm.yaml')
+        filename = pkg_resources.resource_filename(__name__, file_path)
+        properties = ChemKED(filename)
+        case = properties.datapoints[0]
+        volume_profile = simulation.VolumeProfile(case.volume_history)
+
+        def integrate(velocity):
+            gas = ct.Solution('gri30.xml')
+            gas.TPX = (case.temperature.to('kelvin').magnitude,
+                       case.pressure.to('pascal').magnitude,
+                       'H2:0.125, O2:0.0625, N2:0.18125, AR:0.63125'
+                       )
+            reac = ct.IdealGasReactor(gas)
+            env = ct.Reservoir(ct.Solution('air.xml'))
+            ct.Wall(reac, env, A=1.0, velocity=velocity)
+            reac_net = ct.ReactorNet([reac])
+            reac_net.max_time_step = volume_profile.min_time_step
+
+            start = time.perf_counter()
+            while reac_net.time < 0.1:
+                reac_net.step()
+            return time.perf_counter() - start, reac.T
+
+        time_python, temp_python = integrate(volume_profile)
+        time_native, temp_native = integrate(volume_profile.as_func1())
+        print('Python velocity: {:.3f} s, native velocity: {:.3f} s'.format(
+              time_python, time_native
+              ))
+
+        assert np.isclose(temp_python, temp_native)
+        assert time_native < time_python
+
+
+class TestVolumeHistoryKey:
+    """
+    """
+    def test_identical_histories(self):
+        """Ensure identical volume histories share a key.
+        """
+        times = np.arange(0, 1.0, 0.001)
+        volumes = np.cos(times)
+
+        key1 = simulation.volume_history_key(
+            VolumeHistory(time=times * units.second, volume=volumes * units.cm3)
+            )
+        key2 = simulation.volume_history_key(
+            VolumeHistory(time=times.copy() * units.second,
+                          volume=volumes.copy() * units.cm3
+                          )
+            )
+        assert key1 == key2
+
+    def test_different_histories(self):
+        """Ensure different volume histories have different keys.
+        """
+        times = np.arange(0, 1.0, 0.001)
+
+        key1 = simulation.volume_history_key(
+            VolumeHistory(time=times * units.second,
+                          volume=np.cos(times) * units.cm3
+                          )
+            )
+        key2 = simulation.volume_history_key(
+            VolumeHistory(time=times * units.second,
+                          volume=np.cos(2. * times) * units.cm3
+                          )
+            )
+        assert key1 != key2
+
 
 class TestPressureRiseProfile:
     """
@@ -670,4 +844,489 @@ class TestSimulation:
                                    mass_fracs, rtol=1e-4, atol=1e-8
                                    )
 
-    # TODO: add test for restart option
+    @pytest.mark.parametrize('limit, value', [('max_steps', 10),
+                                              ('max_rows', 10),
+                                              ('max_wall_time', 0.),
+                                              ])
+    def test_run_case_limits(self, limit, value):
+        """Ensure integration stops at limits, and case marked as timed out.
+        """
+        file_path = os.path.join('testfile_st.yaml')
+        filename = pkg_resources.resource_filename(__name__, file_path)
+        properties = ChemKED(filename)
+        simulations = create_simulations(filename, properties)
+
+        mechanism_filename = 'gri30.xml'
+        SPEC_KEY = {'H2': 'H2', 'O2': 'O2', 'N2': 'N2', 'Ar': 'AR'}
+
+        with TemporaryDirectory() as temp_dir:
+            sim = simulations[0]
+            sim.setup_case(mechanism_filename, SPEC_KEY, path=temp_dir)
+            sim.run_case(**{limit: value})
+
+            assert sim.meta['status'] == 'timed-out'
+            assert sim.meta['timeout'] == {'max_steps': 'steps',
+                                           'max_rows': 'rows',
+                                           'max_wall_time': 'wall time',
+                                           }[limit]
+            with tables.open_file(sim.meta['save-file'], 'r') as h5file:
+                num_rows = h5file.root.simulation.nrows
+            assert num_rows <= 11
+            assert sim.reac_net.time < sim.time_end
+
+    def test_solver_settings(self):
+        """Ensure reactor and integrator settings applied.
+        """
+        file_path = os.path.join('testfile_st.yaml')
+        filename = pkg_resources.resource_filename(__name__, file_path)
+        properties = ChemKED(filename)
+        simulations = create_simulations(filename, properties)
+
+        mechanism_filename = 'gri30.xml'
+        SPEC_KEY = {'H2': 'H2', 'O2': 'O2', 'N2': 'N2', 'Ar': 'AR'}
+
+        with TemporaryDirectory() as temp_dir:
+            sim = simulations[0]
+            sim.setup_case(mechanism_filename, SPEC_KEY, path=temp_dir,
+                           solver_settings={'reactor': 'Reactor', 'rtol': 1.e-11,
+                                            'atol': 1.e-18,
+                                            'max_err_test_fails': 20,
+                                            }
+                           )
+            assert type(sim.reac).__name__ == 'Reactor'
+            assert sim.reac_net.rtol == 1.e-11
+            assert sim.reac_net.atol == 1.e-18
+
+    @pytest.mark.parametrize('file_path', ['testfile_st.yaml',
+                                           'testfile_rcm.yaml'
+                                           ])
+    @pytest.mark.parametrize('rung', range(len(default_retry_ladder)))
+    def test_retry_ladder(self, file_path, rung):
+        """Ensure each default retry setting can set up and run a case.
+        """
+        filename = pkg_resources.resource_filename(__name__, file_path)
+        properties = ChemKED(filename)
+        simulations = create_simulations(filename, properties)
+
+        mechanism_filename = 'gri30.xml'
+        SPEC_KEY = {'H2': 'H2', 'O2': 'O2', 'N2': 'N2', 'Ar': 'AR'}
+        solver_settings = default_retry_ladder[rung]
+
+        with TemporaryDirectory() as temp_dir:
+            sim = simulations[0]
+            sim.setup_case(mechanism_filename, SPEC_KEY, path=temp_dir,
+                           solver_settings=solver_settings
+                           )
+            sim.run_case(max_steps=50)
+            assert sim.meta['telemetry']['steps'] == 50
+            if 'max_time_step_fraction' in solver_settings:
+                assert sim.reac_net.time <= (
+                    50 * solver_settings['max_time_step_fraction'] * sim.time_end
+                    )
+
+    def test_max_time_step_fraction(self):
+        """Ensure maximum time step set relative to end time.
+        """
+        file_path = os.path.join('testfile_st.yaml')
+        filename = pkg_resources.resource_filename(__name__, file_path)
+        properties = ChemKED(filename)
+        simulations = create_simulations(filename, properties)
+
+        mechanism_filename = 'gri30.xml'
+        SPEC_KEY = {'H2': 'H2', 'O2': 'O2', 'N2': 'N2', 'Ar': 'AR'}
+
+        with TemporaryDirectory() as temp_dir:
+            sim = simulations[0]
+            sim.setup_case(mechanism_filename, SPEC_KEY, path=temp_dir,
+                           solver_settings={'max_time_step_fraction': 1.e-3}
+                           )
+            sim.run_case(max_steps=100)
+            assert sim.reac_net.time <= 100 * 1.e-3 * sim.time_end
+
+    def test_restart_after_timeout(self, capsys):
+        """Ensure restart reruns case that timed out or was interrupted.
+        """
+        file_path = os.path.join('testfile_st.yaml')
+        filename = pkg_resources.resource_filename(__name__, file_path)
+        properties = ChemKED(filename)
+        simulations = create_simulations(filename, properties)
+
+        mechanism_filename = 'gri30.xml'
+        SPEC_KEY = {'H2': 'H2', 'O2': 'O2', 'N2': 'N2', 'Ar': 'AR'}
+
+        with TemporaryDirectory() as temp_dir:
+            sim = simulations[0]
+            sim.setup_case(mechanism_filename, SPEC_KEY, path=temp_dir)
+            save_file = sim.meta['save-file']
+            sim.run_case(max_steps=10)
+            assert sim.meta['save-file'] == save_file + '.partial'
+            assert not os.path.isfile(save_file)
+
+            # as if a worker were killed while writing
+            with open(save_file + '.partial', 'w') as f:
+                f.write('truncated')
+
+            sim = create_simulations(filename, ChemKED(filename))[0]
+            sim.setup_case(mechanism_filename, SPEC_KEY, path=temp_dir)
+            sim.run_case(restart=True)
+            assert 'Skipped existing case' not in capsys.readouterr()[0]
+            assert sim.meta['save-file'] == save_file
+            assert not os.path.isfile(save_file + '.partial')
+            with tables.open_file(save_file, 'r') as h5file:
+                assert h5file.root.simulation.col('time')[-1] == sim.time_end
+
+            sim.run_case(restart=True)
+            assert 'Skipped existing case' in capsys.readouterr()[0]
+
+
+def write_trajectory(filename, time, temperature, pressure, n_species=3,
+                     mass_fractions=None):
+    """Write synthetic integration results in the format of ``run_case``.
+    """
+    if mass_fractions is None:
+        mass_fractions = np.outer(time, np.arange(n_species))
+    n_species = mass_fractions.shape[1]
+    table_def = {'time': tables.Float64Col(pos=0),
+                 'temperature': tables.Float64Col(pos=1),
+                 'pressure': tables.Float64Col(pos=2),
+                 'volume': tables.Float64Col(pos=3),
+                 'mass_fractions': tables.Float64Col(shape=(n_species), pos=4),
+                 }
+    with tables.open_file(filename, mode='w') as h5file:
+        table = h5file.create_table(where=h5file.root, name='simulation',
+                                    description=table_def
+                                    )
+        timestep = table.row
+        for t, temp, pres, fracs in zip(time, temperature, pressure,
+                                        mass_fractions):
+            timestep['time'] = t
+            timestep['temperature'] = temp
+            timestep['pressure'] = pres
+            timestep['volume'] = 1.0
+            timestep['mass_fractions'] = fracs
+            timestep.append()
+        table.flush()
+
+
+def write_large_trajectory(filename, num_rows, n_species):
+    """Write large synthetic integration results, a block of rows at a time.
+    """
+    table_def = {'time': tables.Float64Col(pos=0),
+                 'temperature': tables.Float64Col(pos=1),
+                 'pressure': tables.Float64Col(pos=2),
+                 'volume': tables.Float64Col(pos=3),
+                 'mass_fractions': tables.Float64Col(shape=(n_species), pos=4),
+                 }
+    with tables.open_file(filename, mode='w') as h5file:
+        table = h5file.create_table(where=h5file.root, name='simulation',
+                                    description=table_def
+                                    )
+        block = 1000
+        for start in range(0, num_rows, block):
+            rows = np.zeros(min(block, num_rows - start), dtype=table.dtype)
+            rows['time'] = np.arange(start, start + rows.size)
+            rows['mass_fractions'] = (rows['time'][:, np.newaxis] +
+                                      np.arange(n_species) / n_species
+                                      )
+            table.append(rows)
+        table.flush()
+
+
+def peak_memory_read(filename, statement):
+    """Increase in peak resident memory (in kB) of reading results column.
+
+    Uses the high-water mark from ``/proc``, so only available on Linux.
+    """
+    code = ('import tables\n'
+            'from pyteck import simulation\n'
+            'def vm_hwm():\n'
+            '    with open("/proc/self/status") as f:\n'
+            '        line = [l for l in f if l.startswith("VmHWM")][0]\n'
+            '    return int(line.split()[1])\n'
+            'h5file = tables.open_file({!r}, "r")\n'
+            'table = h5file.root.simulation\n'
+            'before = vm_hwm()\n'
+            'values = {}\n'
+            'print(vm_hwm() - before)\n'
+            'h5file.close()\n'
+            ).format(filename, statement)
+    output = subprocess.check_output([sys.executable, '-c', code])
+    return int(output.decode().split()[-1])
+
+
+class TestReadColumn:
+    """
+    """
+    @pytest.mark.parametrize('buffer_size', [None, 1, 10000])
+    def test_same_as_full_read(self, buffer_size):
+        """Ensure chunked reads match reading whole column.
+        """
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, 'test.h5')
+            write_large_trajectory(filename, 2500, 7)
+            with tables.open_file(filename, 'r') as h5file:
+                table = h5file.root.simulation
+                time = simulation.read_column(table, 'time',
+                                              buffer_size=buffer_size
+                                              )
+                species = simulation.read_column(table, 'mass_fractions', 3,
+                                                 buffer_size=buffer_size
+                                                 )
+                np.testing.assert_array_equal(time, table.col('time'))
+                np.testing.assert_array_equal(
+                    species, table.col('mass_fractions')[:, 3]
+                    )
+                several = simulation.read_column(table, 'mass_fractions',
+                                                 [1, 4, 6],
+                                                 buffer_size=buffer_size
+                                                 )
+                np.testing.assert_array_equal(
+                    several, table.col('mass_fractions')[:, [1, 4, 6]]
+                    )
+
+    @pytest.mark.benchmark
+    @pytest.mark.skipif(not os.path.isfile('/proc/self/status'),
+                        reason='requires /proc'
+                        )
+    def test_species_memory(self):
+        """Compare peak memory of reading one species to reading all.
+        """
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, 'large.h5')
+            # 20000 steps of 1000 species: 160 MB of mass fractions
+            write_large_trajectory(filename, 20000, 1000)
+
+            # Reading any values allocates HDF5 buffers and caches
+            memory_base = peak_memory_read(filename, "table.col('time')")
+            memory_full = peak_memory_read(
+                filename, "table.col('mass_fractions')[:, 500]"
+                )
+            memory_chunked = peak_memory_read(
+                filename, "simulation.read_column(table, 'mass_fractions', 500)"
+                )
+
+        print('Peak memory increase: {} kB (time only), {} kB (whole column), '
+              '{} kB (chunked)'.format(memory_base, memory_full, memory_chunked))
+        # Bounded by a buffer of rows, and its copy of the one field
+        assert (memory_chunked - memory_base <
+                3 * simulation.read_buffer_size / 1024
+                )
+        assert memory_chunked - memory_base < (memory_full - memory_base) / 4
+
+
+class TestCaseSpec:
+    """
+    """
+    def create_cases(self, file_path):
+        filename = pkg_resources.resource_filename(__name__, file_path)
+        properties = ChemKED(filename)
+        simulations = create_simulations(filename, properties)
+        species_names = sorted(set(name for sim in simulations
+                                   for name, _ in sim.composition
+                                   ))
+        species_index = {name: idx for idx, name in enumerate(species_names)}
+        return simulations, species_names, species_index
+
+    @pytest.mark.parametrize('file_path', ['testfile_st.yaml', 'testfile_rcm.yaml'])
+    def test_from_spec(self, file_path):
+        """Ensure simulation recreated from spec has the same values.
+        """
+        simulations, species_names, species_index = self.create_cases(file_path)
+        for sim in simulations:
+            spec = simulation.CaseSpec(sim, species_index, 2, {'rtol': 1.e-12})
+            new_sim = simulation.Simulation.from_spec(
+                pickle.loads(pickle.dumps(spec)), species_names
+                )
+            for attr in ['kind', 'apparatus', 'temperature', 'pressure',
+                         'ignition_delay', 'pressure_rise', 'compression_time',
+                         'composition'
+                         ]:
+                assert getattr(new_sim, attr) == getattr(sim, attr)
+            assert new_sim.meta == sim.meta
+            assert new_sim.properties.model_index == 2
+            assert new_sim.properties.solver_settings == {'rtol': 1.e-12}
+            assert (new_sim.properties.composition_type ==
+                    sim.properties.composition_type
+                    )
+            assert new_sim.properties.ignition_type == sim.properties.ignition_type
+            assert new_sim.properties.volume_history is None
+
+    def test_compact(self):
+        """Ensure spec much smaller than pickled simulation and its arguments.
+        """
+        simulations, species_names, species_index = self.create_cases(
+            'testfile_rcm.yaml'
+            )
+        SPEC_KEY = {'H2': 'H2', 'O2': 'O2', 'N2': 'N2', 'Ar': 'AR'}
+        sim = simulations[0]
+        size_sim = len(pickle.dumps([sim, 'gri30.xml', SPEC_KEY, 'results']))
+        size_spec = len(pickle.dumps(simulation.CaseSpec(sim, species_index)))
+        assert size_spec < size_sim / 3
+        with pytest.raises(AttributeError):
+            simulation.CaseSpec(sim, species_index).extra = 1
+
+
+class TestNumericalValues:
+    """Group of tests on unit-free values used by `Simulation`.
+    """
+    def test_si_values(self):
+        """Ensure values converted to SI units match those from Pint.
+        """
+        file_path = os.path.join('testfile_rcm.yaml')
+        filename = pkg_resources.resource_filename(__name__, file_path)
+        properties = ChemKED(filename)
+        case = properties.datapoints[0]
+
+        sim = create_simulations(filename, properties)[0]
+
+        assert sim.temperature == case.temperature.to('kelvin').magnitude
+        assert sim.pressure == case.pressure.to('pascal').magnitude
+        assert sim.ignition_delay == case.ignition_delay.to('second').magnitude
+        assert sim.compression_time == case.compression_time.to('second').magnitude
+        assert sim.pressure_rise is None
+        assert sim.composition == [(spec['species-name'], spec['amount'].magnitude)
+                                   for spec in case.composition
+                                   ]
+
+        # Original properties not modified
+        assert str(case.ignition_delay.units) == 'millisecond'
+        assert str(case.compression_time.units) == 'millisecond'
+
+    def test_process_results_identical(self):
+        """Ensure processed ignition delay bit-identical to Pint calculation.
+        """
+        file_path = os.path.join('testfile_rcm.yaml')
+        filename = pkg_resources.resource_filename(__name__, file_path)
+        properties = ChemKED(filename)
+        case = properties.datapoints[0]
+
+        sim = create_simulations(filename, properties)[0]
+        sim.properties.ignition_target = 'pressure'
+        sim.properties.ignition_type = 'd/dt max'
+
+        # Two-stage ignition, after end of compression
+        time = np.linspace(0., 0.1, 10001)
+        pressure = (1.e5 + 1.e5 * np.tanh((time - 0.045) / 1.e-3) +
+                    5.e5 * np.tanh((time - 0.06) / 1.e-4)
+                    )
+        temperature = np.ones(time.size)
+
+        with TemporaryDirectory() as temp_dir:
+            sim.meta['save-file'] = os.path.join(temp_dir, 'test.h5')
+            write_trajectory(sim.meta['save-file'], time, temperature, pressure)
+            sim.process_results()
+
+        # Calculation with units, based on peaks of pressure derivative
+        dpdt = simulation.first_derivative(time, pressure)
+        ind = simulation.detect_peaks(dpdt)
+        max_ind = ind[np.argmax(dpdt[ind])]
+        time_units = time * units.second
+        time_comp = units.Quantity(case.compression_time.magnitude,
+                                   str(case.compression_time.units)
+                                   )
+        ign_delays = time_units[ind[np.where((time_units[ind[ind <= max_ind]] - time_comp)
+                                              > 0. * units.second
+                                              )]] - time_comp
+
+        assert (sim.meta['simulated-ignition-delay'].to('second').magnitude ==
+                ign_delays[-1].to('second').magnitude
+                )
+        assert (sim.meta['simulated-first-stage-delay'].to('second').magnitude ==
+                ign_delays[0].to('second').magnitude
+                )
+        assert np.isclose(sim.meta['simulated-ignition-delay'].magnitude, 0.022)
+        assert np.isclose(sim.meta['simulated-first-stage-delay'].magnitude, 0.007)
+
+
+class TestIgnitionDefinitions:
+    """
+    """
+    def test_parse(self):
+        assert simulation.parse_ignition_definition('OH*:max') == {
+            'target': 'OH*', 'type': 'max'
+            }
+        assert simulation.parse_ignition_definition('pressure:d/dt max') == {
+            'target': 'pressure', 'type': 'd/dt max'
+            }
+        for text in ['pressure', ':max', 'OH:min']:
+            with pytest.raises(ValueError):
+                simulation.parse_ignition_definition(text)
+
+    def test_name(self):
+        assert simulation.ignition_definition_name(
+            {'target': 'CH*', 'type': 'd/dt max'}) == 'CH* d/dt max'
+
+    def test_unsupported_type(self):
+        with pytest.raises(ValueError):
+            simulation.find_ignition_delays(np.linspace(0., 1., 10),
+                                            np.ones(10), 'min'
+                                            )
+
+    def test_process_results(self):
+        """Ensure all definitions evaluated from one trajectory.
+        """
+        file_path = os.path.join('testfile_st.yaml')
+        filename = pkg_resources.resource_filename(__name__, file_path)
+        properties = ChemKED(filename)
+        sim = create_simulations(filename, properties)[0]
+        sim.properties.ignition_target = 'pressure'
+        sim.properties.ignition_type = 'd/dt max'
+        sim.meta['ignition-definition'] = 'pressure d/dt max'
+        sim.meta['ignition-definitions'] = [
+            ('temperature d/dt max', 'temperature', 'd/dt max'),
+            ('OH max', 2, 'max'),
+            ('CH max', 0, 'max'),
+            ('OH 1/2 max', 2, '1/2 max'),
+            ]
+
+        # Pressure and temperature rise at 5 ms, OH peaks at 6 ms;
+        # the first species never peaks
+        time = np.linspace(0., 0.01, 10001)
+        pressure = 1.e5 + 1.e5 * np.tanh((time - 0.005) / 1.e-4)
+        temperature = 1000. + 1000. * np.tanh((time - 0.005) / 1.e-4)
+        mass_fractions = np.zeros((time.size, 3))
+        mass_fractions[:, 1] = 0.5
+        mass_fractions[:, 2] = np.exp(-((time - 0.006) / 2.e-4)**2)
+
+        with TemporaryDirectory() as temp_dir:
+            sim.meta['save-file'] = os.path.join(temp_dir, 'test.h5')
+            write_trajectory(sim.meta['save-file'], time, temperature,
+                             pressure, mass_fractions=mass_fractions
+                             )
+            sim.process_results()
+
+        delays = sim.meta['ignition-delays']
+        assert sorted(delays) == ['CH max', 'OH 1/2 max', 'OH max',
+                                  'pressure d/dt max', 'temperature d/dt max'
+                                  ]
+        assert (delays['pressure d/dt max'][0] ==
+                sim.meta['simulated-ignition-delay'].magnitude
+                )
+        assert np.isclose(delays['pressure d/dt max'][0], 0.005)
+        assert np.isclose(delays['temperature d/dt max'][0], 0.005)
+        assert np.isclose(delays['OH max'][0], 0.006)
+        assert delays['OH 1/2 max'][0] < 0.006
+        # No ignition by definition without peak
+        assert delays['CH max'][0] == 0.
+        assert np.isnan(delays['CH max'][1])
+
+    def test_no_definitions(self):
+        """Ensure processing unchanged without definitions set up.
+        """
+        file_path = os.path.join('testfile_st.yaml')
+        filename = pkg_resources.resource_filename(__name__, file_path)
+        properties = ChemKED(filename)
+        sim = create_simulations(filename, properties)[0]
+        sim.properties.ignition_target = 'pressure'
+        sim.properties.ignition_type = 'd/dt max'
+
+        time = np.linspace(0., 0.01, 1001)
+        pressure = 1.e5 + 1.e5 * np.tanh((time - 0.005) / 1.e-4)
+        with TemporaryDirectory() as temp_dir:
+            sim.meta['save-file'] = os.path.join(temp_dir, 'test.h5')
+            write_trajectory(sim.meta['save-file'], time, np.ones(time.size),
+                             pressure
+                             )
+            sim.process_results()
+        assert 'ignition-delays' not in sim.meta
+        assert np.isclose(sim.meta['simulated-ignition-delay'].magnitude, 0.005)
@@ -0,0 +1,291 @@
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+import numpy
+import pytest
+
+# Local imports
+from ..database import ResultsDatabase
+from ..results import dataset_results
+from ..rescore import score_datasets
+from ..statistics import (ModelErrors, compare_models, confidence_interval,
+                          average_over_datasets
+                          )
+from ..utils import yaml_load
+from ..__main__ import main
+
+
+def arrhenius_results(noise, seed):
+    """Stored results of two Arrhenius datasets, with noisy simulated delays.
+    """
+    rng = numpy.random.RandomState(seed)
+    results = {}
+    for dataset, num in [('a.yaml', 12), ('b.yaml', 7)]:
+        temperatures = numpy.linspace(1000., 1400., num)
+        exp_delays = 1.e-6 * numpy.exp(10000. / temperatures)
+        sim_delays = exp_delays * numpy.exp(rng.normal(0., noise, num))
+        results[dataset] = dataset_results('model.cti', dataset, 0,
+                                           temperatures, [1.e6] * num,
+                                           exp_delays, sim_delays
+                                           )
+    return results
+
+
+@pytest.fixture
+def stored_db(tmpdir):
+    """Database with results of a good and a poor model.
+    """
+    filename = str(tmpdir.join('results.db'))
+    with ResultsDatabase(filename) as db:
+        for model, noise in [('good.cti', 0.05), ('poor.cti', 0.5)]:
+            run_id = db.start_run(model, 'datasets.txt', {})
+            with db.writer(run_id) as writer:
+                for results in arrhenius_results(noise, 0).values():
+                    results['model'] = [model] * len(results['model'])
+                    writer.write(results)
+            db.finish_run(run_id, {})
+    return filename
+
+
+class TestModelErrors:
+    """
+    """
+    def test_grouped(self):
+        """Ensure datapoints grouped by dataset, in order of datapoint.
+        """
+        errors = ModelErrors('model.cti', ['a.yaml', 'b.yaml'], [1, 0, 1, 0],
+                             [1., 2., 3., 4.], [0, 1, 1, 0]
+                             )
+        numpy.testing.assert_array_equal(errors.dataset_index, [0, 0, 1, 1])
+        numpy.testing.assert_array_equal(errors.deviations, [4., 2., 1., 3.])
+        numpy.testing.assert_array_equal(errors.counts, [2, 2])
+        numpy.testing.assert_array_equal(errors.offsets, [0, 2])
+
+    def test_empty_dataset(self):
+        with pytest.raises(ValueError):
+            ModelErrors('model.cti', ['a.yaml', 'b.yaml'], [0, 0], [1., 2.])
+
+    def test_dataset_metrics(self):
+        """Ensure NaN ignored, and metrics computed for each row.
+        """
+        errors = ModelErrors('model.cti', ['a.yaml', 'b.yaml'],
+                             [0, 0, 1, 1, 1], [1., -3., 2., numpy.nan, 4.]
+                             )
+        error_funcs, dev_funcs = errors.dataset_metrics()
+        numpy.testing.assert_allclose(error_funcs, [5., 10.])
+        numpy.testing.assert_allclose(dev_funcs, [-1., 3.])
+
+        rows = numpy.array([errors.deviations, 2. * errors.deviations])
+        error_funcs, dev_funcs = errors.dataset_metrics(rows)
+        numpy.testing.assert_allclose(error_funcs, [[5., 10.], [20., 40.]])
+        numpy.testing.assert_allclose(dev_funcs, [[-1., 3.], [-2., 6.]])
+
+    def test_matches_rescore(self):
+        """Ensure metrics match those of rescored results.
+        """
+        results = arrhenius_results(0.3, 1)
+        # No ignition in one case
+        results['b.yaml']['simulated_delay'][2] = 0.
+        errors = ModelErrors.from_results('model.cti', results)
+        metrics = errors.metrics()
+        rescored = score_datasets('model.cti', sorted(results), results)
+
+        for dataset, expected in zip(metrics['datasets'], rescored['datasets']):
+            assert dataset['dataset'] == expected['dataset']
+            assert dataset['error function'] == pytest.approx(
+                expected['error function'])
+            assert dataset['absolute deviation'] == pytest.approx(
+                expected['absolute deviation'])
+        assert metrics['average error function'] == float('inf')
+
+    def test_skipped(self, capsys):
+        """Ensure skipped and missing datasets left out.
+        """
+        results = arrhenius_results(0.3, 1)
+        results['b.yaml']['status'] = ['skipped'] * 7
+        errors = ModelErrors.from_results('model.cti', results,
+                                          ['a.yaml', 'b.yaml', 'c.yaml']
+                                          )
+        assert errors.datasets == ['a.yaml']
+        assert 'no stored results of model model.cti for dataset c.yaml' in \
+            capsys.readouterr()[0]
+
+        with pytest.raises(ValueError):
+            ModelErrors.from_results('model.cti', results, ['b.yaml'])
+
+
+class TestBootstrap:
+    """
+    """
+    def test_confidence_interval(self):
+        samples = numpy.arange(1001.)
+        interval = confidence_interval(samples, 500., 0.9)
+        assert interval['lower'] == pytest.approx(50.)
+        assert interval['upper'] == pytest.approx(950.)
+        assert interval['standard error'] == pytest.approx(numpy.std(samples))
+
+    def test_average_over_datasets(self):
+        values = numpy.array([[1., 3.], [numpy.nan, 2.]])
+        numpy.testing.assert_allclose(average_over_datasets(values), [2., 2.])
+        numpy.testing.assert_allclose(
+            average_over_datasets(values, numpy.array([[1, 1], [0, 1]])),
+            [3., 2.]
+            )
+
+    def test_resample_within_datasets(self):
+        """Ensure each resample draws each dataset from its own datapoints.
+        """
+        errors = ModelErrors('model.cti', ['a.yaml', 'b.yaml'],
+                             [0, 0, 0, 1, 1], numpy.arange(5.)
+                             )
+        blocks = list(errors.resample(10, numpy.random.RandomState(0), 4))
+        assert [len(block) for block in blocks] == [4, 4, 2]
+        indices = numpy.concatenate(blocks)
+        assert numpy.all(indices[:, :3] < 3)
+        assert numpy.all(indices[:, 3:] >= 3) and numpy.all(indices < 5)
+
+    def test_intervals(self):
+        """Ensure intervals contain estimates, and independent of block size.
+        """
+        errors = ModelErrors.from_results('model.cti', arrhenius_results(0.3, 1))
+        output = errors.bootstrap(500, seed=2)
+        metrics = errors.metrics()
+
+        assert output['resamples'] == 500
+        overall = output['average error function']
+        assert overall['estimate'] == metrics['average error function']
+        assert overall['lower'] < overall['estimate'] < overall['upper']
+        assert overall['standard error'] > 0.
+        for dataset in output['datasets']:
+            interval = dataset['error function']
+            assert interval['lower'] <= interval['estimate'] <= interval['upper']
+
+        assert errors.bootstrap(500, seed=2, block_size=7) == output
+        assert errors.bootstrap(500, seed=3) != output
+
+    def test_resample_datasets(self):
+        """Ensure resampling datasets widens interval of average.
+        """
+        errors = ModelErrors('model.cti', ['a.yaml', 'b.yaml'],
+                             [0, 0, 0, 1, 1, 1], [1., 1., 1., 3., 3., 3.]
+                             )
+        output = errors.bootstrap(200, seed=0)
+        assert output['average error function']['lower'] == 5.
+        assert output['average error function']['upper'] == 5.
+
+        output = errors.bootstrap(200, seed=0, resample_datasets=True)
+        assert output['average error function']['lower'] == 1.
+        assert output['average error function']['upper'] == 9.
+
+
+class TestCompareModels:
+    """
+    """
+    def test_paired(self):
+        """Ensure better model identified, with paired resamples.
+        """
+        good = ModelErrors.from_results('good.cti', arrhenius_results(0.05, 0))
+        poor = ModelErrors.from_results('poor.cti', arrhenius_results(0.5, 0))
+        output = compare_models(good, poor, 1000, seed=0)
+
+        assert output['models'] == ['good.cti', 'poor.cti']
+        assert output['datapoints'] == 19
+        difference = output['error function difference']
+        assert difference['estimate'] == pytest.approx(
+            good.metrics()['average error function'] -
+            poor.metrics()['average error function']
+            )
+        assert difference['upper'] < 0.
+        assert output['probability first better'] == 1.
+        assert output['p-value'] == 0.
+
+        # Model compared with itself never differs
+        output = compare_models(good, good, 100, seed=0)
+        assert output['error function difference']['lower'] == 0.
+        assert output['error function difference']['upper'] == 0.
+        assert output['p-value'] == 1.
+
+    def test_common_datapoints(self):
+        """Ensure only datapoints of both models compared.
+        """
+        errors_a = ModelErrors('a.cti', ['a.yaml', 'b.yaml'], [0, 0, 1],
+                               [1., 2., 3.]
+                               )
+        errors_b = ModelErrors('b.cti', ['a.yaml', 'c.yaml'], [0, 1],
+                               [1., 5.]
+                               )
+        output = compare_models(errors_a, errors_b, 10, seed=0)
+        assert output['datasets'] == 1
+        assert output['datapoints'] == 1
+        assert output['error function difference']['estimate'] == 0.
+
+        errors_c = ModelErrors('c.cti', ['c.yaml'], [0], [1.])
+        with pytest.raises(ValueError):
+            compare_models(errors_a, errors_c)
+
+    def test_dataset_order(self):
+        """Ensure datasets matched by name, not by order.
+        """
+        results = arrhenius_results(0.05, 0)
+        errors = ModelErrors.from_results('model.cti', results)
+        reordered = ModelErrors.from_results('model.cti', results,
+                                             ['b.yaml', 'a.yaml']
+                                             )
+        assert reordered.datasets == ['b.yaml', 'a.yaml']
+
+        output = compare_models(errors, reordered, 100, seed=0)
+        assert output['datasets'] == 2
+        assert output['datapoints'] == 19
+        assert output['error function difference']['lower'] == 0.
+        assert output['error function difference']['upper'] == 0.
+
+    def test_unpaired(self):
+        """Ensure datapoint IDs repeated within a dataset not paired.
+        """
+        errors_a = ModelErrors('a.cti', ['a.yaml'], [0, 0], [1., 2.], [0, 1])
+        errors_b = ModelErrors('b.cti', ['a.yaml'], [0, 0], [1., 2.], [0, 0])
+        with pytest.raises(ValueError):
+            compare_models(errors_a, errors_b, 10, seed=0)
+
+
+class TestCommand:
+    """
+    """
+    def test_bootstrap(self, stored_db, tmpdir, capsys):
+        output_file = str(tmpdir.join('bootstrap.yaml'))
+        assert main(['compare', stored_db, '-m', 'good.cti', '-n', '100',
+                     '--seed', '0', '-o', output_file
+                     ]) == 0
+        text = capsys.readouterr()[0]
+        assert 'good.cti: 95% confidence intervals from 100 resamples' in text
+        assert 'overall' in text
+        with open(output_file, 'r') as f:
+            output = yaml_load(f)
+        assert [dataset['dataset'] for dataset in output['datasets']] == [
+            'a.yaml', 'b.yaml'
+            ]
+
+    def test_compare(self, stored_db, tmpdir, capsys):
+        dataset_file = str(tmpdir.join('datasets.txt'))
+        with open(dataset_file, 'w') as f:
+            f.write('b.yaml\n')
+        output_file = str(tmpdir.join('compare.yaml'))
+        assert main(['compare', stored_db, '-m', 'good.cti', '-m', 'poor.cti',
+                     '-d', dataset_file, '-n', '100', '--seed', '0',
+                     '-o', output_file
+                     ]) == 0
+        text = capsys.readouterr()[0]
+        assert 'good.cti - poor.cti: 7 datapoints in 1 datasets' in text
+        assert 'probability good.cti better' in text
+        with open(output_file, 'r') as f:
+            output = yaml_load(f)
+        assert output['datapoints'] == 7
+
+    def test_errors(self, stored_db, tmpdir):
+        with pytest.raises(SystemExit):
+            main(['compare', stored_db, '-m', 'a', '-m', 'b', '-m', 'c'])
+        with pytest.raises(SystemExit):
+            main(['compare', str(tmpdir.join('missing.db')), '-m', 'good.cti'])
+        with pytest.raises(SystemExit):
+            main(['compare', stored_db, '-m', 'missing.cti'])
@@ -0,0 +1,130 @@
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import time
+
+import numpy as np
+import pytest
+import yaml
+
+# Local imports
+from ..utils import yaml_load, yaml_dump
+
+
+def generate_results(num_datasets, num_datapoints):
+    """Generate model evaluation results with the same layout as PyTeCK output.
+    """
+    composition = [{'InChI': '1S/H2/h1H', 'species-name': 'H2',
+                    'amount': '0.00444'},
+                   {'InChI': '1S/O2/c1-2', 'species-name': 'O2',
+                    'amount': '0.00556'},
+                   {'InChI': '1S/Ar', 'species-name': 'Ar', 'amount': '0.99'},
+                   ]
+    rng = np.random.RandomState(0)
+    output = {'model': 'h2o2.cti', 'datasets': []}
+    for idx_set in range(num_datasets):
+        datapoints = []
+        for idx in range(num_datapoints):
+            datapoints.append(
+                {'experimental ignition delay':
+                     str(rng.uniform(1.e-5, 1.e-2)) + ' second',
+                 'simulated ignition delay':
+                     str(rng.uniform(1.e-5, 1.e-2)) + ' second',
+                 'temperature': str(rng.uniform(800., 1500.)) + ' kelvin',
+                 'pressure': str(rng.uniform(1.e5, 5.e6)) + ' pascal',
+                 'composition': [dict(c) for c in composition],
+                 'composition type': 'mole fraction',
+                 })
+        output['datasets'].append(
+            {'dataset': 'dataset_{}.yaml'.format(idx_set),
+             'dataset_id': idx_set,
+             'standard deviation': float(rng.uniform(0.1, 0.2)),
+             'datapoints': datapoints,
+             'error function': float(rng.uniform(0., 100.)),
+             'absolute deviation': float(rng.uniform(0., 10.)),
+             })
+    output['average error function'] = float(rng.uniform(0., 100.))
+    output['error function standard deviation'] = float('nan')
+    output['average deviation function'] = float(rng.uniform(0., 10.))
+    return output
+
+
+class TestYAML:
+    """
+    """
+    def test_round_trip(self):
+        """Ensure results read back the same as written.
+        """
+        output = generate_results(3, 10)
+        loaded = yaml_load(yaml_dump(output))
+
+        # NaN does not compare equal to itself
+        assert np.isnan(loaded.pop('error function standard deviation'))
+        output.pop('error function standard deviation')
+        assert loaded == output
+
+    def test_same_as_pure_python(self):
+        """Ensure output matches that of the pure-Python dumper and loader.
+        """
+        output = generate_results(3, 10)
+        text = yaml_dump(output)
+        assert text == yaml.dump(output, Dumper=yaml.SafeDumper)
+        assert text == yaml.dump(output, Dumper=yaml.Dumper)
+        assert repr(yaml_load(text)) == repr(yaml.safe_load(text))
+
+    def test_dump_to_file(self, tmpdir):
+        """Ensure output written to open file.
+        """
+        output = {'datasets': [{'dataset': 'a.yaml', 'error function': 1.5}]}
+        filename = str(tmpdir.join('results.yaml'))
+        with open(filename, 'w') as f:
+            assert yaml_dump(output, f) is None
+        with open(filename, 'r') as f:
+            assert yaml_load(f) == output
+
+    def test_core_schema(self):
+        """Ensure plain scalars resolved as by YAML 1.2 readers such as Cantera.
+        """
+        text = 'species: [NO, on, Yes, H2]\nA: 1e5\nb: [010, 0x1F, -2.5, .inf]\nc: true\n'
+        assert yaml_load(text)['species'][:3] == [False, True, True]
+
+        loaded = yaml_load(text, core_schema=True)
+        assert loaded == {'species': ['NO', 'on', 'Yes', 'H2'], 'A': 1.e5,
+                          'b': [10, 31, -2.5, float('inf')], 'c': True
+                          }
+        assert yaml_load(yaml_dump(loaded), core_schema=True) == loaded
+
+    @pytest.mark.benchmark
+    def test_large_results(self):
+        """Compare LibYAML and pure-Python speed on large results file.
+        """
+        if not getattr(yaml, '__with_libyaml__', False):
+            pytest.skip('PyYAML built without LibYAML')
+
+        output = generate_results(20, 500)
+
+        start = time.time()
+        text_python = yaml.dump(output, Dumper=yaml.Dumper)
+        time_dump_python = time.time() - start
+
+        start = time.time()
+        text = yaml_dump(output)
+        time_dump = time.time() - start
+
+        start = time.time()
+        yaml.safe_load(text)
+        time_load_python = time.time() - start
+
+        start = time.time()
+        yaml_load(text)
+        time_load = time.time() - start
+
+        print('Dump: {:.2f} s (pure Python), {:.2f} s (LibYAML); '
+              'load: {:.2f} s (pure Python), {:.2f} s (LibYAML)'.format(
+              time_dump_python, time_dump, time_load_python, time_load
+              ))
+        assert text == text_python
+        assert time_dump < time_dump_python
+        assert time_load < time_load_python
@@ -3,9 +3,13 @@ from __future__ import print_function
 from __future__ import division
 
 from pint import DimensionalityError
+import numpy as np
 import pytest
 
 from ..validation import validate_geq, validate_gt, validate_leq, validate_num
+from ..validation import (validate_array_geq, validate_array_gt,
+                          validate_array_leq
+                          )
 from ..utils import units
 
 class TestValidate_geq:
@@ -161,3 +165,79 @@ class TestValidate_num:
     def test_num_incompatible_units(self):
         with pytest.raises(DimensionalityError):
             validate_leq('testval', 0 * units.second, 10 * units.meter)
+
+
+class TestValidate_array:
+    """Class of tests for validation functions of arrays of values.
+    """
+
+    def test_array_geq_valid(self):
+        values = np.array([0., 1., 2.]) * units.second
+        assert validate_array_geq('testval', values, 0 * units.second) is values
+
+    def test_array_gt_valid(self):
+        values = np.array([1., 2.]) * units.ms
+        assert validate_array_gt('testval', values, 0 * units.second) is values
+
+    def test_array_leq_valid(self):
+        values = np.array([-1., 0.])
+        assert validate_array_leq('testval', values, 0.) is values
+
+    def test_array_geq_too_small(self):
+        values = np.array([0., 1., -2., -3.]) * units.second
+        with pytest.raises(RuntimeError) as excinfo:
+            validate_array_geq('testval', values, 0 * units.second)
+        assert 'testval must be greater than or equal to 0 second' in str(
+            excinfo.value)
+        assert 'Value provided was: -2.0 second (index 2)' in str(excinfo.value)
+
+    def test_array_gt_equal(self):
+        values = np.array([1., 0.])
+        with pytest.raises(RuntimeError) as excinfo:
+            validate_array_gt('testval', values, 0.)
+        assert '(index 1)' in str(excinfo.value)
+
+    def test_array_gt_nan(self):
+        with pytest.raises(RuntimeError):
+            validate_array_gt('testval', np.array([np.nan]), 0.)
+
+    def test_array_leq_too_large(self):
+        with pytest.raises(RuntimeError) as excinfo:
+            validate_array_leq('testval', np.array([10, 20]), 15)
+        assert '(index 1)' in str(excinfo.value)
+
+    def test_array_same_message(self):
+        """Ensure message matches that of scalar validation.
+        """
+        value = -2. * units.kelvin
+        with pytest.raises(RuntimeError) as excinfo:
+            validate_gt('testval', value, 0. * units.kelvin)
+        with pytest.raises(RuntimeError) as excinfo_array:
+            validate_array_gt('testval', np.array([1., -2.]) * units.kelvin,
+                              0. * units.kelvin
+                              )
+        assert str(excinfo_array.value).startswith(str(excinfo.value))
+
+    def test_array_converted_units(self):
+        values = np.array([-100., 25.]) * units.degC
+        assert validate_array_gt('testval', values, 0 * units.kelvin) is values
+        with pytest.raises(RuntimeError):
+            validate_array_gt('testval', values, 200 * units.kelvin)
+
+    def test_array_incompatible_units(self):
+        with pytest.raises(DimensionalityError):
+            validate_array_geq('testval', np.array([5.]) * units.second,
+                               0 * units.meter
+                               )
+
+    def test_array_unitless(self):
+        with pytest.raises(DimensionalityError):
+            validate_array_gt('testval', np.array([5.]), 0 * units.meter)
+
+    def test_array_units_when_unitless(self):
+        with pytest.raises(DimensionalityError):
+            validate_array_leq('testval', np.array([5.]) * units.meter, 10)
+
+    def test_array_wrong_type(self):
+        with pytest.raises(TypeError):
+            validate_array_geq('testval', np.array(['five']), 0)
@@ -0,0 +1,172 @@
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import os
+import time
+
+import pytest
+
+# Local imports
+from collections import deque
+
+from ..workers import WorkerPool, TaskTimeout, TaskError, WorkerError
+
+initialized = []
+
+
+def sleep_and_square(value):
+    """Task finishing in reverse order of submission.
+    """
+    time.sleep(0.01 * (4 - value % 4))
+    return value**2
+
+
+def fail_on_three(value):
+    if value == 3:
+        raise ValueError('bad case')
+    return value
+
+
+def hang_on_two(value):
+    """Task that never finishes for one value; otherwise returns process ID.
+    """
+    if value == 2:
+        time.sleep(1000.)
+    return os.getpid()
+
+
+def exit_on_one(value):
+    if value == 1:
+        os._exit(1)
+    return value
+
+
+def return_initialized(value):
+    return initialized
+
+
+def return_key(task):
+    """Task returning process ID and its key, after a short time.
+    """
+    time.sleep(0.01)
+    return os.getpid(), task[0]
+
+
+class TestWorkerPool:
+    """
+    """
+    def test_bounded(self):
+        """Ensure all results returned, with at most a few tasks in flight.
+        """
+        pulled = []
+
+        def tasks():
+            for value in range(12):
+                pulled.append(value)
+                yield value
+
+        results = {}
+        with WorkerPool(processes=2) as pool:
+            for idx, result in pool.imap_bounded(sleep_and_square, tasks(), 3):
+                results[idx] = result
+                # finished tasks are replaced only once yielded
+                assert len(pulled) - len(results) < 3
+        assert results == {idx: idx**2 for idx in range(12)}
+
+    def test_error(self):
+        """Ensure error in task raised.
+        """
+        with pytest.raises(WorkerError) as excinfo:
+            with WorkerPool(processes=1) as pool:
+                list(pool.imap_bounded(fail_on_three, range(6), 2))
+        assert 'ValueError: bad case' in str(excinfo.value)
+
+    def test_return_errors(self):
+        """Ensure errors returned as records, and other tasks finish.
+        """
+        with WorkerPool(processes=2) as pool:
+            results = dict(pool.imap_bounded(fail_on_three, range(6),
+                                             return_errors=True
+                                             ))
+        assert isinstance(results[3], TaskError)
+        assert results[3].error_type == 'ValueError'
+        assert results[3].message == 'bad case'
+        assert 'fail_on_three' in results[3].traceback
+        assert [results[idx] for idx in [0, 1, 2, 4, 5]] == [0, 1, 2, 4, 5]
+
+    def test_retries(self):
+        """Ensure failed tasks retried with new arguments, alongside others.
+        """
+        retries = deque()
+        results = {}
+        with WorkerPool(processes=2) as pool:
+            for idx, result in pool.imap_bounded(fail_on_three, range(6), 2,
+                                                 return_errors=True,
+                                                 retries=retries
+                                                 ):
+                if isinstance(result, TaskError):
+                    retries.append((idx, 30))
+                else:
+                    results[idx] = result
+        assert results == {0: 0, 1: 1, 2: 2, 3: 30, 4: 4, 5: 5}
+
+    def test_initializer(self):
+        """Ensure each worker initialized.
+        """
+        with WorkerPool(processes=2, initializer=initialized.append,
+                        initargs=('shared',)
+                        ) as pool:
+            results = list(pool.imap_bounded(return_initialized, range(4)))
+        assert [result for _, result in results] == [['shared']] * 4
+
+    def test_timeout(self):
+        """Ensure stuck worker killed and replaced, and other tasks finish.
+        """
+        start = time.time()
+        with WorkerPool(processes=2) as pool:
+            results = dict(pool.imap_bounded(hang_on_two, range(6),
+                                             timeout=0.5
+                                             ))
+            assert pool.replaced == 1
+        assert time.time() - start < 10.
+
+        assert sorted(results) == list(range(6))
+        assert isinstance(results[2], TaskTimeout)
+        assert results[2].elapsed >= 0.5
+        assert all(isinstance(results[idx], int) for idx in [0, 1, 3, 4, 5])
+
+    def test_worker_exit(self):
+        """Ensure worker exiting unexpectedly raises error.
+        """
+        with pytest.raises(WorkerError):
+            with WorkerPool(processes=1) as pool:
+                list(pool.imap_bounded(exit_on_one, range(3)))
+
+        with WorkerPool(processes=1) as pool:
+            results = dict(pool.imap_bounded(exit_on_one, range(3),
+                                             return_errors=True
+                                             ))
+            assert pool.replaced == 1
+        assert results[1].error_type == 'WorkerExit'
+        assert [results[0], results[2]] == [0, 2]
+
+    def test_affinity(self):
+        """Ensure workers keep to tasks with the same key where they can.
+        """
+        tasks = [('a' if value % 2 else 'b', value) for value in range(12)]
+        keys = {}
+        with WorkerPool(processes=2) as pool:
+            for idx, (pid, key) in pool.imap_bounded(
+                    return_key, tasks, 12, affinity=lambda task: task[0]
+                    ):
+                assert key == tasks[idx][0]
+                keys.setdefault(pid, []).append(key)
+
+        switches = sum([sum([key != worker_keys[i - 1]
+                             for i, key in enumerate(worker_keys) if i > 0
+                             ]) for worker_keys in keys.values()
+                        ])
+        assert sum([len(worker_keys) for worker_keys in keys.values()]) == 12
+        assert switches <= 2
@@ -4,11 +4,188 @@
 """
 from __future__ import print_function
 
-import pint
+import re
 
-units = pint.UnitRegistry()
 
-units.define('cm3 = centimeter**3')
+class LazyUnitRegistry(object):
+    """Pint unit registry, created on first use.
+
+    Creating a ``pint.UnitRegistry`` is relatively slow, so this defers
+    importing Pint and building the registry until a unit is needed.
+    Attribute access and calls are passed through to the registry.
+    """
+
+    def __init__(self):
+        self._registry = None
+
+    def _get_registry(self):
+        if self._registry is None:
+            import pint
+            registry = pint.UnitRegistry()
+            registry.define('cm3 = centimeter**3')
+            self._registry = registry
+        return self._registry
+
+    def __getattr__(self, name):
+        return getattr(self._get_registry(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._get_registry()(*args, **kwargs)
+
+
+units = LazyUnitRegistry()
+
+
+def import_cantera():
+    """Import Cantera on first use, with thermo warnings suppressed."""
+    try:
+        import cantera as ct
+    except ImportError:
+        print("Error: Cantera must be installed.")
+        raise
+    ct.suppress_thermo_warnings()
+    return ct
+
+
+def import_tables():
+    """Import PyTables on first use."""
+    try:
+        import tables
+    except ImportError:
+        print('PyTables must be installed')
+        raise
+    return tables
+
+
+def import_yaml():
+    """Import PyYAML on first use."""
+    try:
+        import yaml
+    except ImportError:
+        print('Warning: YAML must be installed to read or write files.')
+        raise
+    return yaml
+
+
+core_schema_resolvers = [
+    ('tag:yaml.org,2002:bool', r'^(?:true|True|TRUE|false|False|FALSE)$',
+     'tTfF'
+     ),
+    ('tag:yaml.org,2002:int', r'^(?:[-+]?[0-9]+|0o[0-7]+|0x[0-9a-fA-F]+)$',
+     '-+0123456789'
+     ),
+    ('tag:yaml.org,2002:float',
+     r'^(?:[-+]?(?:\.[0-9]+|[0-9]+(?:\.[0-9]*)?)(?:[eE][-+]?[0-9]+)?'
+     r'|[-+]?\.(?:inf|Inf|INF)|\.(?:nan|NaN|NAN))$',
+     '-+.0123456789'
+     ),
+    ]
+"""list: tag, pattern, and first characters of YAML 1.2 core schema scalars"""
+
+_core_schema_loaders = {}
+
+
+def core_schema_loader(yaml):
+    """Safe YAML loader resolving plain scalars by the YAML 1.2 core schema.
+
+    PyYAML follows YAML 1.1, where e.g. ``NO`` and ``on`` are booleans and
+    ``1e5`` is a string, while Cantera (like most YAML 1.2 readers) reads
+    these as the string, string, and float. This loader matches Cantera.
+
+    Parameters
+    ----------
+    yaml : module
+        PyYAML module
+
+    Returns
+    -------
+    loader : class
+        Subclass of LibYAML-based (when available) safe loader
+
+    """
+    base = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    if base in _core_schema_loaders:
+        return _core_schema_loaders[base]
+
+    def construct_int(loader, node):
+        value = loader.construct_scalar(node)
+        if value[:2] in ['0o', '0x']:
+            return int(value, 0)
+        return int(value)
+
+    class CoreSchemaLoader(base):
+        pass
+
+    # Only keep YAML 1.1 resolvers shared with the core schema (null, merge)
+    replaced = ['tag:yaml.org,2002:bool', 'tag:yaml.org,2002:int',
+                'tag:yaml.org,2002:float', 'tag:yaml.org,2002:timestamp',
+                'tag:yaml.org,2002:value'
+                ]
+    CoreSchemaLoader.yaml_implicit_resolvers = dict(
+        (first, [(tag, regexp) for tag, regexp in resolvers
+                 if tag not in replaced
+                 ])
+        for first, resolvers in base.yaml_implicit_resolvers.items()
+        )
+    for tag, regexp, first in core_schema_resolvers:
+        CoreSchemaLoader.add_implicit_resolver(tag, re.compile(regexp),
+                                               list(first)
+                                               )
+    CoreSchemaLoader.add_constructor('tag:yaml.org,2002:int', construct_int)
+
+    _core_schema_loaders[base] = CoreSchemaLoader
+    return CoreSchemaLoader
+
+
+def yaml_load(stream, core_schema=False):
+    """Load YAML safely, using the LibYAML-based loader when available.
+
+    Parameters
+    ----------
+    stream : str or file
+        YAML document, or open file with YAML document
+    core_schema : bool
+        Optional; if ``True``, resolve plain scalars by the YAML 1.2 core
+        schema (as Cantera does), rather than YAML 1.1. Default ``False``.
+
+    Returns
+    -------
+    data : object
+        Data in YAML document
+
+    """
+    yaml = import_yaml()
+    if core_schema:
+        loader = core_schema_loader(yaml)
+    else:
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    return yaml.load(stream, Loader=loader)
+
+
+def yaml_dump(data, stream=None, **kwargs):
+    """Dump data as YAML, using the LibYAML-based dumper when available.
+
+    Only standard YAML tags are written, so the output can be read by
+    :func:`yaml_load`.
+
+    Parameters
+    ----------
+    data : object
+        Data to be written
+    stream : file
+        Optional; open file to write to. If not given, a string is returned.
+    kwargs
+        Additional options for ``yaml.dump`` (e.g., ``default_flow_style``)
+
+    Returns
+    -------
+    output : str or None
+        YAML document, if ``stream`` not given
+
+    """
+    yaml = import_yaml()
+    dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+    return yaml.dump(data, stream, Dumper=dumper, **kwargs)
 
 get_temp_unit = {'K': 'kelvin',
                  'C': 'degC',
@@ -12,6 +12,7 @@ import sys
 if sys.version_info > (3,):
     long = int
 
+import numpy
 import pint
 
 # Local imports
@@ -224,3 +225,168 @@ def validate_num(value_name, value):
            'value ' + str(value)
            )
     raise TypeError(msg)
+
+
+def _array_magnitude(value_name, values, limit):
+    """Check dimensionality of array of values, and return magnitudes.
+
+    Dimensionality is checked once for the whole array, and the magnitudes
+    converted to the units of ``limit``.
+
+    Parameters
+    ---------
+    value_name : str
+        Name of values being tested
+    values : numpy.ndarray, pint.Quantity
+        Array of values to be tested
+    limit : int, float, pint.Quantity
+        Limit the values will be compared against
+
+    Returns
+    -------
+    magnitude : numpy.ndarray
+        Values in the units of ``limit``
+    limit_magnitude : float
+        Magnitude of ``limit``
+
+    """
+    if isinstance(values, units.Quantity):
+        if not isinstance(limit, units.Quantity):
+            msg = ('\n' + value_name + ' given with units, when variable '
+                   'should be dimensionless.'
+                   )
+            raise pint.DimensionalityError(values.units, None,
+                                           extra_msg=msg
+                                           )
+        try:
+            magnitude = values.to(limit.units).magnitude
+        except pint.DimensionalityError:
+            msg = ('\n' + value_name + ' given in incompatible units. '
+                   'Correct units share dimensionality with: ' +
+                   str(limit.units)
+                   )
+            raise pint.DimensionalityError(values.units, limit.units,
+                                           extra_msg=msg
+                                           )
+        limit_magnitude = limit.magnitude
+    elif isinstance(limit, units.Quantity):
+        msg = ('\n' + value_name + ' not given in units. '
+               'Correct units share dimensionality with: ' +
+               str(limit.units)
+               )
+        raise pint.DimensionalityError(None, limit.units, extra_msg=msg)
+    else:
+        magnitude = values
+        limit_magnitude = limit
+
+    magnitude = numpy.asarray(magnitude)
+    if magnitude.dtype.kind not in 'biuf':
+        msg = (value_name + ' must be an array of integers or floats. \n'
+               'The value provided was of type ' + str(type(values)) + ' and '
+               'value ' + str(values)
+               )
+        raise TypeError(msg)
+
+    return magnitude, limit_magnitude
+
+
+def _raise_array_error(value_name, values, invalid, relation, limit):
+    """Raise error for first invalid element of an array of values.
+    """
+    idx = int(numpy.flatnonzero(invalid)[0])
+    msg = (value_name + ' must be ' + relation + ' ' + str(limit) + '.\n'
+           'Value provided was: ' + str(values[idx]) + ' (index ' + str(idx) +
+           ')'
+           )
+    # RuntimeError used to avoid being caught by Pint comparison error.
+    raise RuntimeError(msg)
+
+
+def validate_array_geq(value_name, values, low_lim):
+    """Raise error if any value lower than specified lower limit or wrong type.
+
+    Array version of :func:`validate_geq`, which checks units once and
+    compares all values at once.
+
+    Parameters
+    ---------
+    value_name : str
+        Name of values being tested
+    values : numpy.ndarray, pint.Quantity
+        Array of values to be tested
+    low_lim : int, float, pint.Quantity
+        Lowest acceptable limit of ``values``
+
+    Returns
+    -------
+    values : type(values)
+        The original values
+
+    """
+    magnitude, limit = _array_magnitude(value_name, values, low_lim)
+    invalid = magnitude < limit
+    if numpy.any(invalid):
+        _raise_array_error(value_name, values, invalid,
+                           'greater than or equal to', low_lim
+                           )
+    return values
+
+
+def validate_array_gt(value_name, values, low_lim):
+    """Raise error if any value not greater than lower limit or wrong type.
+
+    Array version of :func:`validate_gt`, which checks units once and
+    compares all values at once.
+
+    Parameters
+    ---------
+    value_name : str
+        Name of values being tested
+    values : numpy.ndarray, pint.Quantity
+        Array of values to be tested
+    low_lim : int, float, pint.Quantity
+        ``values`` must be greater than this limit
+
+    Returns
+    -------
+    values : type(values)
+        The original values
+
+    """
+    magnitude, limit = _array_magnitude(value_name, values, low_lim)
+    invalid = ~(magnitude > limit)
+    if numpy.any(invalid):
+        _raise_array_error(value_name, values, invalid, 'greater than',
+                           low_lim
+                           )
+    return values
+
+
+def validate_array_leq(value_name, values, upp_lim):
+    """Raise error if any value greater than upper limit or wrong type.
+
+    Array version of :func:`validate_leq`, which checks units once and
+    compares all values at once.
+
+    Parameters
+    ---------
+    value_name : str
+        Name of values being tested
+    values : numpy.ndarray, pint.Quantity
+        Array of values to be tested
+    upp_lim : int, float, pint.Quantity
+        Highest acceptable limit of ``values``
+
+    Returns
+    -------
+    values : type(values)
+        The original values
+
+    """
+    magnitude, limit = _array_magnitude(value_name, values, upp_lim)
+    invalid = magnitude > limit
+    if numpy.any(invalid):
+        _raise_array_error(value_name, values, invalid,
+                           'less than or equal to', upp_lim
+                           )
+    return values
@@ -0,0 +1,340 @@
+"""Pool of worker processes for running simulation cases.
+
+Unlike :class:`multiprocessing.Pool`, each worker has its own connection to
+the parent, so a worker stuck in a case can be killed and replaced without
+losing the others, and tasks are taken from a (possibly lazy) iterable only as
+earlier ones finish.
+"""
+
+# Python 2 compatibility
+from __future__ import print_function
+from __future__ import division
+
+# Standard libraries
+import sys
+import time
+import traceback
+import multiprocessing
+from multiprocessing.connection import wait
+from collections import deque
+
+
+class TaskTimeout(object):
+    """Result of a task whose worker was killed for running too long.
+
+    Parameters
+    ----------
+    elapsed : float
+        Wall time in seconds that the task had run when its worker was killed
+
+    """
+    def __init__(self, elapsed):
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return 'TaskTimeout({:.1f})'.format(self.elapsed)
+
+
+class TaskError(object):
+    """Record of an error raised by a task, or of its worker exiting.
+
+    Unlike the exception itself, the record can always be sent back from
+    the worker process.
+
+    Parameters
+    ----------
+    error_type : str
+        Name of exception class
+    message : str
+        Exception message
+    traceback : str
+        Formatted traceback, if available
+
+    """
+    def __init__(self, error_type, message, traceback=''):
+        self.error_type = error_type
+        self.message = message
+        self.traceback = traceback
+
+    def __repr__(self):
+        return 'TaskError({!r}, {!r})'.format(self.error_type, self.message)
+
+
+class WorkerError(RuntimeError):
+    """Error in a task, or its worker exiting, reported by the pool.
+    """
+    pass
+
+
+def peak_memory():
+    """Peak resident memory of the current process.
+
+    Returns
+    -------
+    memory : int
+        Peak resident memory in bytes, or ``None`` where not available (e.g.,
+        on Windows)
+
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Given in kilobytes, except on macOS
+    if sys.platform != 'darwin':
+        memory *= 1024
+    return memory
+
+
+def _worker_loop(conn, initializer, initargs):
+    """Run tasks received from the parent process, until told to stop.
+    """
+    if initializer is not None:
+        initializer(*initargs)
+
+    while True:
+        try:
+            item = conn.recv()
+        except EOFError:
+            return
+        if item is None:
+            return
+
+        idx, func, task = item
+        try:
+            result = (idx, True, func(task))
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except BaseException as err:
+            # Includes errors not derived from Exception
+            result = (idx, False, TaskError(type(err).__name__, str(err),
+                                            traceback.format_exc()
+                                            ))
+
+        try:
+            conn.send(result)
+        except Exception as err:
+            # e.g., result could not be pickled
+            conn.send((idx, False, TaskError(type(err).__name__, str(err),
+                                             traceback.format_exc()
+                                             )))
+
+
+class _Worker(object):
+    """Worker process, its connection, and the task it is running.
+    """
+    def __init__(self, initializer, initargs):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_worker_loop, args=(child_conn, initializer, initargs)
+            )
+        self.process.daemon = True
+        self.process.start()
+        child_conn.close()
+        self.task = None
+        self.started = None
+        self.affinity = None
+
+    def submit(self, idx, func, task):
+        self.conn.send((idx, func, task))
+        self.task = idx
+        self.started = time.time()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join()
+        self.conn.close()
+
+
+class WorkerPool(object):
+    """Pool of worker processes, each running one task at a time.
+
+    Parameters
+    ----------
+    processes : int
+        Number of worker processes
+    initializer : callable
+        Optional; function called when each worker (including any
+        replacement) starts
+    initargs : tuple
+        Arguments passed to ``initializer``
+
+    """
+    def __init__(self, processes, initializer=None, initargs=()):
+        self.initializer = initializer
+        self.initargs = initargs
+        self.workers = [_Worker(initializer, initargs)
+                        for _ in range(processes)
+                        ]
+        self.replaced = 0
+
+    @property
+    def active(self):
+        """Number of workers running a task.
+        """
+        return len([worker for worker in self.workers
+                    if worker.task is not None
+                    ])
+
+    def _replace(self, worker):
+        """Kill a worker and start a new one in its place.
+        """
+        worker.kill()
+        self.workers[self.workers.index(worker)] = _Worker(self.initializer,
+                                                           self.initargs
+                                                           )
+        self.replaced += 1
+
+    def imap_bounded(self, func, tasks, max_in_flight=None, timeout=None,
+                     return_errors=False, retries=None, affinity=None):
+        """Apply function to tasks, with a bounded number in flight.
+
+        Tasks are only taken from ``tasks`` (which may be a generator) as
+        earlier ones finish, and results are yielded as each finishes.
+        Tasks added to ``retries`` while iterating (e.g., after an error) are
+        run again ahead of new tasks, while other tasks continue. Given an
+        ``affinity`` key, an idle worker takes the first waiting task with the
+        same key as its previous task, if any, before other waiting tasks.
+
+        Parameters
+        ----------
+        func : callable
+            Function applied to each task; must be picklable
+        tasks : iterable
+            Argument of each call to ``func``
+        max_in_flight : int
+            Optional; maximum number of tasks taken but not yet yielded.
+            Defaults to twice the number of workers.
+        timeout : float
+            Optional; wall time in seconds after which a task's worker is
+            killed and replaced, and a :class:`TaskTimeout` yielded as its
+            result.
+        return_errors : bool
+            If ``True``, yield a :class:`TaskError` as the result of a task
+            that raises an error or whose worker exits, rather than raising
+            :class:`WorkerError`.
+        retries : collections.deque
+            Optional; queue of ``(index, task)`` pairs to run again, which
+            the caller may add to while iterating.
+        affinity : callable
+            Optional; function of a task giving a key (e.g., its mechanism)
+            that workers prefer to keep the same between tasks
+
+        Yields
+        ------
+        index : int
+            Index of task in ``tasks``
+        result : object
+            Result of ``func`` for the task, in order of completion
+
+        Raises
+        ------
+        WorkerError
+            If ``func`` raises an error, or a worker exits unexpectedly,
+            unless ``return_errors`` is ``True``.
+
+        """
+        if not max_in_flight:
+            max_in_flight = 2 * len(self.workers)
+
+        if retries is None:
+            retries = deque()
+        waiting = deque()
+        tasks = enumerate(tasks)
+        in_flight = 0
+        while True:
+            # Retried tasks go ahead of new ones
+            while retries:
+                waiting.appendleft(retries.pop())
+                in_flight += 1
+
+            while in_flight < max_in_flight:
+                try:
+                    idx, task = next(tasks)
+                except StopIteration:
+                    break
+                waiting.append((idx, task))
+                in_flight += 1
+
+            for worker in self.workers:
+                if waiting and worker.task is None:
+                    pos = 0
+                    if affinity is not None:
+                        pos = next((pos for pos, (_, task) in enumerate(waiting)
+                                    if affinity(task) == worker.affinity
+                                    ), 0)
+                    idx, task = waiting[pos]
+                    del waiting[pos]
+                    if affinity is not None:
+                        worker.affinity = affinity(task)
+                    worker.submit(idx, func, task)
+
+            busy = [worker for worker in self.workers
+                    if worker.task is not None
+                    ]
+            if not busy:
+                return
+
+            wait_time = None
+            if timeout is not None:
+                wait_time = max(0., min(worker.started + timeout
+                                        for worker in busy
+                                        ) - time.time())
+            ready = wait([worker.conn for worker in busy], wait_time)
+
+            for worker in busy:
+                if worker.conn in ready:
+                    try:
+                        idx, success, result = worker.conn.recv()
+                        worker.task = None
+                    except EOFError:
+                        idx = worker.task
+                        success = False
+                        result = TaskError('WorkerExit', 'Worker exited '
+                                           'while running task ' + str(idx)
+                                           )
+                        self._replace(worker)
+                    in_flight -= 1
+                    if not success and not return_errors:
+                        raise WorkerError(result.error_type + ': ' +
+                                          result.message + '\n' +
+                                          result.traceback
+                                          )
+                    yield idx, result
+
+                elif (timeout is not None and
+                      time.time() - worker.started >= timeout
+                      ):
+                    idx = worker.task
+                    elapsed = time.time() - worker.started
+                    self._replace(worker)
+                    in_flight -= 1
+                    yield idx, TaskTimeout(elapsed)
+
+    def close(self):
+        """Stop workers once they finish their current tasks.
+        """
+        for worker in self.workers:
+            try:
+                worker.conn.send(None)
+            except (OSError, IOError):
+                pass
+        for worker in self.workers:
+            worker.process.join()
+            worker.conn.close()
+
+    def terminate(self):
+        """Stop workers immediately.
+        """
+        for worker in self.workers:
+            worker.kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
@@ -43,6 +43,10 @@ install_requires = [
     'scipy>=0.19.0',
 ]
 
+extras_require = {
+    'arrow': ['pyarrow'],
+}
+
 tests_require = [
     'pytest>=3.0.1',
     'pytest-cov',
@@ -65,8 +69,10 @@ setup(
     packages=['pyteck', 'pyteck.tests'],
     package_dir={'pyteck': 'pyteck'},
     include_package_data=True,
-    package_data={'pyteck': ['tests/*.xml', 'tests/*.yaml', 'tests/dataset_file.txt']},
+    package_data={'pyteck': ['tests/*.xml', 'tests/*.yaml', 'tests/*.json',
+                             'tests/dataset_file.txt']},
     install_requires=install_requires,
+    extras_require=extras_require,
     zip_safe=False,
 
     license='MIT License',